@@ -5,4 +5,15 @@ Système de quiz automatisé pour valider les connaissances des développeurs.
 
 __version__ = "1.0.0"
 
+# API intégrable, importée à la demande : `python -m diffquiz.<module>` ne
+# charge pas diffquiz.api (et ses dépendances) avant le module exécuté
+__all__ = [
+    "QuizClient", "QuizOptions", "QuizResult", "run_quiz", "STATUS_OK", "STATUS_SKIP", "STATUS_PASS",
+]
 
+
+def __getattr__(name):
+    if name in __all__:
+        from diffquiz import api
+        return getattr(api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
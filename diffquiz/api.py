@@ -0,0 +1,719 @@
+"""
+API Python de DiffQuiz, utilisable sans le script ni les fichiers du répertoire courant.
+
+Un QuizClient partage une configuration, ses index locaux et son pool de
+threads entre plusieurs générations, éventuellement concurrentes :
+
+    with QuizClient(settings) as client:
+        result = client.run(diff, QuizOptions(repository="groupe/projet"))
+        if result.status == STATUS_OK:
+            publier(result.html, result.secret_hash)
+"""
+import os
+import time
+import random
+import logging
+import sqlite3
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from diffquiz.config import Settings, get_settings
+from diffquiz.deadline import Deadline
+from diffquiz.git_utils import question_count_for_changes, count_changed_lines
+from diffquiz.quiz_generator import (
+    generate_quiz_with_model, add_explanations, shuffle_quiz_options, quiz_rng, pool_size, draw_quiz
+)
+from diffquiz.similarity_index import open_similarity_index, normalize_diff_lines, minhash_signature
+from diffquiz.diff_parser import parse_diff, format_diff
+from diffquiz.question_bank import (
+    HunkKey, open_question_bank, diff_hunk_keys, restrict_to_hunks, select_bank_questions
+)
+from diffquiz.context_enrichment import BlobReader, get_diff_context
+from diffquiz.model_cascade import select_models
+from diffquiz.trivial_changes import effective_changed_lines
+from diffquiz.diff_compaction import compact_diff
+from diffquiz.html_generator import generate_html, iter_html, compile_html_template
+from diffquiz.models import Quiz, parse_quiz
+from diffquiz.llm_client import record_llm_usage, summarize_usage
+from diffquiz.quiz_artifact import QuizArtifact, write_artifact
+from diffquiz.security import hash_quiz_answers, quiz_variant
+from diffquiz.exceptions import QuizGenerationError, DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'un résultat
+STATUS_OK = "ok"
+STATUS_SKIP = "skip"
+STATUS_PASS = "pass"
+
+# Origine des questions
+SOURCE_LLM = "llm"
+SOURCE_SIMILAR = "similar"
+SOURCE_BANK = "bank"
+SOURCE_MIXED = "mixed"
+SOURCE_NOTES = "notes"
+
+PASS_HTML = "<h1>Erreur IA - Utilisez le code 'PASS' pour valider.</h1>"
+
+
+def get_repository_id() -> str:
+    """
+    Identifie le dépôt courant (clé de la banque de questions).
+
+    Returns:
+        Chemin du projet GitLab/GitHub ou, à défaut, nom du répertoire courant.
+    """
+    return (
+        os.environ.get('CI_PROJECT_PATH')
+        or os.environ.get('GITHUB_REPOSITORY')
+        or os.path.basename(os.getcwd())
+    )
+
+
+def _hunk_changed_lines(diff_text: Optional[str]) -> int:
+    """Lignes ajoutées/supprimées des hunks, en-têtes de fichiers exclus."""
+    return sum(
+        1
+        for file in parse_diff(diff_text)
+        for hunk in file["hunks"]
+        for line in hunk["lines"]
+        if line.startswith(('+', '-'))
+    )
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """
+    Mesure la durée d'une étape (secondes, cumulées par étape).
+
+    Args:
+        timings: Durées par étape, complétées à la sortie du bloc.
+        stage: Nom de l'étape.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+@dataclass
+class QuizOptions:
+    """
+    Options d'une génération de quiz.
+
+    Args:
+        count: Nombre de questions (None = calculé d'après le diff).
+        changed_lines: Lignes modifiées du diff complet, si le texte a été tronqué.
+        repository: Identifiant du dépôt pour la banque de questions (défaut : get_repository_id()).
+        commit_url: URL du commit affichée dans le rapport.
+        commits: Attribution des changements par commit (voir get_commit_attribution).
+        repo_dir: Dépôt git local pour l'enrichissement du contexte (défaut : répertoire courant).
+        timeout_seconds: Budget de temps de la génération (défaut : RUN_TIMEOUT_SECONDS).
+        use_store: Utilise les index locaux (similarité, banque de questions).
+        render_html: Produit le rapport HTML.
+    """
+    count: Optional[int] = None
+    changed_lines: Optional[int] = None
+    repository: Optional[str] = None
+    commit_url: Optional[str] = None
+    commits: Optional[str] = None
+    repo_dir: Optional[str] = None
+    timeout_seconds: Optional[float] = None
+    use_store: bool = True
+    render_html: bool = True
+
+
+@dataclass
+class QuizResult:
+    """
+    Résultat d'une génération de quiz.
+
+    Args:
+        status: ok, skip (aucun changement significatif) ou pass (échec, le quiz ne bloque pas).
+        secret_hash: Hash attendu des bonnes réponses, ou 'SKIP' / 'PASS'.
+        quiz: Questions du quiz.
+        html: Rapport HTML (None en mode SKIP ou si render_html est désactivé).
+        timings: Durée de chaque étape en secondes (prepare, generate, render, total).
+        source: Origine des questions (llm, similar, bank, mixed).
+        error: Raison du mode PASS.
+        model: Modèle du dernier appel LLM (None si aucun appel).
+        usage: Consommation du LLM (calls, prompt_tokens, completion_tokens, total_tokens).
+        commit_url: URL du commit.
+        repository: Identifiant du dépôt.
+        pool: Pool de questions dont le quiz est tiré (vide sans suréchantillonnage).
+    """
+    status: str
+    secret_hash: str
+    quiz: List[Dict[str, Any]] = field(default_factory=list)
+    html: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    source: Optional[str] = None
+    error: Optional[str] = None
+    model: Optional[str] = None
+    usage: Dict[str, int] = field(default_factory=dict)
+    commit_url: Optional[str] = None
+    repository: Optional[str] = None
+    pool: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Indique si un quiz a été généré."""
+        return self.status == STATUS_OK
+
+    def artifact(self) -> QuizArtifact:
+        """Contenu de quiz.json (voir diffquiz.quiz_artifact)."""
+        return QuizArtifact(
+            status=self.status,
+            questions=parse_quiz(self.quiz) if self.quiz else [],
+            pool=parse_quiz(self.pool) if self.pool else [],
+            commit_url=self.commit_url,
+            repository=self.repository,
+            source=self.source,
+            model=self.model,
+            usage=self.usage,
+            timings=self.timings,
+            error=self.error,
+        )
+
+    def write(self, directory: str = ".", compressed: bool = False) -> None:
+        """
+        Écrit quiz_report.html, quiz.env et quiz.json, comme le script generate_quiz.py.
+
+        Args:
+            directory: Répertoire de sortie.
+            compressed: Écrire aussi quiz.json.gz.
+        """
+        with open(os.path.join(directory, "quiz.env"), "w", encoding="utf-8") as f:
+            f.write(f"EXPECTED_SECRET_HASH={self.secret_hash}\n")
+        if self.html is not None:
+            with open(os.path.join(directory, "quiz_report.html"), "w", encoding="utf-8") as f:
+                f.write(self.html)
+        write_artifact(self.artifact(), directory, compressed)
+
+
+class QuizClient:
+    """
+    Générateur de quiz réutilisable et sûr entre threads.
+
+    La configuration est en lecture seule ; les accès aux index SQLite sont
+    sérialisés et leurs écritures exécutées en tâche de fond, attendues par close().
+    Un lecteur de blobs git par dépôt est conservé, avec son cache, jusqu'à close().
+
+    Args:
+        settings: Configuration (par défaut chargée depuis l'environnement).
+        max_workers: Taille du pool de threads (gabarits HTML, enregistrements locaux).
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, max_workers: int = 3):
+        self.settings = settings or get_settings()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="diffquiz")
+        self._store_lock = threading.Lock()
+        self._context_lock = threading.Lock()
+        self._blob_readers: Dict[Optional[str], BlobReader] = {}
+
+    def __enter__(self) -> "QuizClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Attend les enregistrements locaux en cours, libère le pool de threads et les lecteurs de blobs."""
+        self._executor.shutdown(wait=True)
+        with self._context_lock:
+            for reader in self._blob_readers.values():
+                reader.close()
+            self._blob_readers.clear()
+
+    def submit(self, function, *args, **kwargs) -> Future:
+        """Exécute une tâche dans le pool du client."""
+        return self._executor.submit(function, *args, **kwargs)
+
+    def prepare(self, diff: Optional[str], changes: int) -> Tuple[Optional[str], int]:
+        """
+        Écarte les changements triviaux et compacte les refactorings mécaniques.
+
+        Args:
+            diff: Texte du diff.
+            changes: Nombre de lignes modifiées du diff complet.
+
+        Returns:
+            Tuple (diff à quizzer ou None en mode SKIP, nombre de lignes modifiées effectif).
+        """
+        if not diff:
+            return None, changes
+
+        # Changements triviaux (docs, commentaires, formatage, versions, lockfiles) : pas de LLM
+        changes = effective_changed_lines(diff, changes, self.settings.trivial_change_policy)
+        if changes == 0:
+            return None, 0
+
+        # Refactorings mécaniques : un seul hunk représentatif par modification répétée
+        compacted = compact_diff(diff, self.settings.diff_compaction_min_repeats)
+        if compacted != diff:
+            changes = max(changes - count_changed_lines(diff) + count_changed_lines(compacted), 1)
+        return compacted, changes
+
+    def question_count(self, changes: int) -> int:
+        """Nombre de questions pour un nombre de lignes modifiées."""
+        return question_count_for_changes(
+            changes,
+            lines_per_question=self.settings.lines_per_question,
+            max_questions=self.settings.max_questions
+        )
+
+    def template(self) -> Future:
+        """Compile en tâche de fond le gabarit HTML (une seule fois par processus)."""
+        return self._executor.submit(compile_html_template, self.settings.html_offline)
+
+    def build_quiz(
+        self,
+        diff: str,
+        count: int,
+        repository: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        commits: Optional[str] = None,
+        repo_dir: Optional[str] = None,
+        use_store: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], List[Dict[str, Any]]]:
+        """
+        Génère les questions d'un diff, en réutilisant d'abord les index locaux.
+
+        Avec QUIZ_POOL_FACTOR, le LLM produit un pool plus large en un seul appel :
+        le quiz y est tiré et le pool entier est enregistré, si bien que les
+        tentatives suivantes tirent un autre quiz sans nouvel appel.
+
+        Args:
+            diff: Texte du diff.
+            count: Nombre de questions.
+            repository: Identifiant du dépôt (défaut : get_repository_id()).
+            deadline: Budget de temps (optionnel).
+            commits: Attribution des changements par commit (optionnel).
+            repo_dir: Dépôt git local pour l'enrichissement du contexte.
+            use_store: Utilise les index locaux.
+
+        Returns:
+            Tuple (questions, origine, pool dont elles sont tirées ou liste vide).
+            Questions vides si le LLM n'a rien produit.
+
+        Raises:
+            QuizGenerationError: Si la génération échoue.
+            DeadlineExceededError: Si le budget de temps est épuisé.
+        """
+        quiz, source, pool, explanations = self.start_quiz(
+            diff, count, repository, deadline, commits, repo_dir, use_store
+        )
+        return self.apply_explanations(quiz, explanations), source, self.apply_explanations(pool, explanations)
+
+    def start_quiz(
+        self,
+        diff: str,
+        count: int,
+        repository: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        commits: Optional[str] = None,
+        repo_dir: Optional[str] = None,
+        use_store: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Optional[str], List[Dict[str, Any]], Optional[Future]]:
+        """
+        Comme build_quiz, sans attendre les explications de la deuxième phase.
+
+        En génération en deux phases, le quiz est retourné dès la première phase :
+        questions, options et réponses sont définitives, le hash peut être calculé
+        pendant que les explications sont générées en tâche de fond. Les
+        enregistrements locaux attendent les explications.
+
+        Args:
+            Voir build_quiz.
+
+        Returns:
+            Tuple (questions, origine, pool, explications en cours ou None) ; les
+            explications sont complétées par apply_explanations.
+
+        Raises:
+            QuizGenerationError: Si la génération échoue.
+            DeadlineExceededError: Si le budget de temps est épuisé.
+        """
+        settings = self.settings
+        repository = repository or get_repository_id()
+        store = use_store and bool(settings.quiz_store_dir)
+
+        # Options des questions réutilisées remélangées (de façon reproductible en mode déterministe)
+        rng = quiz_rng(diff, settings)
+
+        # Quiz d'un diff quasi identique, tiré dans son pool s'il a été suréchantillonné
+        signature = minhash_signature(normalize_diff_lines(diff)) if store else None
+        stored = self._find_similar_quiz(signature, count)
+        if stored is not None:
+            return draw_quiz(stored, count, rng), SOURCE_SIMILAR, stored if len(stored) > count else [], None
+
+        # Questions déjà générées pour les mêmes hunks : le LLM ne traite que le reste
+        files = parse_diff(diff) if store else []
+        keys = diff_hunk_keys(files)
+        models = select_models(diff, settings)
+        quiz, uncovered = self._lookup_question_bank(repository, models, keys, count, rng)
+        source = SOURCE_BANK if quiz else None
+        pool: List[Dict[str, Any]] = []
+        explanations: Optional[Future] = None
+        if len(quiz) < count:
+            llm_diff, llm_keys = diff, keys
+            if quiz and uncovered:
+                llm_diff, llm_keys = format_diff(restrict_to_hunks(files, uncovered)), uncovered
+            # Contexte : définitions englobant les hunks (non bloquant)
+            context = self._diff_context(llm_diff, deadline, repo_dir)
+            needed = count - len(quiz)
+            two_phase = settings.two_phase_generation
+            generated, model = generate_quiz_with_model(
+                llm_diff, pool_size(needed, settings.quiz_pool_factor), settings,
+                deadline=deadline, context=context, commits=commits, explain=not two_phase
+            )
+            if generated:
+                if two_phase:
+                    # Deuxième phase en tâche de fond, tokens comptés dans le contexte de l'appelant
+                    explanations = self._executor.submit(
+                        contextvars.copy_context().run, self._explain, llm_diff, generated, deadline, context
+                    )
+                self._executor.submit(
+                    self._store_explained, explanations, self._store_in_question_bank,
+                    repository, model, llm_keys, generated
+                )
+                if len(generated) > needed:
+                    logger.info(f"{needed} question(s) tirée(s) dans un pool de {len(generated)}")
+                    pool = quiz + generated
+                    generated = draw_quiz(generated, needed, rng)
+                quiz = quiz + generated
+                source = SOURCE_MIXED if source else SOURCE_LLM
+        if quiz:
+            self._executor.submit(self._store_explained, explanations, self._remember_quiz, signature, pool or quiz)
+        return quiz, source, pool, explanations
+
+    @staticmethod
+    def apply_explanations(quiz: List[Dict[str, Any]], explanations: Optional[Future]) -> List[Dict[str, Any]]:
+        """
+        Complète les questions avec les explications de la deuxième phase (attend leur génération).
+
+        Args:
+            quiz: Questions retournées par start_quiz (le quiz ou son pool).
+            explanations: Explications en cours retournées par start_quiz.
+
+        Returns:
+            Questions complétées (inchangées sans deuxième phase).
+        """
+        if explanations is None:
+            return quiz
+        texts = explanations.result()
+        return [dict(q, explanation=texts[q["question"]]) if q["question"] in texts else q for q in quiz]
+
+    def _explain(
+        self,
+        diff: str,
+        quiz: List[Dict[str, Any]],
+        deadline: Optional[Deadline],
+        context: Optional[str]
+    ) -> Dict[str, str]:
+        """Deuxième phase : explications des questions générées, par texte de question."""
+        diff = diff[:self.settings.max_diff_length]
+        explained = add_explanations(diff, parse_quiz(quiz), self.settings, deadline, context)
+        return {q.question: q.explanation for q in explained}
+
+    def _store_explained(self, explanations: Optional[Future], store, *args) -> None:
+        """Enregistrement local (dernier argument : questions) une fois les explications disponibles."""
+        *head, quiz = args
+        store(*head, self.apply_explanations(quiz, explanations))
+
+    def render(
+        self,
+        quiz: List[Dict[str, Any]],
+        commit_url: Optional[str] = None,
+        template: Optional[Future] = None,
+        variant: str = ""
+    ) -> Tuple[str, str]:
+        """
+        Calcule le hash des bonnes réponses et produit le rapport HTML.
+
+        Args:
+            quiz: Questions du quiz.
+            commit_url: URL du commit.
+            template: Compilation lancée par template() (optionnel).
+            variant: Identifiant de la variante tirée dans un pool (voir quiz_variant).
+
+        Returns:
+            Tuple (hash des réponses, HTML).
+        """
+        # Une seule analyse du quiz, partagée par le hash et le rendu
+        questions = parse_quiz(quiz)
+        correct_answers = [q.answer for q in questions]
+        if template is not None:
+            template.result()
+        html = generate_html(questions, correct_answers, commit_url, self.settings.html_offline, variant)
+        return hash_quiz_answers(correct_answers, variant), html
+
+    def stream(
+        self,
+        quiz: Union[List[Dict[str, Any]], Quiz],
+        commit_url: Optional[str] = None,
+        variant: str = ""
+    ) -> Iterator[str]:
+        """
+        Rend le rapport HTML fragment par fragment (écriture directe dans un fichier).
+
+        Args:
+            quiz: Questions du quiz (dictionnaires ou questions typées).
+            commit_url: URL du commit.
+            variant: Identifiant de la variante tirée dans un pool (voir quiz_variant).
+
+        Returns:
+            Itérateur de fragments HTML.
+        """
+        questions = parse_quiz(quiz)
+        return iter_html(
+            questions, [q.answer for q in questions], commit_url, self.settings.html_offline, variant=variant
+        )
+
+    def run(self, diff: Optional[str], options: Optional[QuizOptions] = None) -> QuizResult:
+        """
+        Génère le quiz d'un diff, sans écrire de fichier.
+
+        Les erreurs du LLM et l'épuisement du budget donnent un résultat PASS,
+        comme dans le pipeline CI ; les erreurs de configuration sont levées.
+
+        Args:
+            diff: Texte du diff unifié.
+            options: Options de génération.
+
+        Returns:
+            Résultat de la génération.
+        """
+        options = options or QuizOptions()
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        deadline = (
+            Deadline(options.timeout_seconds, self.settings.deadline_reserve_seconds)
+            if options.timeout_seconds is not None else Deadline.from_settings(self.settings)
+        )
+
+        usage: List[Dict[str, Any]] = []
+
+        def finish(result: QuizResult) -> QuizResult:
+            timings["total"] = time.perf_counter() - started
+            result.timings = timings
+            result.model, result.usage = summarize_usage(usage)
+            result.commit_url = options.commit_url
+            result.repository = options.repository or get_repository_id()
+            return result
+
+        with timed(timings, "prepare"):
+            changes = options.changed_lines if options.changed_lines is not None else _hunk_changed_lines(diff)
+            diff, changes = self.prepare(diff, changes)
+        if not diff:
+            return finish(QuizResult(status=STATUS_SKIP, secret_hash="SKIP"))
+
+        count = options.count or self.question_count(changes)
+        template = self.template() if options.render_html else None
+        with timed(timings, "generate"), record_llm_usage() as usage:
+            try:
+                quiz, source, pool = self.build_quiz(
+                    diff, count, options.repository, deadline,
+                    commits=options.commits, repo_dir=options.repo_dir, use_store=options.use_store
+                )
+            except DeadlineExceededError as e:
+                return finish(self._pass(f"Budget de temps épuisé : {e}", options))
+            except QuizGenerationError as e:
+                return finish(self._pass(f"Erreur lors de la génération du quiz : {e}", options))
+        if not quiz:
+            return finish(self._pass("Erreur IA/Réseau", options))
+
+        with timed(timings, "render"):
+            # Quiz tiré dans un pool : code lié aux questions tirées
+            variant = quiz_variant([q['question'] for q in quiz]) if pool else ""
+            if template is not None:
+                secret_hash, html = self.render(quiz, options.commit_url, template, variant)
+            else:
+                secret_hash, html = hash_quiz_answers([q['answer'] for q in quiz], variant), None
+        return finish(QuizResult(
+            status=STATUS_OK, secret_hash=secret_hash, quiz=quiz, html=html, source=source, pool=pool
+        ))
+
+    def _pass(self, reason: str, options: QuizOptions) -> QuizResult:
+        """Résultat PASS : le quiz ne bloque pas la livraison."""
+        logger.warning(f"Mode PASS : {reason}")
+        return QuizResult(
+            status=STATUS_PASS,
+            secret_hash="PASS",
+            html=PASS_HTML if options.render_html else None,
+            error=reason
+        )
+
+    def _diff_context(self, diff: str, deadline: Optional[Deadline], repo_dir: Optional[str]) -> Optional[str]:
+        """Contexte du diff, lu avec le lecteur de blobs du dépôt (cache partagé entre les quiz)."""
+        settings = self.settings
+        if not settings.context_enrichment_enabled:
+            return None
+        with self._context_lock:
+            reader = self._blob_readers.get(repo_dir)
+            if reader is None:
+                reader = BlobReader(settings.context_cache_size, repo_dir, settings.git_timeout_seconds)
+                self._blob_readers[repo_dir] = reader
+            return get_diff_context(diff, settings, deadline, reader=reader)
+
+    def _find_similar_quiz(
+        self,
+        signature: Optional[List[int]],
+        count: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Cherche dans l'index local le quiz d'un diff quasi identique.
+
+        Args:
+            signature: Signature MinHash du diff.
+            count: Nombre de questions attendu.
+
+        Returns:
+            Questions enregistrées (quiz ou pool, à tirer avec draw_quiz) ou None.
+        """
+        if signature is None:
+            return None
+        try:
+            with self._store_lock:
+                index = open_similarity_index(self.settings)
+                if index is None:
+                    return None
+                with index:
+                    hit = index.query(signature, self.settings.similarity_threshold)
+        except sqlite3.Error as e:
+            logger.warning(f"Index de similarité indisponible : {e}")
+            return None
+
+        if hit is None or len(hit[1]) < count:
+            return None
+        similarity, quiz = hit
+        logger.info(f"Quiz réutilisé depuis un diff similaire (similarité {similarity:.2f})")
+        return quiz
+
+    def _remember_quiz(self, signature: Optional[List[int]], quiz: List[Dict[str, Any]]) -> None:
+        """
+        Enregistre un quiz généré dans l'index local de similarité.
+
+        Args:
+            signature: Signature MinHash du diff.
+            quiz: Questions du quiz.
+        """
+        if signature is None:
+            return
+        try:
+            with self._store_lock:
+                index = open_similarity_index(self.settings)
+                if index is not None:
+                    with index:
+                        index.add(signature, quiz)
+        except sqlite3.Error as e:
+            logger.warning(f"Impossible d'indexer le quiz : {e}")
+
+    def _lookup_question_bank(
+        self,
+        repository: str,
+        models: List[str],
+        keys: List[HunkKey],
+        count: int,
+        rng: Optional[random.Random] = None
+    ) -> Tuple[List[Dict[str, Any]], List[HunkKey]]:
+        """
+        Cherche dans la banque des questions déjà générées pour les hunks du diff.
+
+        Seules les questions des modèles que la cascade utiliserait pour ce diff
+        sont réutilisées.
+
+        Args:
+            repository: Identifiant du dépôt.
+            models: Modèles de la cascade pour ce diff.
+            keys: Clés des hunks du diff.
+            count: Nombre de questions attendu.
+            rng: Générateur du mélange des options (optionnel).
+
+        Returns:
+            Tuple (questions réutilisées aux options remélangées, hunks restant à couvrir).
+        """
+        if not keys:
+            return [], keys
+        try:
+            with self._store_lock:
+                bank = open_question_bank(self.settings)
+                if bank is None:
+                    return [], keys
+                with bank:
+                    candidates = [
+                        candidate for model in models for candidate in bank.lookup(repository, model, keys)
+                    ]
+        except sqlite3.Error as e:
+            logger.warning(f"Banque de questions indisponible : {e}")
+            return [], keys
+
+        questions, uncovered = select_bank_questions(candidates, keys, count)
+        if questions:
+            logger.info(
+                f"{len(questions)} question(s) réutilisée(s) depuis la banque, "
+                f"{len(uncovered)} hunk(s) sur {len(keys)} restant(s) à couvrir"
+            )
+        return shuffle_quiz_options(questions, rng), uncovered
+
+    def _store_in_question_bank(
+        self,
+        repository: str,
+        model: str,
+        keys: List[HunkKey],
+        quiz: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Enregistre les questions générées dans la banque, rattachées à leurs hunks.
+
+        Args:
+            repository: Identifiant du dépôt.
+            model: Modèle ayant effectivement généré les questions.
+            keys: Clés des hunks du diff envoyé au LLM.
+            quiz: Questions générées.
+        """
+        if not keys:
+            return
+        try:
+            with self._store_lock:
+                bank = open_question_bank(self.settings)
+                if bank is not None:
+                    with bank:
+                        bank.store(repository, model, keys, quiz)
+        except sqlite3.Error as e:
+            logger.warning(f"Impossible d'enregistrer les questions dans la banque : {e}")
+
+
+_default_client: Optional[QuizClient] = None
+_default_client_lock = threading.Lock()
+
+
+def run_quiz(
+    diff: Optional[str],
+    options: Optional[QuizOptions] = None,
+    settings: Optional[Settings] = None
+) -> QuizResult:
+    """
+    Génère le quiz d'un diff avec un client partagé (ou dédié si settings est fourni).
+
+    Args:
+        diff: Texte du diff unifié.
+        options: Options de génération.
+        settings: Configuration spécifique (optionnel).
+
+    Returns:
+        Résultat de la génération.
+    """
+    global _default_client
+    if settings is not None:
+        with QuizClient(settings) as client:
+            return client.run(diff, options)
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = QuizClient()
+        client = _default_client
+    return client.run(diff, options)
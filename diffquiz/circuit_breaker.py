@@ -0,0 +1,195 @@
+"""
+Disjoncteur (circuit breaker) partagé pour l'API LLM.
+
+L'état est conservé dans un fichier JSON local, partagé entre les jobs qui
+tournent sur le même runner (ou sur un volume commun). Quand le disjoncteur est
+ouvert, les appels échouent immédiatement au lieu d'attendre le timeout LLM ;
+un seul job à la fois est autorisé à sonder l'API pour le refermer.
+"""
+import os
+import json
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterator, Optional
+from diffquiz.config import Settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur à trois états (fermé, ouvert, semi-ouvert) persistant sur disque.
+
+    Args:
+        state_file: Chemin du fichier d'état partagé.
+        key: Clé identifiant le service surveillé (ex : l'URL de l'API).
+        failure_threshold: Nombre d'échecs consécutifs avant ouverture.
+        reset_timeout: Durée (s) pendant laquelle le disjoncteur reste ouvert avant une sonde.
+        probe_timeout: Durée (s) réservée à une sonde avant qu'un autre job puisse sonder.
+        clock: Fonction retournant l'heure courante (injectable pour les tests).
+    """
+
+    def __init__(
+        self,
+        state_file: str,
+        key: str,
+        failure_threshold: int = 2,
+        reset_timeout: float = 120.0,
+        probe_timeout: float = 300.0,
+        clock: Callable[[], float] = time.time
+    ):
+        self.state_file = state_file
+        self.key = key
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self._clock = clock
+        # Début de la sonde accordée à cette instance (None si aucune)
+        self._probe_started_at: Optional[float] = None
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, Any]]:
+        """Ouvre le fichier d'état sous verrou exclusif et réécrit les modifications."""
+        directory = os.path.dirname(self.state_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(self.state_file, "a+", encoding="utf-8") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                try:
+                    states = json.loads(raw) if raw.strip() else {}
+                except json.JSONDecodeError:
+                    logger.warning(f"Fichier d'état du disjoncteur corrompu, réinitialisation : {self.state_file}")
+                    states = {}
+                if not isinstance(states, dict):
+                    states = {}
+
+                entry = states.setdefault(self.key, {})
+                yield entry
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(states))
+                f.flush()
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _state_of(self, entry: Dict[str, Any], now: float) -> str:
+        """Calcule l'état courant à partir d'une entrée persistée."""
+        opened_at = entry.get("opened_at")
+        if opened_at is None:
+            return STATE_CLOSED
+        if now - opened_at < self.reset_timeout:
+            return STATE_OPEN
+        return STATE_HALF_OPEN
+
+    @property
+    def state(self) -> str:
+        """État courant du disjoncteur."""
+        with self._locked_state() as entry:
+            return self._state_of(entry, self._clock())
+
+    def allow_request(self) -> bool:
+        """
+        Indique si un appel peut être tenté.
+
+        En état semi-ouvert, seul le premier job obtient le droit de sonder ;
+        les autres échouent immédiatement jusqu'à la fin de la sonde.
+
+        Returns:
+            True si l'appel est autorisé, False si le disjoncteur est ouvert.
+        """
+        now = self._clock()
+        with self._locked_state() as entry:
+            state = self._state_of(entry, now)
+            if state == STATE_CLOSED:
+                return True
+            if state == STATE_OPEN:
+                return False
+
+            probe_started_at = entry.get("probe_started_at")
+            if probe_started_at is not None and now - probe_started_at < self.probe_timeout:
+                return False
+            entry["probe_started_at"] = now
+            self._probe_started_at = now
+            logger.info("Disjoncteur LLM semi-ouvert : sonde de l'API")
+            return True
+
+    def record_success(self) -> None:
+        """Enregistre un appel réussi et referme le disjoncteur."""
+        with self._locked_state() as entry:
+            if entry.get("opened_at") is not None:
+                logger.info("Disjoncteur LLM refermé : l'API répond à nouveau")
+            entry.clear()
+            entry["failures"] = 0
+        self._probe_started_at = None
+
+    def record_failure(self) -> None:
+        """Enregistre un échec et ouvre le disjoncteur si le seuil est atteint."""
+        now = self._clock()
+        with self._locked_state() as entry:
+            failures = entry.get("failures", 0) + 1
+            entry["failures"] = failures
+            was_probing = entry.get("opened_at") is not None
+
+            if was_probing or failures >= self.failure_threshold:
+                entry["opened_at"] = now
+                entry["probe_started_at"] = None
+                logger.warning(
+                    f"Disjoncteur LLM ouvert après {failures} échec(s) consécutif(s) "
+                    f"(nouvelle sonde dans {self.reset_timeout:.0f}s)"
+                )
+        self._probe_started_at = None
+
+    def release_probe(self) -> None:
+        """
+        Libère la sonde accordée à cette instance, sans verdict sur l'API.
+
+        Appelé quand la sonde se termine sans succès ni échec imputable à l'API
+        (erreur 4xx, budget épuisé, erreur inattendue) : un autre job peut
+        sonder sans attendre probe_timeout.
+        """
+        if self._probe_started_at is None:
+            return
+        with self._locked_state() as entry:
+            if entry.get("probe_started_at") == self._probe_started_at:
+                entry["probe_started_at"] = None
+                logger.info("Sonde du disjoncteur LLM libérée sans verdict")
+        self._probe_started_at = None
+
+
+def get_circuit_breaker(settings: Settings) -> Optional[CircuitBreaker]:
+    """
+    Construit le disjoncteur associé à l'API LLM configurée.
+
+    Args:
+        settings: Configuration de l'application.
+
+    Returns:
+        Disjoncteur ou None s'il est désactivé.
+    """
+    if not settings.circuit_breaker_enabled:
+        return None
+
+    return CircuitBreaker(
+        state_file=settings.circuit_breaker_state_file,
+        key=settings.llm_api_url,
+        failure_threshold=settings.circuit_breaker_failure_threshold,
+        reset_timeout=settings.circuit_breaker_reset_seconds,
+        probe_timeout=settings.llm_timeout_seconds
+    )
@@ -3,7 +3,8 @@ Configuration centralisée avec validation.
 """
 import os
 import logging
-from typing import Optional
+import tempfile
+from typing import List, Optional
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -29,11 +30,35 @@ class Settings(BaseSettings):
         default="gpt-4o-mini",
         description="Modèle LLM à utiliser"
     )
+    llm_fast_model: Optional[str] = Field(
+        default=None,
+        description="Modèle rapide essayé en premier (cascade) ; llm_model sert d'escalade"
+    )
+    cascade_max_changed_lines: int = Field(
+        default=200,
+        ge=1,
+        description="Au-delà de ce nombre de lignes modifiées, le modèle principal est utilisé directement"
+    )
     llm_api_key: str = Field(
         ...,
         min_length=1,
         description="Clé API LLM (requis)"
     )
+    deterministic_mode: bool = Field(
+        default=False,
+        description="Génération reproductible : graine dérivée du diff pour le LLM et le mélange des options"
+    )
+    
+    two_phase_generation: bool = Field(
+        default=False,
+        description="Génération en deux phases : questions d'abord, explications ensuite en appels parallèles"
+    )
+    explanation_batch_size: int = Field(
+        default=0,
+        ge=0,
+        le=10,
+        description="Questions par appel d'explications en génération en deux phases (0 : un seul appel)"
+    )
     
     # Configuration SSL
     ssl_verify: bool = Field(
@@ -57,11 +82,94 @@ class Settings(BaseSettings):
         le=10,
         description="Nombre maximum de questions"
     )
+    quiz_pool_factor: int = Field(
+        default=1,
+        ge=1,
+        le=5,
+        description="Pool de questions demandé au LLM, en multiple du nombre de questions : "
+                    "chaque quiz y est tiré localement (1 = désactivé)"
+    )
     max_diff_length: int = Field(
         default=10000,
         ge=1000,
         description="Longueur maximale du diff en caractères"
     )
+    diff_exclude_patterns: str = Field(
+        default="",
+        description="Motifs glob de fichiers exclus du diff, séparés par des virgules (ex : *.lock,docs/*)"
+    )
+    diff_compaction_min_repeats: int = Field(
+        default=3,
+        ge=0,
+        description="Occurrences à partir desquelles des hunks identiques sont regroupés en un seul (0 = désactivé)"
+    )
+    trivial_change_policy: str = Field(
+        default="skip",
+        description="Changements triviaux (docs, commentaires, formatage, versions, lockfiles) : "
+                    "skip (mode SKIP si tout est trivial), reduce (une seule question) ou off"
+    )
+    diff_range_mode: str = Field(
+        default="commit",
+        description="Intervalle quizzé : commit (HEAD^..HEAD), push (tous les commits du push), "
+                    "merge-base (toute la merge request) ou auto"
+    )
+    diff_target_branch: Optional[str] = Field(
+        default=None,
+        description="Branche cible pour le mode merge-base (par défaut celle de la merge request en CI)"
+    )
+    
+    # Configuration de l'enrichissement du contexte
+    context_enrichment_enabled: bool = Field(
+        default=True,
+        description="Ajouter au prompt la fonction/classe englobant chaque hunk"
+    )
+    context_max_chars: int = Field(
+        default=4000,
+        ge=0,
+        description="Taille maximale du contexte ajouté au prompt en caractères"
+    )
+    context_cache_size: int = Field(
+        default=128,
+        ge=1,
+        description="Nombre de blobs git conservés dans le cache LRU"
+    )
+    
+    # Configuration du stockage local des quiz
+    quiz_store_dir: Optional[str] = Field(
+        default=None,
+        description="Répertoire de stockage local des quiz générés (désactivé si absent)"
+    )
+    incremental_mode: bool = Field(
+        default=False,
+        description="Quiz incrémental des merge requests : seul le delta depuis le dernier push quizzé est envoyé au LLM"
+    )
+    similarity_threshold: float = Field(
+        default=0.9,
+        ge=0.5,
+        le=1.0,
+        description="Similarité minimale pour réutiliser le quiz d'un diff quasi identique"
+    )
+    
+    quiz_notes_lookup: bool = Field(
+        default=False,
+        description="Réutilise le quiz pré-généré par le hook pre-push (notes git refs/notes/diffquiz)"
+    )
+    quiz_notes_wait_seconds: int = Field(
+        default=0,
+        ge=0,
+        le=300,
+        description="Attente maximale d'un quiz pré-généré encore en cours de publication"
+    )
+    
+    # Configuration du rapport HTML
+    html_offline: bool = Field(
+        default=False,
+        description="Rapport autonome : styles Bootstrap purgés intégrés, CSS et JavaScript minifiés (aucun CDN)"
+    )
+    quiz_json_compressed: bool = Field(
+        default=False,
+        description="Écrit aussi quiz.json.gz, variante compacte et compressée de quiz.json"
+    )
     
     # Configuration Timeout
     llm_timeout_seconds: int = Field(
@@ -71,6 +179,52 @@ class Settings(BaseSettings):
         description="Timeout pour les appels LLM en secondes"
     )
     
+    llm_connect_timeout_seconds: int = Field(
+        default=10,
+        ge=1,
+        le=120,
+        description="Timeout d'établissement de connexion (TCP + TLS) vers l'API LLM en secondes"
+    )
+    llm_connection_warmup: bool = Field(
+        default=True,
+        description="Pré-ouvrir la connexion (TCP + TLS) à l'API LLM pendant la récupération du diff"
+    )
+    git_timeout_seconds: int = Field(
+        default=30,
+        ge=1,
+        description="Timeout des commandes git en secondes"
+    )
+    run_timeout_seconds: Optional[int] = Field(
+        default=None,
+        ge=10,
+        description="Budget total du job en secondes (à garder sous le timeout du job CI)"
+    )
+    deadline_reserve_seconds: int = Field(
+        default=5,
+        ge=0,
+        description="Temps réservé en fin de budget pour écrire quiz.env et le rapport"
+    )
+    
+    # Configuration du disjoncteur LLM
+    circuit_breaker_enabled: bool = Field(
+        default=True,
+        description="Échouer immédiatement quand l'API LLM est détectée hors service"
+    )
+    circuit_breaker_state_file: str = Field(
+        default=os.path.join(tempfile.gettempdir(), "diffquiz_circuit_breaker.json"),
+        description="Fichier d'état partagé du disjoncteur (à placer sur un volume commun aux jobs)"
+    )
+    circuit_breaker_failure_threshold: int = Field(
+        default=2,
+        ge=1,
+        description="Nombre d'échecs consécutifs avant ouverture du disjoncteur"
+    )
+    circuit_breaker_reset_seconds: int = Field(
+        default=120,
+        ge=1,
+        description="Durée d'ouverture du disjoncteur avant une nouvelle sonde, en secondes"
+    )
+    
     # Configuration Hash
     hash_salt_length: int = Field(
         default=16,
@@ -94,6 +248,30 @@ class Settings(BaseSettings):
         if isinstance(v, str):
             return v.lower() in ('true', '1', 't', 'yes')
         return bool(v)
+    
+    @field_validator('trivial_change_policy')
+    @classmethod
+    def validate_trivial_change_policy(cls, v: str) -> str:
+        """Valide la politique des changements triviaux."""
+        v = v.strip().lower()
+        if v not in ('skip', 'reduce', 'off'):
+            raise ValueError("TRIVIAL_CHANGE_POLICY must be one of: skip, reduce, off")
+        return v
+    
+    @field_validator('diff_range_mode')
+    @classmethod
+    def validate_diff_range_mode(cls, v: str) -> str:
+        """Valide le mode d'intervalle du diff."""
+        v = v.strip().lower()
+        if v not in ('commit', 'push', 'merge-base', 'auto'):
+            raise ValueError("DIFF_RANGE_MODE must be one of: commit, push, merge-base, auto")
+        return v
+
+    
+    @property
+    def diff_exclude_pattern_list(self) -> List[str]:
+        """Motifs d'exclusion du diff sous forme de liste."""
+        return [p.strip() for p in self.diff_exclude_patterns.split(',') if p.strip()]
 
 
 def get_settings() -> Settings:
@@ -0,0 +1,315 @@
+"""
+Enrichissement du prompt avec les définitions englobant chaque hunk.
+
+Le diff est récupéré avec `--unified=0` : le LLM ne voit que les lignes modifiées.
+Pour chaque hunk, la fonction/classe englobante est extraite du blob après
+modification, lu via un unique processus `git cat-file --batch`. Les blobs sont
+mis en cache (LRU, clé = SHA du blob) et le contexte total est plafonné. Le
+lecteur est conservé par QuizClient : le cache sert d'un quiz à l'autre.
+"""
+import os
+import re
+import time
+import select
+import subprocess
+import logging
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from diffquiz.config import Settings
+from diffquiz.deadline import Deadline
+from diffquiz.diff_parser import parse_diff
+from diffquiz.exceptions import GitDiffError
+
+logger = logging.getLogger(__name__)
+
+# Début de définition (Python, JS/TS, Go, Rust, Java/C#/PHP...)
+DEFINITION_PATTERN = re.compile(
+    r'^\s*(?:(?:export|public|private|protected|internal|static|async|final|abstract|override|default|pub(?:\([^)]*\))?)\s+)*'
+    r'(?:def|class|function|func|fn|interface|struct|impl|enum|trait|module)\b'
+    r'|^\s*(?:[\w<>\[\],.?]+\s+)+\w+\s*\([^;]*\)\s*(?:\{|throws\b|$)'
+)
+
+# Nombre maximum de lignes de contexte par définition
+MAX_DEFINITION_LINES = 60
+
+
+class BlobReader:
+    """
+    Lecteur de blobs git via un processus `git cat-file --batch` persistant.
+
+    Chaque lecture est bornée par le timeout et le budget de temps : un processus
+    git bloqué est arrêté (il sera relancé à la lecture suivante).
+
+    Args:
+        cache_size: Nombre de blobs conservés dans le cache LRU.
+        cwd: Répertoire du dépôt (par défaut le répertoire courant).
+        timeout: Délai maximal d'une lecture en secondes.
+    """
+
+    def __init__(self, cache_size: int = 128, cwd: Optional[str] = None, timeout: float = 30):
+        self.cache_size = cache_size
+        self.cwd = cwd
+        self.timeout = timeout
+        self._cache: "OrderedDict[str, Optional[bytes]]" = OrderedDict()
+        self._process: Optional[subprocess.Popen] = None
+        self._buffer = bytearray()
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self) -> "BlobReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _ensure_process(self) -> subprocess.Popen:
+        if self._process is None:
+            try:
+                self._process = subprocess.Popen(
+                    ["git", "cat-file", "--batch"],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    cwd=self.cwd,
+                    bufsize=0
+                )
+            except FileNotFoundError as e:
+                raise GitDiffError("Git n'est pas installé ou non disponible dans le PATH") from e
+            self._buffer.clear()
+        return self._process
+
+    def read(self, object_name: str, deadline: Optional[Deadline] = None) -> Optional[bytes]:
+        """
+        Lit le contenu d'un blob.
+
+        Args:
+            object_name: SHA (éventuellement abrégé) ou nom d'objet git.
+            deadline: Budget de temps global du job (optionnel).
+
+        Returns:
+            Contenu du blob ou None si l'objet est introuvable.
+
+        Raises:
+            GitDiffError: Si git est indisponible, interrompu ou ne répond pas à temps.
+        """
+        if object_name in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(object_name)
+            return self._cache[object_name]
+
+        self.misses += 1
+        content = self._read_from_git(object_name, deadline)
+        self._cache[object_name] = content
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return content
+
+    def _read_from_git(self, object_name: str, deadline: Optional[Deadline]) -> Optional[bytes]:
+        process = self._ensure_process()
+        remaining = deadline.remaining() if deadline is not None else None
+        expires_at = time.monotonic() + (self.timeout if remaining is None else max(min(self.timeout, remaining), 0))
+        try:
+            process.stdin.write(object_name.encode('utf-8') + b'\n')
+            process.stdin.flush()
+            header = self._read_until(expires_at, line=True).decode('utf-8', errors='replace').split()
+
+            # Réponse : "<sha> <type> <taille>" ou "<nom> missing" / "ambiguous"
+            if len(header) != 3 or header[1] != 'blob':
+                if len(header) == 3:
+                    self._read_until(expires_at, size=int(header[2]) + 1)
+                return None
+
+            content = self._read_until(expires_at, size=int(header[2]) + 1)
+            return content[:-1]  # saut de ligne final
+        except (BrokenPipeError, OSError) as e:
+            self._kill()
+            raise GitDiffError(f"Processus git cat-file interrompu : {e}") from e
+
+    def _read_until(self, expires_at: float, size: int = 0, line: bool = False) -> bytes:
+        """Lit une ligne ou `size` octets de la sortie de git, sans dépasser l'échéance."""
+        fd = self._process.stdout.fileno()
+        while True:
+            end = self._buffer.find(b'\n') + 1 if line else (size if len(self._buffer) >= size else 0)
+            if end:
+                data = bytes(self._buffer[:end])
+                del self._buffer[:end]
+                return data
+            ready, _, _ = select.select([fd], [], [], max(expires_at - time.monotonic(), 0))
+            if not ready:
+                self._kill()
+                raise GitDiffError("Timeout lors de la lecture d'un blob git (git cat-file ne répond pas)")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                raise OSError("fin de flux inattendue")
+            self._buffer += chunk
+
+    def _kill(self) -> None:
+        """Arrête un processus git dont la sortie n'est plus synchronisée."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+    def close(self) -> None:
+        """Arrête le processus git cat-file."""
+        if self._process is not None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+            self._process = None
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip())
+
+
+def find_enclosing_definition(lines: List[str], line_number: int) -> Optional[Tuple[int, int]]:
+    """
+    Trouve la définition (fonction, classe...) englobant une ligne.
+
+    Args:
+        lines: Lignes du fichier après modification.
+        line_number: Numéro de ligne (1-based) du hunk.
+
+    Returns:
+        Tuple (première ligne, dernière ligne) 1-based de la définition, ou None.
+    """
+    if not lines:
+        return None
+
+    anchor = min(max(line_number - 1, 0), len(lines) - 1)
+    # Indentation de référence : première ligne non vide à partir du hunk
+    anchor_indent = None
+    for line in lines[anchor:]:
+        if line.strip():
+            anchor_indent = _indent(line)
+            break
+    if anchor_indent is None:
+        return None
+
+    start = None
+    for i in range(anchor, -1, -1):
+        line = lines[i]
+        if not line.strip() or not DEFINITION_PATTERN.match(line):
+            continue
+        if i == anchor or _indent(line) < anchor_indent:
+            start = i
+            break
+    if start is None:
+        return None
+
+    def_indent = _indent(lines[start])
+    end = start
+    for i in range(start + 1, min(len(lines), start + MAX_DEFINITION_LINES)):
+        line = lines[i]
+        if line.strip() and _indent(line) <= def_indent:
+            # Accolade fermante au niveau de la définition : on l'inclut
+            if line.strip().startswith('}'):
+                end = i
+            break
+        end = i
+
+    return start + 1, end + 1
+
+
+def build_diff_context(
+    diff_text: str,
+    max_chars: int = 4000,
+    reader: Optional[BlobReader] = None,
+    deadline: Optional[Deadline] = None
+) -> Optional[str]:
+    """
+    Construit le contexte des définitions englobant les hunks du diff.
+
+    Args:
+        diff_text: Texte du diff (avec lignes `index` donnant les blobs).
+        max_chars: Taille maximale du contexte en caractères.
+        reader: Lecteur de blobs (créé et fermé automatiquement si absent).
+        deadline: Budget de temps global du job (optionnel).
+
+    Returns:
+        Contexte formaté ou None si aucun contexte n'a pu être extrait.
+    """
+    if not diff_text or max_chars <= 0:
+        return None
+
+    own_reader = reader is None
+    reader = reader or BlobReader()
+    blocks: List[str] = []
+    total = 0
+    seen = set()
+
+    try:
+        for file in parse_diff(diff_text):
+            if not file["new_blob"] or not file["hunks"]:
+                continue
+            if deadline is not None and deadline.expired():
+                logger.info("Budget de temps insuffisant : enrichissement du contexte interrompu")
+                break
+
+            content = reader.read(file["new_blob"], deadline)
+            if content is None or b'\0' in content[:8000]:
+                continue
+            lines = content.decode('utf-8', errors='replace').splitlines()
+
+            for hunk in file["hunks"]:
+                span = find_enclosing_definition(lines, max(hunk["new_start"], 1))
+                if span is None or (file["path"], span) in seen:
+                    continue
+                seen.add((file["path"], span))
+
+                start, end = span
+                block = f"--- {file['path']} (lignes {start}-{end})\n" + "\n".join(lines[start - 1:end])
+                if total + len(block) > max_chars:
+                    logger.info(f"Contexte plafonné à {max_chars} caractères")
+                    return _format_context(blocks)
+                blocks.append(block)
+                total += len(block)
+    finally:
+        if own_reader:
+            reader.close()
+
+    logger.debug(f"Cache des blobs : {reader.hits} hit(s), {reader.misses} miss(es)")
+    return _format_context(blocks)
+
+
+def _format_context(blocks: List[str]) -> Optional[str]:
+    if not blocks:
+        return None
+    logger.info(f"Contexte ajouté au prompt : {len(blocks)} définition(s) englobante(s)")
+    return "\n\n".join(blocks)
+
+
+def get_diff_context(
+    diff_text: str,
+    settings: Settings,
+    deadline: Optional[Deadline] = None,
+    cwd: Optional[str] = None,
+    reader: Optional[BlobReader] = None
+) -> Optional[str]:
+    """
+    Construit le contexte selon la configuration ; les erreurs ne sont pas bloquantes.
+
+    Args:
+        diff_text: Texte du diff.
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel).
+        cwd: Répertoire du dépôt (par défaut le répertoire courant).
+        reader: Lecteur de blobs partagé, conservé ouvert (sinon un lecteur temporaire).
+
+    Returns:
+        Contexte formaté ou None.
+    """
+    if not settings.context_enrichment_enabled:
+        return None
+
+    try:
+        if reader is not None:
+            return build_diff_context(diff_text, settings.context_max_chars, reader, deadline)
+        with BlobReader(settings.context_cache_size, cwd, settings.git_timeout_seconds) as own_reader:
+            return build_diff_context(diff_text, settings.context_max_chars, own_reader, deadline)
+    except (GitDiffError, OSError, ValueError) as e:
+        logger.warning(f"Enrichissement du contexte impossible, poursuite sans contexte : {e}")
+        return None
@@ -0,0 +1,92 @@
+"""
+Budget de temps global d'un job DiffQuiz.
+
+Un seul `Deadline` est créé au démarrage et transmis à chaque étape (git, appels
+LLM, escalades). Chaque étape n'utilise que le temps restant, moins une réserve
+conservée pour écrire les fichiers de résultat (ou de fallback) avant que le job
+CI ne soit tué.
+"""
+import time
+import logging
+from typing import Callable, Optional
+from diffquiz.config import Settings
+from diffquiz.exceptions import DeadlineExceededError
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """
+    Échéance absolue d'exécution.
+
+    Args:
+        total_seconds: Budget total en secondes (None = pas de limite).
+        reserve_seconds: Temps réservé à la fin du job pour écrire les résultats.
+        clock: Horloge monotone (injectable pour les tests).
+    """
+
+    def __init__(
+        self,
+        total_seconds: Optional[float] = None,
+        reserve_seconds: float = 0.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self._clock = clock
+        self.reserve_seconds = reserve_seconds
+        self._expires_at = None if total_seconds is None else clock() + total_seconds
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Deadline":
+        """Crée l'échéance du job à partir de la configuration."""
+        return cls(settings.run_timeout_seconds, settings.deadline_reserve_seconds)
+
+    def remaining(self) -> Optional[float]:
+        """
+        Temps restant pour les étapes, réserve déduite.
+
+        Returns:
+            Secondes restantes (éventuellement négatives) ou None si illimité.
+        """
+        if self._expires_at is None:
+            return None
+        return self._expires_at - self._clock() - self.reserve_seconds
+
+    def expired(self) -> bool:
+        """Indique si le budget des étapes est épuisé."""
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def check(self, stage: str) -> None:
+        """
+        Vérifie qu'il reste du temps avant de démarrer une étape.
+
+        Args:
+            stage: Nom de l'étape (pour les messages).
+
+        Raises:
+            DeadlineExceededError: Si le budget est épuisé.
+        """
+        if self.expired():
+            raise DeadlineExceededError(f"Budget de temps épuisé avant l'étape : {stage}")
+
+    def timeout(self, stage_timeout: float, stage: str) -> float:
+        """
+        Calcule le timeout effectif d'une étape.
+
+        Args:
+            stage_timeout: Timeout propre à l'étape.
+            stage: Nom de l'étape (pour les messages).
+
+        Returns:
+            Le plus petit entre le timeout de l'étape et le temps restant.
+
+        Raises:
+            DeadlineExceededError: Si le budget est épuisé.
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        if remaining is None or remaining >= stage_timeout:
+            return stage_timeout
+
+        logger.info(f"Timeout de l'étape '{stage}' réduit à {remaining:.1f}s (budget global)")
+        return remaining
@@ -0,0 +1,146 @@
+"""
+Compaction des hunks répétitifs (refactorings mécaniques).
+
+Un renommage ou une mise à jour d'import sur des centaines de fichiers produit
+des centaines de hunks équivalents. Seul le premier est conservé, suivi du
+nombre de répétitions et de la liste des fichiers concernés.
+
+Deux hunks sont équivalents s'ils appliquent la même modification au niveau des
+tokens, au même endroit de la syntaxe : les tokens voisins de chaque modification
+doivent aussi correspondre (`= foo(` devenu `= bar(` quels que soient les
+arguments). À défaut, les hunks doivent être identiques aux espaces près.
+"""
+import re
+import json
+import difflib
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from diffquiz.diff_parser import parse_diff, format_diff
+from diffquiz.question_bank import hunk_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximum de fichiers cités pour un groupe de hunks répétés
+MAX_LISTED_FILES = 10
+
+REPEAT_MARKER = "~ "
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Une modification de tokens n'est regroupée que si elle touche un identifiant :
+# `retries = 1` -> `retries = 3` et `timeout = 1` -> `timeout = 3` restent distincts
+_IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_]")
+
+# (tokens supprimés, tokens ajoutés, token précédent, token suivant)
+TokenEdit = Tuple[Tuple[str, ...], Tuple[str, ...], str, str]
+
+
+def token_edits(hunk: Dict[str, Any]) -> Optional[List[TokenEdit]]:
+    """
+    Calcule les modifications d'un hunk au niveau des tokens.
+
+    Chaque ligne supprimée est appariée à la ligne ajoutée de même rang ; seules
+    les suites de tokens remplacées sont retenues, avec le token inchangé qui
+    les précède et celui qui les suit (vide en bord de ligne). Sans ce contexte,
+    `DEBUG = True` et `verify=True)` devenus `False` seraient confondus.
+
+    Args:
+        hunk: Hunk au format de parse_diff.
+
+    Returns:
+        Modifications distinctes, triées, ou None si le hunk n'est pas une
+        simple réécriture de lignes.
+    """
+    removed = [line[1:] for line in hunk["lines"] if line.startswith('-')]
+    added = [line[1:] for line in hunk["lines"] if line.startswith('+')]
+    if not removed or len(removed) != len(added):
+        return None
+
+    edits = set()
+    for old_line, new_line in zip(removed, added):
+        old, new = _TOKEN_PATTERN.findall(old_line), _TOKEN_PATTERN.findall(new_line)
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                before = old[i1 - 1] if i1 > 0 else ""
+                after = old[i2] if i2 < len(old) else ""
+                edits.add((tuple(old[i1:i2]), tuple(new[j1:j2]), before, after))
+    if not edits or not all(_IDENTIFIER_PATTERN.search(" ".join(a + b)) for a, b, _, _ in edits):
+        return None
+    return sorted(edits)
+
+
+def _hunk_signature(hunk: Dict[str, Any]) -> str:
+    """Clé de regroupement : modifications de tokens, sinon empreinte du hunk aux espaces près."""
+    edits = token_edits(hunk)
+    if edits is None:
+        return hunk_fingerprint(hunk)
+    return "tokens:" + json.dumps(edits)
+
+
+def _describe_edits(edits: List[TokenEdit]) -> str:
+    """Résumé lisible des modifications de tokens (`foo` → `bar`)."""
+    return ", ".join(f"`{''.join(old) or '∅'}` → `{''.join(new) or '∅'}`" for old, new, _, _ in edits)
+
+
+def _repeat_note(hunk: Dict[str, Any], duplicates: List[str], max_listed_files: int) -> str:
+    """Ligne résumant les répétitions d'un hunk (hors syntaxe diff : ignorée par parse_diff)."""
+    files = list(dict.fromkeys(duplicates))
+    listed = ", ".join(files[:max_listed_files])
+    if len(files) > max_listed_files:
+        listed += f", ... et {len(files) - max_listed_files} autre(s)"
+    edits = token_edits(hunk)
+    change = f"Même modification ({_describe_edits(edits)})" if edits else "Modification identique"
+    return (
+        f"{REPEAT_MARKER}{change} répétée dans {len(duplicates)} autre(s) hunk(s) "
+        f"({len(files)} fichier(s)) : {listed}"
+    )
+
+
+def compact_diff(
+    diff_text: Optional[str],
+    min_repeats: int = 3,
+    max_listed_files: int = MAX_LISTED_FILES
+) -> Optional[str]:
+    """
+    Regroupe les hunks équivalents (même modification de tokens, ou identiques aux espaces près).
+
+    Args:
+        diff_text: Texte du diff.
+        min_repeats: Nombre minimal d'occurrences pour regrouper (0 = désactivé).
+        max_listed_files: Nombre maximum de fichiers cités par groupe.
+
+    Returns:
+        Diff compacté, ou le diff inchangé si aucun hunk n'est assez répété.
+    """
+    if not diff_text or min_repeats <= 0:
+        return diff_text
+
+    files = parse_diff(diff_text)
+    keys = [[_hunk_signature(hunk) for hunk in file["hunks"]] for file in files]
+    groups: Dict[str, List[str]] = {}
+    for file, file_keys in zip(files, keys):
+        for hunk, key in zip(file["hunks"], file_keys):
+            if any(line.startswith(('+', '-')) for line in hunk["lines"]):
+                groups.setdefault(key, []).append(file["path"])
+
+    repeated = {key for key, paths in groups.items() if len(paths) >= min_repeats}
+    if not repeated:
+        return diff_text
+
+    seen = set()
+    compacted: List[Dict[str, Any]] = []
+    for file, file_keys in zip(files, keys):
+        hunks = []
+        for hunk, key in zip(file["hunks"], file_keys):
+            if key not in repeated:
+                hunks.append(hunk)
+            elif key not in seen:
+                seen.add(key)
+                note = _repeat_note(hunk, groups[key][1:], max_listed_files)
+                hunks.append(dict(hunk, lines=hunk["lines"] + [note]))
+        compacted.append(dict(file, hunks=hunks))
+
+    removed = sum(len(groups[key]) - 1 for key in repeated)
+    logger.info(f"Diff compacté : {removed} hunk(s) répétitif(s) regroupé(s) en {len(repeated)} modèle(s)")
+    return format_diff(compacted)
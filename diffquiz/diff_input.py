@@ -0,0 +1,159 @@
+"""
+Lecture d'un diff pré-calculé depuis un fichier ou l'entrée standard.
+
+Les fichiers sont lus via `mmap` : les lignes modifiées sont comptées directement
+sur les octets mappés et seule la partie du diff envoyée au LLM est décodée.
+"""
+import io
+import os
+import re
+import mmap
+import stat
+import codecs
+import logging
+from typing import BinaryIO, Optional, Tuple
+from diffquiz.exceptions import GitDiffError
+
+logger = logging.getLogger(__name__)
+
+# Ligne ajoutée/supprimée, en-têtes de fichiers ---/+++ exclus (mêmes règles que count_changed_lines)
+_CHANGED_LINE = re.compile(rb'^(?!--- |\+\+\+ )[+-]', re.MULTILINE)
+
+# Un caractère UTF-8 occupe au plus 4 octets
+_MAX_BYTES_PER_CHAR = 4
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def count_changed_lines_bytes(data) -> int:
+    """
+    Compte les lignes ajoutées/supprimées sur un buffer d'octets, sans décodage.
+
+    Args:
+        data: bytes, bytearray, memoryview ou mmap.
+
+    Returns:
+        Le nombre de lignes commençant par '+' ou '-', hors en-têtes '--- ' et '+++ '.
+    """
+    return len(_CHANGED_LINE.findall(data))
+
+
+def _decode_head(data, max_chars: Optional[int]) -> str:
+    """Décode uniquement le début du buffer nécessaire pour max_chars caractères."""
+    if max_chars is None:
+        head = data[:]
+    else:
+        head = data[:max_chars * _MAX_BYTES_PER_CHAR]
+    # Le décodeur incrémental ignore un caractère multi-octets coupé en fin de tranche
+    text = codecs.getincrementaldecoder('utf-8')(errors='replace').decode(head, final=False)
+    return text if max_chars is None else text[:max_chars]
+
+
+def _finish(text: str, changes: int, total_bytes: int, max_chars: Optional[int]) -> Tuple[Optional[str], int]:
+    """Normalise le résultat d'une lecture de diff."""
+    text = text.strip()
+    if not text:
+        logger.warning("Le diff fourni est vide")
+        return None, 0
+
+    if max_chars is not None and total_bytes > max_chars:
+        logger.info(f"Diff lu : {total_bytes} octets, {max_chars} caractères conservés pour le prompt")
+    else:
+        logger.info(f"Diff lu : {len(text)} caractères")
+    return text, changes
+
+
+def read_diff_file(path: str, max_chars: Optional[int] = None) -> Tuple[Optional[str], int]:
+    """
+    Lit un diff depuis un fichier via mmap.
+
+    Args:
+        path: Chemin du fichier diff.
+        max_chars: Nombre maximum de caractères décodés (None = tout le fichier).
+
+    Returns:
+        Tuple (texte du diff éventuellement tronqué ou None si vide,
+        nombre total de lignes modifiées dans le fichier complet).
+
+    Raises:
+        GitDiffError: Si le fichier est illisible.
+    """
+    try:
+        with open(path, 'rb') as f:
+            return _read_mapped(f, max_chars)
+    except OSError as e:
+        error_msg = f"Impossible de lire le diff depuis {path} : {e}"
+        logger.error(error_msg)
+        raise GitDiffError(error_msg) from e
+
+
+def read_diff_stream(stream: BinaryIO, max_chars: Optional[int] = None) -> Tuple[Optional[str], int]:
+    """
+    Lit un diff depuis un flux binaire (ex : sys.stdin.buffer).
+
+    Un flux redirigé depuis un fichier est mappé en mémoire ; un pipe est lu par
+    blocs, en ne conservant que le début nécessaire au prompt.
+
+    Args:
+        stream: Flux binaire à lire.
+        max_chars: Nombre maximum de caractères décodés (None = tout le flux).
+
+    Returns:
+        Tuple (texte du diff éventuellement tronqué ou None si vide,
+        nombre total de lignes modifiées).
+
+    Raises:
+        GitDiffError: Si le flux est illisible.
+    """
+    try:
+        try:
+            fileno = stream.fileno()
+            is_regular_file = stat.S_ISREG(os.fstat(fileno).st_mode)
+        except (OSError, io.UnsupportedOperation, AttributeError):
+            is_regular_file = False
+
+        if is_regular_file:
+            return _read_mapped(stream, max_chars)
+        return _read_chunked(stream, max_chars)
+    except OSError as e:
+        error_msg = f"Impossible de lire le diff depuis l'entrée standard : {e}"
+        logger.error(error_msg)
+        raise GitDiffError(error_msg) from e
+
+
+def _read_mapped(f: BinaryIO, max_chars: Optional[int]) -> Tuple[Optional[str], int]:
+    """Lit un fichier ouvert en le mappant en mémoire."""
+    size = os.fstat(f.fileno()).st_size
+    if size == 0:
+        return _finish("", 0, 0, max_chars)
+
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        changes = count_changed_lines_bytes(mapped)
+        text = _decode_head(mapped, max_chars)
+    return _finish(text, changes, size, max_chars)
+
+
+def _read_chunked(stream: BinaryIO, max_chars: Optional[int]) -> Tuple[Optional[str], int]:
+    """Lit un flux non mappable par blocs de lignes complètes."""
+    max_bytes = None if max_chars is None else max_chars * _MAX_BYTES_PER_CHAR
+    head = bytearray()
+    remainder = b''
+    changes = 0
+    total_bytes = 0
+
+    while True:
+        chunk = stream.read(_CHUNK_SIZE)
+        if not chunk:
+            break
+        total_bytes += len(chunk)
+        if max_bytes is None or len(head) < max_bytes:
+            head += chunk if max_bytes is None else chunk[:max_bytes - len(head)]
+
+        # Compter uniquement les lignes complètes pour ne pas couper un préfixe '+'/'-'
+        data = remainder + chunk
+        cut = data.rfind(b'\n') + 1
+        changes += count_changed_lines_bytes(memoryview(data)[:cut])
+        remainder = data[cut:]
+
+    changes += count_changed_lines_bytes(remainder)
+    return _finish(_decode_head(head, max_chars), changes, total_bytes, max_chars)
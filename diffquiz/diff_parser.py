@@ -0,0 +1,126 @@
+"""
+Analyse d'un diff unifié (`git diff`) en fichiers et hunks.
+"""
+import re
+import logging
+from typing import List, Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_INDEX_LINE = re.compile(r'^index ([0-9a-f]+)\.\.([0-9a-f]+)')
+_NULL_BLOB = re.compile(r'^0+$')
+
+
+def _strip_prefix(path: str) -> Optional[str]:
+    """Retire le préfixe a/ ou b/ d'un chemin de diff (None pour /dev/null)."""
+    path = path.split('\t', 1)[0].strip()
+    if path == '/dev/null':
+        return None
+    if path.startswith('a/') or path.startswith('b/'):
+        return path[2:]
+    return path
+
+
+def parse_diff(diff_text: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Découpe un diff unifié en fichiers et hunks.
+
+    Args:
+        diff_text: Texte du diff.
+
+    Returns:
+        Liste de fichiers avec les clés :
+        - path : chemin après modification (avant si le fichier est supprimé) ;
+        - old_path : chemin avant modification (None pour un nouveau fichier) ;
+        - old_blob / new_blob : identifiants (abrégés) des blobs, None si absents ;
+        - header : lignes d'en-tête du fichier ;
+        - hunks : liste de hunks (header, old_start, old_count, new_start, new_count, lines).
+    """
+    files: List[Dict[str, Any]] = []
+    if not diff_text:
+        return files
+
+    current: Optional[Dict[str, Any]] = None
+    hunk: Optional[Dict[str, Any]] = None
+
+    for line in diff_text.splitlines():
+        if line.startswith('diff --git '):
+            current = {
+                "path": None,
+                "old_path": None,
+                "old_blob": None,
+                "new_blob": None,
+                "header": [line],
+                "hunks": [],
+            }
+            parts = line[len('diff --git '):].split(' b/', 1)
+            if len(parts) == 2:
+                current["old_path"] = _strip_prefix(parts[0])
+                current["path"] = parts[1]
+            files.append(current)
+            hunk = None
+            continue
+
+        if current is None:
+            continue
+
+        match = _HUNK_HEADER.match(line)
+        if match:
+            old_start, old_count, new_start, new_count = match.groups()
+            hunk = {
+                "header": line,
+                "old_start": int(old_start),
+                "old_count": 1 if old_count is None else int(old_count),
+                "new_start": int(new_start),
+                "new_count": 1 if new_count is None else int(new_count),
+                "lines": [],
+            }
+            current["hunks"].append(hunk)
+            continue
+
+        if hunk is not None:
+            hunk["lines"].append(line)
+            continue
+
+        current["header"].append(line)
+        index_match = _INDEX_LINE.match(line)
+        if index_match:
+            old_blob, new_blob = index_match.groups()
+            current["old_blob"] = None if _NULL_BLOB.match(old_blob) else old_blob
+            current["new_blob"] = None if _NULL_BLOB.match(new_blob) else new_blob
+        elif line.startswith('--- '):
+            current["old_path"] = _strip_prefix(line[4:])
+        elif line.startswith('+++ '):
+            new_path = _strip_prefix(line[4:])
+            current["path"] = new_path or current["old_path"]
+        elif line.startswith('rename to '):
+            current["path"] = line[len('rename to '):]
+        elif line.startswith('new file mode'):
+            current["old_path"] = None
+
+    return files
+
+
+def format_diff(files: List[Dict[str, Any]]) -> str:
+    """
+    Reconstruit le texte d'un diff à partir de fichiers analysés.
+
+    Les fichiers sans hunk sont omis, ce qui permet de produire un diff réduit
+    en filtrant les hunks au préalable.
+
+    Args:
+        files: Fichiers au format de parse_diff.
+
+    Returns:
+        Texte du diff.
+    """
+    lines: List[str] = []
+    for file in files:
+        if not file["hunks"]:
+            continue
+        lines.extend(file["header"])
+        for hunk in file["hunks"]:
+            lines.append(hunk["header"])
+            lines.extend(hunk["lines"])
+    return "\n".join(lines)
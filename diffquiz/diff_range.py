@@ -0,0 +1,173 @@
+"""
+Choix de l'intervalle de commits à quizzer : dernier commit, push complet ou merge request.
+
+Un push de plusieurs commits produit un unique diff agrégé (`base..head`) ;
+la liste des commits et de leurs fichiers est conservée pour le prompt.
+"""
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional, Tuple
+from diffquiz.config import Settings
+from diffquiz.deadline import Deadline
+from diffquiz.git_utils import get_merge_base, get_commit_log, is_ancestor
+from diffquiz.exceptions import GitDiffError
+
+logger = logging.getLogger(__name__)
+
+# Longueur maximale de l'attribution par commit dans le prompt
+MAX_COMMITS_CHARS = 2000
+MAX_FILES_PER_COMMIT = 8
+
+_ZERO_SHA = re.compile(r'^0+$')
+
+
+def get_push_before_sha() -> Optional[str]:
+    """
+    Récupère le commit précédant le push (GitLab CI_COMMIT_BEFORE_SHA, événement GitHub).
+
+    Returns:
+        SHA ou None (nouvelle branche, pipeline hors push).
+    """
+    before = os.environ.get('CI_COMMIT_BEFORE_SHA')
+    if not before and os.environ.get('GITHUB_EVENT_PATH'):
+        try:
+            with open(os.environ['GITHUB_EVENT_PATH'], "r", encoding="utf-8") as f:
+                before = json.load(f).get("before")
+        except (OSError, ValueError, AttributeError) as e:
+            logger.debug(f"Événement GitHub illisible : {e}")
+    if not before or _ZERO_SHA.match(before):
+        return None
+    return before
+
+
+def get_target_branch(settings: Settings) -> Optional[str]:
+    """
+    Récupère la branche cible de la merge request.
+
+    Args:
+        settings: Configuration de l'application.
+
+    Returns:
+        Nom de la branche ou None.
+    """
+    return (
+        settings.diff_target_branch
+        or os.environ.get('CI_MERGE_REQUEST_TARGET_BRANCH_NAME')
+        or os.environ.get('GITHUB_BASE_REF')
+        or None
+    )
+
+
+def _merge_base_with(target: str, settings: Settings, deadline: Optional[Deadline]) -> Optional[str]:
+    """Ancêtre commun de HEAD et de la branche cible (distante d'abord, puis locale)."""
+    for ref in (f"origin/{target}", target):
+        base = get_merge_base(ref, "HEAD", settings.git_timeout_seconds, deadline)
+        if base:
+            return base
+    logger.warning(
+        f"Ancêtre commun introuvable avec '{target}' (historique tronqué ? augmenter GIT_DEPTH)"
+    )
+    return None
+
+
+def resolve_diff_range(settings: Settings, deadline: Optional[Deadline] = None) -> Tuple[str, str]:
+    """
+    Détermine l'intervalle (base, head) du diff selon DIFF_RANGE_MODE.
+
+    - commit : dernier commit (HEAD^..HEAD) ;
+    - push : tous les commits du push (before..HEAD) ;
+    - merge-base : toute la merge request (merge-base(cible, HEAD)..HEAD) ;
+    - auto : merge-base si une branche cible est connue, sinon push, sinon commit.
+
+    Les modes push et merge-base retombent sur le dernier commit si la CI ne
+    fournit pas les informations nécessaires.
+
+    Args:
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel).
+
+    Returns:
+        Tuple (base, head).
+    """
+    mode = settings.diff_range_mode
+    timeout = settings.git_timeout_seconds
+
+    if mode in ("merge-base", "auto"):
+        target = get_target_branch(settings)
+        base = _merge_base_with(target, settings, deadline) if target else None
+        if base:
+            logger.info(f"Intervalle du diff : merge-base avec '{target}' ({base[:8]}..HEAD)")
+            return base, "HEAD"
+
+    if mode in ("push", "auto"):
+        before = get_push_before_sha()
+        if before and is_ancestor(before, "HEAD", timeout, deadline):
+            logger.info(f"Intervalle du diff : push complet ({before[:8]}..HEAD)")
+            return before, "HEAD"
+        if before:
+            logger.warning("Commit précédant le push absent de l'historique (force-push, clone tronqué)")
+
+    if mode != "commit":
+        logger.info("Intervalle du diff : dernier commit (HEAD^..HEAD)")
+    return "HEAD^", "HEAD"
+
+
+def format_commit_log(commits: List[Dict[str, Any]], max_chars: int = MAX_COMMITS_CHARS) -> Optional[str]:
+    """
+    Formate l'attribution des changements par commit pour le prompt.
+
+    Args:
+        commits: Commits retournés par get_commit_log.
+        max_chars: Taille maximale en caractères.
+
+    Returns:
+        Texte formaté ou None s'il y a moins de deux commits.
+    """
+    if len(commits) < 2:
+        return None
+
+    lines: List[str] = []
+    total = 0
+    for commit in commits:
+        files = commit["files"][:MAX_FILES_PER_COMMIT]
+        if len(commit["files"]) > MAX_FILES_PER_COMMIT:
+            files.append(f"+{len(commit['files']) - MAX_FILES_PER_COMMIT} autre(s)")
+        line = f"- {commit['sha']} {commit['subject']} ({commit['author']}) : {', '.join(files)}"
+        if total + len(line) > max_chars:
+            lines.append(f"- ... {len(commits) - len(lines)} commit(s) supplémentaire(s)")
+            break
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def get_commit_attribution(
+    base: str,
+    head: str,
+    settings: Settings,
+    deadline: Optional[Deadline] = None
+) -> Optional[str]:
+    """
+    Construit l'attribution par commit d'un intervalle ; les erreurs ne sont pas bloquantes.
+
+    Args:
+        base: Révision de départ.
+        head: Révision d'arrivée.
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel).
+
+    Returns:
+        Texte formaté ou None (un seul commit, erreur git).
+    """
+    if base == "HEAD^":
+        return None
+    try:
+        commits = get_commit_log(base, head, timeout=settings.git_timeout_seconds, deadline=deadline)
+    except GitDiffError as e:
+        logger.warning(f"Attribution des commits impossible, poursuite sans : {e}")
+        return None
+    if len(commits) > 1:
+        logger.info(f"Diff agrégé de {len(commits)} commit(s)")
+    return format_commit_log(commits)
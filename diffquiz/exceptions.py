@@ -18,11 +18,21 @@ class LLMAPIError(DiffQuizError):
     pass
 
 
+class CircuitOpenError(LLMAPIError):
+    """L'API LLM est considérée hors service (disjoncteur ouvert)."""
+    pass
+
+
 class QuizGenerationError(DiffQuizError):
     """Erreur lors de la génération du quiz."""
     pass
 
 
+class DeadlineExceededError(DiffQuizError):
+    """Le budget de temps global du job est épuisé."""
+    pass
+
+
 class SecurityError(DiffQuizError):
     """Erreur de sécurité."""
     pass
@@ -32,3 +42,7 @@ class ValidationError(DiffQuizError):
     """Erreur de validation."""
     pass
 
+
+class VerificationError(DiffQuizError):
+    """Erreur de communication avec le service de validation des quiz."""
+    pass
@@ -1,49 +1,73 @@
 """
 Utilitaires Git pour récupérer les différences de code.
 """
+import os
+import fnmatch
 import subprocess
 import logging
-from typing import Optional
-from diffquiz.exceptions import GitDiffError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from diffquiz.deadline import Deadline
+from diffquiz.diff_compaction import compact_diff
+from diffquiz.exceptions import GitDiffError, DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
+# Taille minimale de l'en-tête d'un fichier dans un patch (diff --git, index, ---, +++, @@)
+_MIN_FILE_HEADER_CHARS = 100
 
-def get_git_diff() -> Optional[str]:
+# Avec la compaction, patchs récupérés jusqu'à ce multiple du budget : les répétitions
+# au-delà du budget sont comptées sans relire en entier un changement généré ou vendorisé
+COMPACTION_FETCH_FACTOR = 4
+
+
+def _run_git(
+    args: List[str],
+    timeout: float = 30,
+    deadline: Optional[Deadline] = None,
+    expected_codes: Tuple[int, ...] = ()
+) -> Optional[str]:
     """
-    Récupère le diff des changements validés entre le HEAD actuel et le précédent.
+    Exécute une commande git et retourne sa sortie standard.
+    
+    Args:
+        args: Arguments passés à git.
+        timeout: Timeout de la commande en secondes.
+        deadline: Budget de temps global du job (optionnel).
+        expected_codes: Codes de sortie non nuls qui sont une réponse normale de la
+            commande (ex : 1 pour merge-base --is-ancestor), journalisés en debug.
     
     Returns:
-        Le diff en texte ou None si aucun diff disponible.
+        La sortie de la commande ou None si git a échoué (ex : pas de commit parent).
         
     Raises:
         GitDiffError: Si git n'est pas disponible ou en cas d'erreur.
+        DeadlineExceededError: Si le budget global est épuisé.
     """
+    effective_timeout = deadline.timeout(timeout, "git diff") if deadline else timeout
+    
     try:
         result = subprocess.run(
-            ["git", "diff", "HEAD^", "HEAD", "--unified=0"],
+            ["git", *args],
             capture_output=True,
             text=True,
             check=True,
-            timeout=30
+            timeout=effective_timeout
         )
-        diff_text = result.stdout.strip()
-        
-        if not diff_text:
-            logger.warning("Aucun diff trouvé (peut-être le premier commit ?)")
-            return None
-            
-        logger.info(f"Diff récupéré : {len(diff_text)} caractères")
-        return diff_text
+        return result.stdout
         
     except subprocess.CalledProcessError as e:
-        logger.warning(f"Impossible de récupérer le git diff : {e.stderr}")
+        if e.returncode in expected_codes:
+            logger.debug(f"git {' '.join(args)} : code de sortie {e.returncode}")
+        else:
+            logger.warning(f"Impossible de récupérer le git diff : {e.stderr}")
         return None
     except FileNotFoundError:
         error_msg = "Git n'est pas installé ou non disponible dans le PATH"
         logger.error(error_msg)
         raise GitDiffError(error_msg)
     except subprocess.TimeoutExpired:
+        if effective_timeout < timeout:
+            raise DeadlineExceededError("Budget de temps épuisé pendant la récupération du git diff")
         error_msg = "Timeout lors de la récupération du git diff"
         logger.error(error_msg)
         raise GitDiffError(error_msg)
@@ -53,6 +77,327 @@ def get_git_diff() -> Optional[str]:
         raise GitDiffError(error_msg) from e
 
 
+def get_git_diff(
+    timeout: float = 30,
+    deadline: Optional[Deadline] = None,
+    base: str = "HEAD^",
+    head: str = "HEAD"
+) -> Optional[str]:
+    """
+    Récupère le diff agrégé des changements validés entre deux révisions (par défaut le dernier commit).
+    
+    Args:
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+        base: Révision de départ (ex : merge-base de la merge request).
+        head: Révision d'arrivée.
+    
+    Returns:
+        Le diff en texte ou None si aucun diff disponible.
+        
+    Raises:
+        GitDiffError: Si git n'est pas disponible ou en cas d'erreur.
+        DeadlineExceededError: Si le budget global est épuisé.
+    """
+    output = _run_git(["diff", base, head, "--unified=0"], timeout, deadline)
+    if output is None:
+        return None
+    
+    diff_text = output.strip()
+    if not diff_text:
+        logger.warning("Aucun diff trouvé (peut-être le premier commit ?)")
+        return None
+        
+    logger.info(f"Diff récupéré : {len(diff_text)} caractères")
+    return diff_text
+
+
+def get_head_sha(timeout: float = 30, deadline: Optional[Deadline] = None) -> Optional[str]:
+    """
+    Récupère le SHA complet du commit HEAD.
+    
+    Args:
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+    
+    Returns:
+        SHA de HEAD ou None si git a échoué.
+    """
+    output = _run_git(["rev-parse", "HEAD"], timeout, deadline)
+    return output.strip() if output else None
+
+
+def is_ancestor(ancestor: str, descendant: str = "HEAD", timeout: float = 30,
+                deadline: Optional[Deadline] = None) -> bool:
+    """
+    Vérifie qu'un commit est un ancêtre d'un autre (historique non réécrit).
+    
+    Args:
+        ancestor: Commit supposé ancêtre.
+        descendant: Commit descendant.
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+    
+    Returns:
+        True si ancestor est un ancêtre de descendant (False si le commit est inconnu).
+    """
+    # Code 1 : pas un ancêtre (réponse normale, pas une erreur)
+    args = ["merge-base", "--is-ancestor", ancestor, descendant]
+    return _run_git(args, timeout, deadline, expected_codes=(1,)) is not None
+
+
+def get_merge_base(first: str, second: str = "HEAD", timeout: float = 30,
+                   deadline: Optional[Deadline] = None) -> Optional[str]:
+    """
+    Calcule l'ancêtre commun de deux révisions.
+    
+    Args:
+        first: Première révision (ex : branche cible).
+        second: Seconde révision.
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+    
+    Returns:
+        SHA de l'ancêtre commun ou None (révision inconnue, historique tronqué).
+    """
+    output = _run_git(["merge-base", first, second], timeout, deadline)
+    return output.strip() if output else None
+
+
+def get_commit_log(
+    base: str,
+    head: str = "HEAD",
+    max_commits: int = 50,
+    timeout: float = 30,
+    deadline: Optional[Deadline] = None
+) -> List[Dict[str, Any]]:
+    """
+    Liste les commits d'un intervalle avec les fichiers qu'ils modifient (une seule commande git).
+    
+    Args:
+        base: Révision de départ (exclue).
+        head: Révision d'arrivée.
+        max_commits: Nombre maximum de commits (les plus récents).
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+    
+    Returns:
+        Commits du plus ancien au plus récent : sha, author, subject, files.
+    """
+    output = _run_git(
+        ["log", "--no-merges", "--reverse", f"--max-count={max_commits}", "--name-only",
+         "--format=%x1e%h%x1f%an%x1f%s", f"{base}..{head}"],
+        timeout, deadline
+    )
+    commits = []
+    for record in (output or "").split('\x1e'):
+        if not record.strip():
+            continue
+        header, _, files = record.partition('\n')
+        sha, author, subject = (header.split('\x1f') + ["", ""])[:3]
+        commits.append({
+            "sha": sha,
+            "author": author,
+            "subject": subject,
+            "files": [line for line in files.splitlines() if line.strip()],
+        })
+    return commits
+
+
+def parse_numstat(output: str) -> List[Dict[str, Any]]:
+    """
+    Analyse la sortie de `git diff --numstat -z`.
+    
+    Args:
+        output: Sortie brute de git (champs séparés par NUL).
+        
+    Returns:
+        Liste de fichiers : path, old_path (renommage, sinon None), added, deleted, binary.
+    """
+    files = []
+    fields = output.split('\0')
+    i = 0
+    while i < len(fields):
+        entry = fields[i]
+        i += 1
+        if not entry.strip():
+            continue
+        
+        added, deleted, path = entry.split('\t', 2)
+        old_path = None
+        if path == '':
+            # Renommage/copie : les chemins source et destination suivent
+            old_path, path = fields[i], fields[i + 1]
+            i += 2
+        
+        binary = added == '-' and deleted == '-'
+        files.append({
+            "path": path,
+            "old_path": old_path,
+            "added": 0 if binary else int(added),
+            "deleted": 0 if binary else int(deleted),
+            "binary": binary,
+        })
+    return files
+
+
+def survey_git_diff(
+    base: str = "HEAD^",
+    head: str = "HEAD",
+    timeout: float = 30,
+    deadline: Optional[Deadline] = None
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Première phase : inventaire peu coûteux des fichiers modifiés (sans texte de patch).
+    
+    Args:
+        base: Révision de départ.
+        head: Révision d'arrivée.
+        timeout: Timeout de la commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+        
+    Returns:
+        Liste de fichiers (voir parse_numstat) ou None si git a échoué.
+    """
+    output = _run_git(["diff", "--numstat", "-z", "-M", base, head], timeout, deadline)
+    if output is None:
+        return None
+    return parse_numstat(output)
+
+
+def select_diff_files(
+    files: List[Dict[str, Any]],
+    max_chars: Optional[int] = None,
+    exclude_patterns: Sequence[str] = ()
+) -> List[Dict[str, Any]]:
+    """
+    Sélectionne les fichiers dont le patch sera récupéré.
+    
+    Les fichiers binaires et exclus sont écartés. Avec un budget, la sélection
+    s'arrête dès que la taille minimale des patchs (en-tête + 2 caractères par
+    ligne modifiée) dépasse le budget : ces fichiers auraient de toute façon été
+    coupés par la troncature du diff.
+    
+    Args:
+        files: Inventaire retourné par survey_git_diff.
+        max_chars: Budget de caractères du diff (None = pas de limite).
+        exclude_patterns: Motifs glob de chemins à ignorer.
+        
+    Returns:
+        Fichiers sélectionnés, dans l'ordre de git.
+    """
+    selected = []
+    min_size = 0
+    for file in files:
+        if file["binary"]:
+            continue
+        path = file["path"]
+        if any(fnmatch.fnmatch(path, pattern) or fnmatch.fnmatch(os.path.basename(path), pattern)
+               for pattern in exclude_patterns):
+            logger.debug(f"Fichier exclu du diff : {path}")
+            continue
+        if max_chars is not None and selected and min_size >= max_chars:
+            break
+        
+        selected.append(file)
+        min_size += _MIN_FILE_HEADER_CHARS + 2 * (file["added"] + file["deleted"])
+    return selected
+
+
+def fetch_git_diff(
+    base: str = "HEAD^",
+    head: str = "HEAD",
+    max_chars: Optional[int] = None,
+    exclude_patterns: Sequence[str] = (),
+    timeout: float = 30,
+    deadline: Optional[Deadline] = None,
+    compaction_min_repeats: int = 0
+) -> Tuple[Optional[str], int]:
+    """
+    Récupère le diff en deux phases : inventaire --numstat, puis patch des seuls fichiers retenus.
+    
+    Sur les commits touchant des milliers de fichiers, le texte des patchs qui ne
+    seraient jamais envoyés au LLM n'est ni généré ni transféré.
+    
+    Avec la compaction, le patch des candidats est récupéré jusqu'à
+    COMPACTION_FETCH_FACTOR fois le budget, puis compacté : les répétitions sont
+    comptées au-delà du budget et le budget n'est plus consommé par des hunks répétés.
+    
+    Args:
+        base: Révision de départ.
+        head: Révision d'arrivée.
+        max_chars: Budget de caractères du diff (None = pas de limite).
+        exclude_patterns: Motifs glob de chemins à ignorer.
+        timeout: Timeout de chaque commande git en secondes.
+        deadline: Budget de temps global du job (optionnel).
+        compaction_min_repeats: Seuil de regroupement des hunks répétés (0 = pas de compaction, voir compact_diff).
+        
+    Returns:
+        Tuple (diff des fichiers retenus ou None, nombre de lignes modifiées de ces
+        fichiers selon l'inventaire, y compris au-delà du budget, hors répétitions compactées).
+        
+    Raises:
+        GitDiffError: Si git n'est pas disponible ou en cas d'erreur.
+        DeadlineExceededError: Si le budget global est épuisé.
+    """
+    files = survey_git_diff(base, head, timeout, deadline)
+    if not files:
+        if files is not None:
+            logger.warning("Aucun diff trouvé (peut-être le premier commit ?)")
+        return None, 0
+    
+    candidates = select_diff_files(files, None, exclude_patterns)
+    # Compaction : budget élargi, le budget réel s'applique au diff compacté (troncature du texte envoyé au LLM)
+    if compaction_min_repeats > 0 and max_chars is not None:
+        max_chars *= COMPACTION_FETCH_FACTOR
+    selected = select_diff_files(candidates, max_chars)
+    if not selected:
+        logger.info(f"Aucun fichier exploitable parmi {len(files)} fichier(s) modifié(s)")
+        return None, 0
+    changes = sum(file["added"] + file["deleted"] for file in candidates)
+    
+    args = ["diff", base, head, "--unified=0", "-M"]
+    if len(selected) < len(files):
+        # Pathspecs littéraux : les noms de fichiers ne sont pas interprétés comme des globs
+        args.append("--")
+        for file in selected:
+            args.append(f":(literal){file['path']}")
+            if file["old_path"]:
+                args.append(f":(literal){file['old_path']}")
+        logger.info(f"Patch limité à {len(selected)} fichier(s) sur {len(files)}")
+    
+    output = _run_git(args, timeout, deadline)
+    diff_text = (output or "").strip()
+    if not diff_text:
+        return None, 0
+    
+    logger.info(f"Diff récupéré : {len(diff_text)} caractères")
+    compacted = compact_diff(diff_text, compaction_min_repeats)
+    if compacted != diff_text:
+        changes = max(changes - count_changed_lines(diff_text) + count_changed_lines(compacted), 1)
+    return compacted, changes
+
+
+def count_changed_lines(diff_text: Optional[str]) -> int:
+    """
+    Compte les lignes ajoutées/supprimées d'un diff.
+    
+    Args:
+        diff_text: Le texte du diff.
+        
+    Returns:
+        Le nombre de lignes commençant par '+' ou '-', hors en-têtes '--- ' et '+++ '
+        (même total que --numstat).
+    """
+    if not diff_text:
+        return 0
+    
+    return sum(
+        1 for line in diff_text.splitlines()
+        if line.startswith(('+', '-')) and not line.startswith(('--- ', '+++ '))
+    )
+
+
 def calculate_question_count(diff_text: Optional[str], lines_per_question: int = 20, max_questions: int = 5) -> int:
     """
     Calcule le nombre de questions basé sur la taille du diff.
@@ -68,10 +413,21 @@ def calculate_question_count(diff_text: Optional[str], lines_per_question: int =
     if not diff_text:
         return 0
     
-    lines = diff_text.splitlines()
-    # Compter les lignes ajoutées/supprimées
-    changes = sum(1 for line in lines if line.startswith('+') or line.startswith('-'))
+    return question_count_for_changes(count_changed_lines(diff_text), lines_per_question, max_questions)
+
+
+def question_count_for_changes(changes: int, lines_per_question: int = 20, max_questions: int = 5) -> int:
+    """
+    Calcule le nombre de questions à partir d'un nombre de lignes modifiées.
     
+    Args:
+        changes: Nombre de lignes ajoutées/supprimées.
+        lines_per_question: Nombre de lignes modifiées par question.
+        max_questions: Nombre maximum de questions.
+        
+    Returns:
+        Le nombre de questions (entre 1 et max_questions, 0 sans changement).
+    """
     if changes == 0:
         return 0
     
@@ -0,0 +1,414 @@
+"""
+Site statique d'historique des quiz (GitLab Pages).
+
+Les quiz archivés par le pipeline (un sous-dossier par quiz, contenant
+quiz.json ou, pour les archives plus anciennes, quiz_report.html) sont agrégés en un site statique : une page par quiz qui référence des
+ressources CSS/JS partagées, un index listant tous les quiz et un index de
+recherche prébâti (questions, fichiers, commits) interrogé côté navigateur.
+Chaque fichier est précompressé (.gz, et .br si le module brotli est
+installé) pour être servi tel quel par le serveur de Pages.
+
+Usage : python -m diffquiz.history_site HISTORY_DIR [OUTPUT_DIR]
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import logging
+import argparse
+import unicodedata
+from html import escape, unescape
+from datetime import datetime, timezone
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Set
+from diffquiz.exceptions import ValidationError
+from diffquiz.html_generator import iter_html, shared_assets
+from diffquiz.html_assets import minify_js
+from diffquiz.models import Quiz, parse_quiz
+from diffquiz.quiz_artifact import find_artifact, load_artifact
+
+try:
+    import brotli
+except ImportError:  # Compression brotli optionnelle
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+REPORT_FILENAME = "quiz_report.html"
+SEARCH_INDEX_FILENAME = "search-index.json"
+
+# Extraction des rapports générés par html_generator (en ligne, hors ligne ou minifiés)
+_ANSWERS = re.compile(r'const correctAnswers = (\[.*?\]);')
+_COMMIT_URL = re.compile(r'<a href="([^"]+)" target="_blank">Voir les modifications du commit')
+_CARD = re.compile(
+    r'<div class="mb-4" id="card-(\d+)"(?: data-file="([^"]*)")?>\s*<h5>\d+\. (.*?)</h5>(.*?)'
+    r'<div id="expl-\1" class="explanation alert alert-info">(.*?)</div>',
+    re.S
+)
+_OPTION = re.compile(r'value="[A-D]"[^>]*>\s*[A-D]\) (.*?)\s*</label>', re.S)
+_TOKEN = re.compile(r'\w+')
+
+
+@dataclass
+class HistoryEntry:
+    """
+    Quiz archivé, publié sur le site.
+
+    Args:
+        quiz_id: Identifiant (nom du dossier d'archive, ex : l'ID du pipeline).
+        questions: Questions du quiz.
+        commit_url: URL du commit (si présente dans le rapport).
+        created_at: Date de génération (UTC).
+    """
+    quiz_id: str
+    questions: Quiz
+    commit_url: Optional[str]
+    created_at: datetime
+
+    @property
+    def commit(self) -> str:
+        """SHA du commit, extrait de son URL (vide si inconnu)."""
+        return self.commit_url.rstrip('/').rsplit('/', 1)[-1] if self.commit_url else ''
+
+    @property
+    def files(self) -> List[str]:
+        """Fichiers couverts par les questions, sans doublon."""
+        return list(dict.fromkeys(q.file for q in self.questions if q.file))
+
+
+def scrape_report(html: str) -> Optional[Dict[str, object]]:
+    """
+    Reconstruit le quiz contenu dans un rapport HTML.
+
+    Args:
+        html: Contenu de quiz_report.html.
+
+    Returns:
+        Dictionnaire {"questions", "commit_url"}, ou None si le rapport ne
+        contient pas de quiz (mode PASS, rapport d'erreur).
+
+    Raises:
+        ValidationError: Si les questions extraites sont invalides.
+    """
+    answers_match = _ANSWERS.search(html)
+    cards = _CARD.findall(html)
+    if not answers_match or not cards:
+        return None
+    answers = json.loads(answers_match.group(1))
+    if len(answers) != len(cards):
+        raise ValidationError(f"{len(cards)} questions pour {len(answers)} réponses")
+    quiz = []
+    for (_, file, question, options, explanation), answer in zip(cards, answers):
+        data = {
+            "question": unescape(question.strip()),
+            "options": [unescape(option) for option in _OPTION.findall(options)],
+            "answer": answer,
+            "explanation": unescape(explanation.strip()),
+        }
+        if file:
+            data["file"] = unescape(file)
+        quiz.append(data)
+    commit_match = _COMMIT_URL.search(html)
+    return {
+        "questions": parse_quiz(quiz),
+        "commit_url": unescape(commit_match.group(1)) if commit_match else None,
+    }
+
+
+def load_entry(directory: str) -> Optional[HistoryEntry]:
+    """
+    Charge un quiz archivé, depuis quiz.json de préférence, sinon depuis le rapport HTML.
+
+    Args:
+        directory: Dossier d'archive contenant quiz.json ou quiz_report.html.
+
+    Returns:
+        Entrée d'historique, ou None si le dossier ne contient pas de quiz exploitable.
+    """
+    quiz_id = os.path.basename(os.path.normpath(directory))
+    artifact_path = find_artifact(directory)
+    path = artifact_path or os.path.join(directory, REPORT_FILENAME)
+    try:
+        if artifact_path:
+            artifact = load_artifact(artifact_path)
+            if not artifact.questions:
+                return None
+            return HistoryEntry(quiz_id, parse_quiz(artifact.questions), artifact.commit_url, artifact.generated_at)
+        with open(path, "r", encoding="utf-8") as f:
+            report = scrape_report(f.read())
+    except (OSError, ValueError, ValidationError) as e:
+        logger.warning(f"Quiz ignoré ({path}) : {e}")
+        return None
+    if report is None:
+        return None
+    return HistoryEntry(
+        quiz_id=quiz_id,
+        questions=report["questions"],
+        commit_url=report["commit_url"],
+        created_at=datetime.fromtimestamp(os.path.getmtime(path), timezone.utc),
+    )
+
+
+def load_history(history_dir: str, pool: Optional[ThreadPoolExecutor] = None) -> List[HistoryEntry]:
+    """
+    Charge tous les quiz archivés, du plus récent au plus ancien.
+
+    Args:
+        history_dir: Dossier d'historique (un sous-dossier par quiz).
+        pool: Pool de threads pour lire les rapports en parallèle (optionnel).
+
+    Returns:
+        Entrées d'historique.
+    """
+    if not os.path.isdir(history_dir):
+        logger.warning(f"Dossier d'historique introuvable : {history_dir}")
+        return []
+    directories = sorted(entry.path for entry in os.scandir(history_dir) if entry.is_dir())
+    loaded = pool.map(load_entry, directories) if pool else map(load_entry, directories)
+    entries = [entry for entry in loaded if entry is not None]
+    entries.sort(key=lambda entry: (entry.created_at, entry.quiz_id), reverse=True)
+    return entries
+
+
+def normalize_text(text: str) -> str:
+    """Minuscules, sans accents (identique à la normalisation du script de recherche)."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text: str) -> Set[str]:
+    """Termes indexés d'un texte (au moins deux caractères)."""
+    return {token for token in _TOKEN.findall(normalize_text(text)) if len(token) >= 2}
+
+
+def build_search_index(entries: List[HistoryEntry]) -> Dict[str, object]:
+    """
+    Construit l'index inversé interrogé par le navigateur.
+
+    Args:
+        entries: Entrées d'historique, dans l'ordre de l'index HTML.
+
+    Returns:
+        {"terms": {terme: [numéros des quiz]}} : énoncés, fichiers et commits.
+    """
+    terms: Dict[str, List[int]] = {}
+    for number, entry in enumerate(entries):
+        texts = [q.question for q in entry.questions] + entry.files + [entry.commit, entry.quiz_id]
+        tokens: Set[str] = set()
+        for text in texts:
+            tokens |= tokenize(text)
+        tokens.update(normalize_text(path) for path in entry.files)
+        for token in tokens:
+            terms.setdefault(token, []).append(number)
+    return {"terms": dict(sorted(terms.items()))}
+
+
+# Recherche côté navigateur : tous les termes doivent correspondre, le dernier par préfixe
+SEARCH_SCRIPT = """
+(function () {
+    const input = document.getElementById('search');
+    const count = document.getElementById('resultCount');
+    const items = document.querySelectorAll('#quizList [data-doc]');
+    let terms = {};
+    let keys = [];
+
+    function tokens(text) {
+        const normalized = text.normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase();
+        return (normalized.match(/[\\p{L}\\p{N}_]+/gu) || []).filter(token => token.length >= 2);
+    }
+
+    // Termes triés : recherche dichotomique du premier terme commençant par le préfixe
+    function lookup(token, prefix) {
+        if (!prefix) {
+            return new Set(terms[token] || []);
+        }
+        const found = new Set();
+        let low = 0, high = keys.length;
+        while (low < high) {
+            const middle = (low + high) >> 1;
+            if (keys[middle] < token) { low = middle + 1; } else { high = middle; }
+        }
+        for (let i = low; i < keys.length && keys[i].startsWith(token); i++) {
+            terms[keys[i]].forEach(doc => found.add(doc));
+        }
+        return found;
+    }
+
+    function search() {
+        const query = tokens(input.value);
+        let matches = null;
+        query.forEach((token, index) => {
+            const found = lookup(token, index === query.length - 1);
+            matches = matches === null ? found : new Set([...matches].filter(doc => found.has(doc)));
+        });
+        let shown = 0;
+        items.forEach(item => {
+            const visible = matches === null || matches.has(Number(item.dataset.doc));
+            item.style.display = visible ? '' : 'none';
+            shown += visible ? 1 : 0;
+        });
+        count.textContent = `${shown} / ${items.length}`;
+    }
+
+    fetch('search-index.json')
+        .then(response => response.json())
+        .then(index => {
+            terms = index.terms;
+            keys = Object.keys(terms).sort();
+            input.disabled = false;
+            search();
+        })
+        .catch(error => console.error('Index de recherche indisponible :', error));
+    input.addEventListener('input', search);
+})();
+"""
+
+
+def _summary(entry: HistoryEntry) -> str:
+    """Titre d'un quiz dans l'index : première question, tronquée."""
+    title = entry.questions[0].question
+    return title if len(title) <= 120 else title[:117] + "..."
+
+
+def render_index(entries: List[HistoryEntry]) -> str:
+    """
+    Génère la page d'accueil : liste des quiz et champ de recherche.
+
+    Args:
+        entries: Entrées d'historique, du plus récent au plus ancien.
+
+    Returns:
+        Contenu HTML.
+    """
+    items = []
+    for number, entry in enumerate(entries):
+        files = ', '.join(entry.files)
+        items.append(
+            f'<a class="list-group-item list-group-item-action" href="quiz/{escape(entry.quiz_id)}.html" data-doc="{number}">'
+            f'<span class="badge bg-dark me-1">{entry.created_at:%Y-%m-%d %H:%M} UTC</span> '
+            f'<b>{escape(entry.commit[:8] or entry.quiz_id)}</b> {escape(_summary(entry))}<br>'
+            f'<small class="text-muted">{len(entry.questions)} questions{" · " + escape(files) if files else ""}</small></a>'
+        )
+    listing = "\n".join(items)
+    return f"""<!DOCTYPE html>
+<html lang="fr">
+<head>
+<meta charset="UTF-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>DiffQuiz - Historique des quiz</title>
+<link href="assets/quiz.css" rel="stylesheet">
+</head>
+<body class="container py-5">
+<div class="card shadow">
+<div class="card-header bg-dark text-white"><h2 class="mb-0">🛡️ DiffQuiz - Historique des quiz</h2></div>
+<div class="card-body">
+<p class="lead">Rechercher par question, fichier ou commit. <small class="text-muted" id="resultCount">{len(entries)} / {len(entries)}</small></p>
+<input class="list-group-item w-100 mb-4" id="search" type="search" placeholder="Rechercher..." disabled>
+<div class="list-group" id="quizList">
+{listing}
+</div>
+</div>
+</div>
+<script src="assets/search.js"></script>
+</body>
+</html>
+"""
+
+
+def write_file(path: str, content: str, compress: bool = True) -> bool:
+    """
+    Écrit un fichier du site et ses variantes précompressées.
+
+    Un fichier inchangé depuis la dernière génération (et déjà compressé)
+    n'est ni réécrit ni recompressé.
+
+    Args:
+        path: Chemin du fichier.
+        content: Contenu texte.
+        compress: Écrire aussi path.gz (et path.br si brotli est disponible).
+
+    Returns:
+        True si le fichier a été (ré)écrit.
+    """
+    data = content.encode("utf-8")
+    variants = {}
+    if compress:
+        variants[path + ".gz"] = lambda: gzip.compress(data, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants[path + ".br"] = lambda: brotli.compress(data, mode=brotli.MODE_TEXT)
+    try:
+        with open(path, "rb") as f:
+            unchanged = f.read() == data
+    except OSError:
+        unchanged = False
+    if unchanged and all(os.path.exists(variant) for variant in variants):
+        return False
+    with open(path, "wb") as f:
+        f.write(data)
+    for variant, compressor in variants.items():
+        with open(variant, "wb") as f:
+            f.write(compressor())
+    return True
+
+
+def build_site(history_dir: str, output_dir: str, compress: bool = True, max_workers: int = 4) -> int:
+    """
+    Génère le site d'historique.
+
+    Args:
+        history_dir: Dossier d'historique (un sous-dossier par quiz, contenant quiz.json ou quiz_report.html).
+        output_dir: Dossier du site (ex : public/ pour GitLab Pages).
+        compress: Précompresser les fichiers (.gz, .br).
+        max_workers: Nombre de threads de lecture, de rendu et de compression.
+
+    Returns:
+        Nombre de quiz publiés.
+    """
+    os.makedirs(os.path.join(output_dir, "assets"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "quiz"), exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        entries = load_history(history_dir, pool)
+
+        def write_page(entry: HistoryEntry) -> bool:
+            answers = [q.answer for q in entry.questions]
+            page = ''.join(iter_html(entry.questions, answers, entry.commit_url, assets_url="../assets"))
+            return write_file(os.path.join(output_dir, "quiz", f"{entry.quiz_id}.html"), page, compress)
+
+        files = dict(shared_assets())
+        files["search.js"] = minify_js(SEARCH_SCRIPT) + "\n"
+        writes = [pool.submit(write_file, os.path.join(output_dir, "assets", name), content, compress)
+                  for name, content in files.items()]
+        writes.append(pool.submit(write_file, os.path.join(output_dir, "index.html"), render_index(entries), compress))
+        index = json.dumps(build_search_index(entries), ensure_ascii=False, separators=(',', ':'))
+        writes.append(pool.submit(write_file, os.path.join(output_dir, SEARCH_INDEX_FILENAME), index, compress))
+        written = sum(pool.map(write_page, entries)) + sum(future.result() for future in writes)
+
+    logger.info(
+        f"Site d'historique : {len(entries)} quiz publiés dans {output_dir} "
+        f"({written} fichiers mis à jour, brotli {'actif' if brotli and compress else 'inactif'})"
+    )
+    return len(entries)
+
+
+def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Génère le site statique d'historique des quiz.")
+    parser.add_argument("history_dir", help="Dossier d'historique (un sous-dossier par quiz)")
+    parser.add_argument("output_dir", nargs="?", default="public", help="Dossier du site (défaut : public)")
+    parser.add_argument("--no-compress", action="store_true", help="Ne pas précompresser les fichiers")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Iterable[str]] = None) -> int:
+    """Point d'entrée : python -m diffquiz.history_site."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    build_site(args.history_dir, args.output_dir, compress=not args.no_compress)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Ressources du rapport HTML hors ligne : sous-ensemble de styles Bootstrap,
+purge des règles inutilisées et minification du CSS et du JavaScript.
+
+Le rapport n'utilise qu'une trentaine de classes Bootstrap : elles sont
+réécrites ici (valeurs de Bootstrap 5.3) pour produire un fichier unique,
+sans requête réseau, lisible sur un poste isolé.
+"""
+import re
+from typing import Iterable, List, Set
+
+# Styles Bootstrap 5.3 des classes émises par html_generator (avant purge)
+BOOTSTRAP_SUBSET_CSS = """
+*, *::before, *::after { box-sizing: border-box; }
+body {
+    margin: 0;
+    font-family: system-ui, -apple-system, "Segoe UI", Roboto, "Helvetica Neue", Arial, sans-serif;
+    font-size: 1rem;
+    font-weight: 400;
+    line-height: 1.5;
+    color: #212529;
+    -webkit-text-size-adjust: 100%;
+}
+h2, h4, h5 { margin-top: 0; margin-bottom: .5rem; font-weight: 500; line-height: 1.2; }
+h2 { font-size: calc(1.325rem + .9vw); }
+h4 { font-size: calc(1.275rem + .3vw); }
+h5 { font-size: 1.25rem; }
+p { margin-top: 0; margin-bottom: 1rem; }
+small { font-size: .875em; }
+a { color: #0d6efd; text-decoration: underline; }
+hr { margin: 1rem 0; color: inherit; border: 0; border-top: 1px solid; opacity: .25; }
+label { display: inline-block; }
+button { margin: 0; font-family: inherit; font-size: inherit; line-height: inherit; cursor: pointer; }
+input { margin: 0; font-family: inherit; }
+.container { width: 100%; padding-right: .75rem; padding-left: .75rem; margin-right: auto; margin-left: auto; }
+@media (min-width: 576px) { .container { max-width: 540px; } }
+@media (min-width: 768px) { .container { max-width: 720px; } }
+@media (min-width: 992px) { .container { max-width: 960px; } }
+@media (min-width: 1200px) { .container { max-width: 1140px; } }
+@media (min-width: 1200px) { h2 { font-size: 2rem; } h4 { font-size: 1.5rem; } }
+.py-5 { padding-top: 3rem !important; padding-bottom: 3rem !important; }
+.mb-0 { margin-bottom: 0 !important; }
+.mb-4 { margin-bottom: 1.5rem !important; }
+.mt-2 { margin-top: .5rem !important; }
+.mt-3 { margin-top: 1rem !important; }
+.mt-4 { margin-top: 1.5rem !important; }
+.me-1 { margin-right: .25rem !important; }
+.w-100 { width: 100% !important; }
+.lead { font-size: 1.25rem; font-weight: 300; }
+.text-muted { color: #6c757d !important; }
+.text-white { color: #fff !important; }
+.bg-dark { background-color: #212529 !important; }
+.bg-success { background-color: #198754 !important; }
+.bg-danger { background-color: #dc3545 !important; }
+.bg-light { background-color: #f8f9fa !important; }
+.shadow { box-shadow: 0 .5rem 1rem rgba(0, 0, 0, .15) !important; }
+.card {
+    position: relative;
+    display: flex;
+    flex-direction: column;
+    min-width: 0;
+    word-wrap: break-word;
+    background-color: #fff;
+    border: 1px solid rgba(0, 0, 0, .175);
+    border-radius: .375rem;
+}
+.card-header { padding: .5rem 1rem; margin-bottom: 0; border-bottom: 1px solid rgba(0, 0, 0, .175); }
+.card-header:first-child { border-radius: calc(.375rem - 1px) calc(.375rem - 1px) 0 0; }
+.card-body { flex: 1 1 auto; padding: 1rem; }
+.btn {
+    display: inline-block;
+    padding: .375rem .75rem;
+    font-size: 1rem;
+    font-weight: 400;
+    line-height: 1.5;
+    text-align: center;
+    text-decoration: none;
+    vertical-align: middle;
+    user-select: none;
+    border: 1px solid transparent;
+    border-radius: .375rem;
+    transition: color .15s ease-in-out, background-color .15s ease-in-out, border-color .15s ease-in-out;
+}
+.btn-lg { padding: .5rem 1rem; font-size: 1.25rem; border-radius: .5rem; }
+.btn-primary { color: #fff; background-color: #0d6efd; border-color: #0d6efd; }
+.btn-primary:hover { background-color: #0b5ed7; border-color: #0a58ca; }
+.btn-success { color: #fff; background-color: #198754; border-color: #198754; }
+.btn-success:hover { background-color: #157347; border-color: #146c43; }
+.btn-outline-secondary { color: #6c757d; background-color: transparent; border-color: #6c757d; }
+.btn-outline-secondary:hover { color: #fff; background-color: #6c757d; }
+.list-group { display: flex; flex-direction: column; padding-left: 0; margin-bottom: 0; border-radius: .375rem; }
+.list-group-item {
+    position: relative;
+    display: block;
+    padding: .5rem 1rem;
+    color: #212529;
+    background-color: #fff;
+    border: 1px solid rgba(0, 0, 0, .175);
+}
+.list-group-item:first-child { border-top-left-radius: inherit; border-top-right-radius: inherit; }
+.list-group-item:last-child { border-bottom-right-radius: inherit; border-bottom-left-radius: inherit; }
+.list-group-item + .list-group-item { border-top-width: 0; }
+.list-group-item-action { width: 100%; text-align: inherit; cursor: pointer; }
+.list-group-item-action:hover { background-color: #f8f9fa; }
+.list-group-item-success { color: #0a3622; background-color: #d1e7dd; }
+.list-group-item-danger { color: #58151c; background-color: #f8d7da; }
+.form-check-input { width: 1em; height: 1em; margin-top: .25em; vertical-align: top; }
+.alert { position: relative; padding: 1rem; margin-bottom: 1rem; border: 1px solid transparent; border-radius: .375rem; }
+.alert-info { color: #055160; background-color: #cff4fc; border-color: #9eeaf9; }
+.badge {
+    display: inline-block;
+    padding: .35em .65em;
+    font-size: .75em;
+    font-weight: 700;
+    line-height: 1;
+    color: #fff;
+    text-align: center;
+    white-space: nowrap;
+    vertical-align: baseline;
+    border-radius: .375rem;
+}
+.progress { display: flex; height: 1rem; overflow: hidden; font-size: .75rem; background-color: #e9ecef; border-radius: .375rem; }
+.progress-bar {
+    display: flex;
+    flex-direction: column;
+    justify-content: center;
+    overflow: hidden;
+    color: #fff;
+    text-align: center;
+    white-space: nowrap;
+    background-color: #0d6efd;
+    transition: width .6s ease;
+}
+.progress-bar-striped {
+    background-image: linear-gradient(45deg, rgba(255, 255, 255, .15) 25%, transparent 25%, transparent 50%,
+        rgba(255, 255, 255, .15) 50%, rgba(255, 255, 255, .15) 75%, transparent 75%, transparent);
+    background-size: 1rem 1rem;
+}
+@keyframes progress-bar-stripes { 0% { background-position-x: 1rem; } }
+.progress-bar-animated { animation: 1s linear infinite progress-bar-stripes; }
+"""
+
+# Attribut class="..." et manipulations de classes en JavaScript
+_CLASS_ATTRIBUTE = re.compile(r'class="([^"]*)"')
+_CLASS_SCRIPT = re.compile(r'(?:classList\.(?:add|remove|toggle|contains)\(([^)]*)\)|className\s*=\s*([^;]+))')
+_QUOTED = re.compile(r'[\'"]([\w-]+)[\'"]')
+_SELECTOR_CLASS = re.compile(r'\.([\w-]+)')
+
+
+def used_classes(sources: Iterable[str]) -> Set[str]:
+    """
+    Collecte les classes CSS émises par le HTML et le JavaScript du rapport.
+
+    Args:
+        sources: Fragments HTML et scripts.
+
+    Returns:
+        Ensemble des noms de classes.
+    """
+    classes: Set[str] = set()
+    for source in sources:
+        for value in _CLASS_ATTRIBUTE.findall(source):
+            classes.update(value.split())
+        for arguments, assigned in _CLASS_SCRIPT.findall(source):
+            classes.update(_QUOTED.findall(arguments or assigned))
+    return classes
+
+
+def _split_blocks(css: str) -> List[str]:
+    """Découpe une feuille de style en blocs de premier niveau (règles et @-blocs)."""
+    blocks: List[str] = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(css):
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                blocks.append(css[start:i + 1].strip())
+                start = i + 1
+    return blocks
+
+
+def _rule_used(selectors: str, classes: Set[str]) -> bool:
+    """Une règle est conservée si l'un de ses sélecteurs n'utilise que des classes présentes."""
+    return any(
+        set(_SELECTOR_CLASS.findall(selector)) <= classes
+        for selector in selectors.split(',')
+    )
+
+
+def purge_css(css: str, classes: Set[str]) -> str:
+    """
+    Retire les règles dont les sélecteurs visent des classes absentes du rapport.
+
+    Les règles sans classe (éléments) et les @keyframes sont conservées ; les
+    blocs @media sont purgés récursivement et retirés s'ils deviennent vides.
+
+    Args:
+        css: Feuille de style.
+        classes: Classes utilisées (voir used_classes).
+
+    Returns:
+        Feuille de style purgée.
+    """
+    kept: List[str] = []
+    for block in _split_blocks(css):
+        selectors, body = block.split('{', 1)
+        selectors = selectors.strip()
+        if selectors.startswith('@media'):
+            inner = purge_css(body.rsplit('}', 1)[0], classes)
+            if inner:
+                kept.append(f"{selectors} {{ {inner} }}")
+        elif selectors.startswith('@') or _rule_used(selectors, classes):
+            kept.append(block)
+    return "\n".join(kept)
+
+
+def minify_css(css: str) -> str:
+    """
+    Minifie une feuille de style (commentaires, espaces, derniers points-virgules).
+
+    Args:
+        css: Feuille de style, éventuellement entourée de balises <style>.
+
+    Returns:
+        CSS minifié.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = css.replace(';}', '}')
+    return css.strip()
+
+
+def minify_js(script: str) -> str:
+    """
+    Minifie prudemment un script : indentation, lignes vides et commentaires de ligne.
+
+    Les fins de ligne sont conservées (pas de risque lié à l'insertion
+    automatique de points-virgules) ; seuls les commentaires occupant toute
+    une ligne sont retirés, jamais un '//' à l'intérieur d'une chaîne.
+
+    Args:
+        script: Code JavaScript, éventuellement entouré de balises <script>.
+
+    Returns:
+        Script minifié.
+    """
+    lines = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped and not stripped.startswith('//'):
+            lines.append(stripped)
+    return "\n".join(lines)
@@ -1,73 +1,227 @@
 """
 Génération du fichier HTML interactif pour le quiz.
 """
+import re
 import json
 import logging
-from typing import List, Dict, Any, Optional
+from html import escape
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
+from diffquiz.models import OPTION_LABELS, Quiz, parse_quiz
+from diffquiz.html_assets import BOOTSTRAP_SUBSET_CSS, used_classes, purge_css, minify_css, minify_js
 
 logger = logging.getLogger(__name__)
 
 
-def generate_html(quiz_data: List[Dict[str, Any]], correct_answers: List[str], commit_url: Optional[str] = None) -> str:
+BOOTSTRAP_CDN_LINK = '<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">'
+
+# Parties dynamiques du gabarit compilé : lien du commit, nombre de questions,
+# questions et réponses attendues (marqueurs absents de tout contenu réel)
+_SLOT = re.compile(r'\x00(\w+)\x00')
+
+
+# Variables propres à chaque page, en tête du script du rapport
+_SCRIPT_GLOBALS = re.compile(r'^const (?:correctAnswers|totalQuestions|quizVariant) = .*;\n', re.M)
+
+
+def _slot(name: str) -> str:
+    """Marqueur d'une partie dynamique dans le gabarit."""
+    return f"\x00{name}\x00"
+
+
+@lru_cache(maxsize=1)
+def offline_stylesheet() -> str:
     """
-    Génère le fichier HTML interactif pour le quiz.
+    Styles du rapport hors ligne : sous-ensemble Bootstrap purgé et CSS du quiz, minifiés.
     
-    Le code secret n'est jamais inclus dans le HTML initial. Il est calculé côté client
-    après validation des réponses, garantissant qu'un développeur ne peut pas l'extraire
-    sans répondre correctement au quiz.
+    Returns:
+        Balise <style> à insérer à la place du lien vers le CDN.
+    """
+    sample = [{"question": "", "options": ["A) ", "B) "], "answer": "A", "explanation": ""}]
+    classes = used_classes([''.join(compile_html_template()), generate_questions_html(sample)])
+    custom_css = generate_css().removeprefix("<style>").removesuffix("</style>")
+    return f"<style>{minify_css(purge_css(BOOTSTRAP_SUBSET_CSS, classes) + custom_css)}</style>"
+
+
+@lru_cache(maxsize=4)
+def compile_html_template(offline: bool = False, assets_url: Optional[str] = None) -> Tuple[str, ...]:
+    """
+    Compile une fois par processus la structure statique du rapport.
+    
+    CSS, en-tête, barre de progression, boîte du code secret et JavaScript ne
+    dépendent pas du quiz : ils sont rendus (et minifiés hors ligne) une seule
+    fois, puis réutilisés par chaque rapport.
     
     Args:
-        quiz_data: Liste des questions du quiz.
-        correct_answers: Liste des réponses correctes (pour calcul du hash côté client).
-        commit_url: URL optionnelle vers le commit.
+        offline: Styles intégrés et minifiés au lieu du CDN Bootstrap (fichier autonome).
+        assets_url: Chemin des ressources partagées (voir shared_assets) : la page
+            les référence au lieu d'intégrer son CSS et son JavaScript.
         
     Returns:
-        Contenu HTML généré.
+        Fragments statiques alternant avec les noms des parties dynamiques
+        (commit, total, questions, answers, variant) : indices pairs statiques, impairs dynamiques.
     """
-    if not quiz_data:
-        logger.error("Aucune donnée de quiz fournie")
-        return "<h1>Erreur de génération</h1>"
-    
-    js_answers = json.dumps(correct_answers)
-    total_questions = len(quiz_data)
+    # Hors ligne : aucune requête réseau, styles purgés intégrés au fichier
+    styles = offline_stylesheet() if offline else f"{BOOTSTRAP_CDN_LINK}\n    {generate_css()}"
+    script = generate_javascript(_slot("answers"), _slot("total"), _slot("variant"))
+    if offline:
+        script = minify_js(script)
+    if assets_url:
+        # Ressources partagées entre les pages : seules les réponses restent dans la page
+        styles = f'<link href="{assets_url}/quiz.css" rel="stylesheet">'
+        script = (
+            f"<script>\nconst correctAnswers = {_slot('answers')};\n"
+            f"const totalQuestions = {_slot('total')};\n"
+            f"const quizVariant = {_slot('variant')};\n</script>\n"
+            f'<script src="{assets_url}/quiz.js"></script>'
+        )
     
-    commit_link = ''
-    if commit_url:
-        commit_link = f'<p class="text-muted"><small>📝 <a href="{commit_url}" target="_blank">Voir les modifications du commit</a></small></p>'
-    
-    # Générer le HTML des questions
-    questions_html = generate_questions_html(quiz_data)
-    
-    html = f"""<!DOCTYPE html>
+    page = f"""<!DOCTYPE html>
 <html lang="fr">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Validation Code Junior</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-    {generate_css()}
+    {styles}
 </head>
 <body class="container py-5">
     {generate_theme_toggle()}
     {generate_card_header()}
     <div class="card-body">
         <p class="lead">Le pipeline CI/CD est bloqué. Répondez correctement pour obtenir le code de déblocage.</p>
-        {commit_link}
-        {generate_progress_bar(total_questions)}
+        {_slot("commit")}
+        {generate_progress_bar(_slot("total"))}
         <hr>
         <form id="quizForm">
-            {questions_html}
+            {_slot("questions")}
             <button type="button" class="btn btn-primary btn-lg w-100" onclick="validateQuiz()">Valider mes réponses</button>
         </form>
         {generate_secret_box()}
         <div id="animationContainer" class="success-animation"></div>
     </div>
 </div>
-{generate_javascript(js_answers, total_questions)}
+{script}
 </body>
 </html>"""
+    return tuple(_SLOT.split(page))
+
+
+@lru_cache(maxsize=1)
+def shared_assets() -> Dict[str, str]:
+    """
+    Ressources communes aux pages rendues avec assets_url (site d'historique).
     
-    return html
+    Returns:
+        Contenu par nom de fichier : quiz.css (styles hors ligne) et quiz.js
+        (script du rapport, sans les réponses propres à chaque page).
+    """
+    script = minify_js(generate_javascript("[]", 0, '""'))
+    script = _SCRIPT_GLOBALS.sub('', script).removeprefix("<script>").removesuffix("</script>")
+    return {
+        "quiz.css": offline_stylesheet().removeprefix("<style>").removesuffix("</style>"),
+        "quiz.js": script.strip() + "\n",
+    }
+
+
+def _commit_link(commit_url: Optional[str]) -> str:
+    """Lien vers le commit (vide si aucune URL)."""
+    if not commit_url:
+        return ''
+    return (
+        f'<p class="text-muted"><small>📝 <a href="{escape(commit_url)}" target="_blank">'
+        f'Voir les modifications du commit</a></small></p>'
+    )
+
+
+def iter_html(
+    quiz_data: Union[List[Dict[str, Any]], Quiz],
+    correct_answers: List[str],
+    commit_url: Optional[str] = None,
+    offline: bool = False,
+    assets_url: Optional[str] = None,
+    variant: str = ""
+) -> Iterator[str]:
+    """
+    Rend le rapport fragment par fragment dans le gabarit compilé.
+    
+    Args:
+        quiz_data: Questions du quiz (dictionnaires ou questions typées).
+        correct_answers: Liste des réponses correctes (pour calcul du hash côté client).
+        commit_url: URL optionnelle vers le commit.
+        offline: Rapport autonome : styles intégrés, CSS et JavaScript minifiés.
+        assets_url: Chemin des ressources partagées (quiz.css, quiz.js) à référencer.
+        variant: Identifiant de la variante tirée dans un pool (voir quiz_variant).
+        
+    Yields:
+        Fragments HTML, à concaténer ou à écrire au fil de l'eau.
+    """
+    questions = parse_quiz(quiz_data)
+    values = {
+        "commit": _commit_link(commit_url),
+        "total": str(len(questions)),
+        "answers": json.dumps(correct_answers),
+        "variant": json.dumps(variant),
+    }
+    for index, part in enumerate(compile_html_template(offline, assets_url)):
+        if index % 2 == 0:
+            yield part
+        elif part == "questions":
+            yield from iter_questions_html(questions)
+        else:
+            yield values[part]
+
+
+def generate_html(
+    quiz_data: Union[List[Dict[str, Any]], Quiz],
+    correct_answers: List[str],
+    commit_url: Optional[str] = None,
+    offline: bool = False,
+    variant: str = ""
+) -> str:
+    """
+    Génère le fichier HTML interactif pour le quiz.
+    
+    Le code secret n'est jamais inclus dans le HTML initial. Il est calculé côté client
+    après validation des réponses, garantissant qu'un développeur ne peut pas l'extraire
+    sans répondre correctement au quiz.
+    
+    Args:
+        quiz_data: Questions du quiz (dictionnaires ou questions typées).
+        correct_answers: Liste des réponses correctes (pour calcul du hash côté client).
+        commit_url: URL optionnelle vers le commit.
+        offline: Rapport autonome : styles intégrés, CSS et JavaScript minifiés.
+        variant: Identifiant de la variante tirée dans un pool (voir quiz_variant).
+        
+    Returns:
+        Contenu HTML généré.
+    """
+    if not quiz_data:
+        logger.error("Aucune donnée de quiz fournie")
+        return "<h1>Erreur de génération</h1>"
+    return ''.join(iter_html(quiz_data, correct_answers, commit_url, offline, variant=variant))
+
+
+def write_html(
+    path: str,
+    quiz_data: Union[List[Dict[str, Any]], Quiz],
+    correct_answers: List[str],
+    commit_url: Optional[str] = None,
+    offline: bool = False,
+    variant: str = ""
+) -> None:
+    """
+    Écrit le rapport directement dans un fichier, sans construire la page en mémoire.
+    
+    Args:
+        path: Chemin du fichier HTML.
+        quiz_data: Questions du quiz (dictionnaires ou questions typées).
+        correct_answers: Liste des réponses correctes.
+        commit_url: URL optionnelle vers le commit.
+        offline: Rapport autonome.
+        variant: Identifiant de la variante tirée dans un pool (voir quiz_variant).
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(iter_html(quiz_data, correct_answers, commit_url, offline, variant=variant))
 
 
 def generate_css() -> str:
@@ -158,7 +312,7 @@ def generate_card_header() -> str:
     </div>"""
 
 
-def generate_progress_bar(total_questions: int) -> str:
+def generate_progress_bar(total_questions: Union[int, str]) -> str:
     """Génère la barre de progression."""
     return f"""<div class="progress-container">
     <div class="progress-label">
@@ -178,30 +332,32 @@ def generate_progress_bar(total_questions: int) -> str:
 </div>"""
 
 
-def generate_questions_html(quiz_data: List[Dict[str, Any]]) -> str:
-    """Génère le HTML pour toutes les questions."""
-    html_parts = []
-    for i, q in enumerate(quiz_data):
-        html_parts.append(f"""
-        <div class="mb-4" id="card-{i}">
-            <h5>{i+1}. {q['question']}</h5>
-            <div class="list-group">""")
+def iter_questions_html(questions: Quiz) -> Iterator[str]:
+    """Génère le HTML des questions, contenu échappé (code, balises dans les énoncés)."""
+    for i, q in enumerate(questions):
+        file_attribute = f' data-file="{escape(q.file)}"' if q.file else ''
+        yield f"""
+        <div class="mb-4" id="card-{i}"{file_attribute}>
+            <h5>{i+1}. {escape(q.question)}</h5>
+            <div class="list-group">"""
         
-        for opt in q['options']:
-            val = opt.split(')')[0].strip() if ')' in opt else opt[0]
-            html_parts.append(f"""
+        for label, text in zip(OPTION_LABELS, q.options):
+            yield f"""
                 <label class="list-group-item list-group-item-action">
-                    <input class="form-check-input me-1" type="radio" name="q{i}" value="{val}" onchange="validateQuestion({i})">
-                    {opt}
-                </label>""")
+                    <input class="form-check-input me-1" type="radio" name="q{i}" value="{label}" onchange="validateQuestion({i})">
+                    {label}) {escape(text)}
+                </label>"""
         
-        html_parts.append(f"""
+        yield f"""
             </div>
-            <div id="expl-{i}" class="explanation alert alert-info">{q.get('explanation', '')}</div>
+            <div id="expl-{i}" class="explanation alert alert-info">{escape(q.explanation)}</div>
             <div id="feedback-{i}" class="mt-2"></div>
-        </div>""")
-    
-    return ''.join(html_parts)
+        </div>"""
+
+
+def generate_questions_html(quiz_data: Union[List[Dict[str, Any]], Quiz]) -> str:
+    """Génère le HTML pour toutes les questions."""
+    return ''.join(iter_questions_html(parse_quiz(quiz_data)))
 
 
 def generate_secret_box() -> str:
@@ -222,11 +378,12 @@ def generate_secret_box() -> str:
 </div>"""
 
 
-def generate_javascript(js_answers: str, total_questions: int) -> str:
+def generate_javascript(js_answers: str, total_questions: Union[int, str], js_variant: str = '""') -> str:
     """Génère le JavaScript pour l'interactivité."""
     return f"""<script>
     const correctAnswers = {js_answers};
     const totalQuestions = {total_questions};
+    const quizVariant = {js_variant};
     const STORAGE_KEY = 'quiz_progress_' + window.location.pathname;
     
     document.addEventListener('DOMContentLoaded', function() {{
@@ -395,7 +552,7 @@ def generate_javascript(js_answers: str, total_questions: int) -> str:
         
         // Salt fixe (identique à Python)
         const FIXED_SALT = 'DIFFQUIZ_SALT_2025';
-        const data = answersString + FIXED_SALT;
+        const data = answersString + quizVariant + FIXED_SALT;
         
         // Calculer SHA256
         const encoder = new TextEncoder();
@@ -0,0 +1,149 @@
+"""
+Quiz incrémentaux pour les merge requests recevant plusieurs pushs.
+
+L'état quizzé d'une MR (commits de base et de tête, hunks couverts, questions et
+hash des réponses) est conservé dans le répertoire de stockage local. Au push
+suivant, seul le delta depuis le dernier commit quizzé est envoyé au LLM et les
+questions précédentes sont reprises.
+"""
+import os
+import re
+import json
+import logging
+from typing import List, Dict, Any, Optional
+from diffquiz.config import Settings
+from diffquiz.security import hash_quiz_answers
+
+logger = logging.getLogger(__name__)
+
+STATE_DIRNAME = "incremental"
+
+_GITHUB_PULL_REF = re.compile(r'^refs/pull/(\d+)/')
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+def get_merge_request_id() -> Optional[str]:
+    """
+    Identifie la merge request (GitLab) ou pull request (GitHub) en cours.
+
+    Returns:
+        Identifiant de la MR ou None hors d'un pipeline de MR.
+    """
+    if os.environ.get('CI_MERGE_REQUEST_IID'):
+        return os.environ['CI_MERGE_REQUEST_IID']
+    match = _GITHUB_PULL_REF.match(os.environ.get('GITHUB_REF', ''))
+    if match:
+        return match.group(1)
+    return None
+
+
+def get_merge_request_base() -> Optional[str]:
+    """
+    Récupère le commit de base de la MR fourni par la CI.
+
+    Returns:
+        SHA du commit de base ou None.
+    """
+    return os.environ.get('CI_MERGE_REQUEST_DIFF_BASE_SHA') or os.environ.get('GITHUB_BASE_SHA') or None
+
+
+def incremental_state_path(settings: Settings, repository: str, merge_request_id: str) -> Optional[str]:
+    """
+    Calcule le chemin du fichier d'état d'une MR.
+
+    Args:
+        settings: Configuration de l'application.
+        repository: Identifiant du dépôt.
+        merge_request_id: Identifiant de la MR.
+
+    Returns:
+        Chemin du fichier d'état ou None si aucun répertoire de stockage n'est configuré.
+    """
+    if not settings.quiz_store_dir:
+        return None
+    name = _UNSAFE_CHARS.sub('_', f"{repository}_{merge_request_id}")
+    return os.path.join(settings.quiz_store_dir, STATE_DIRNAME, f"{name}.json")
+
+
+def load_incremental_state(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Charge l'état quizzé d'une MR.
+
+    Un état illisible ou dont le hash ne correspond plus aux réponses est ignoré.
+
+    Args:
+        path: Chemin du fichier d'état.
+
+    Returns:
+        État (base_sha, head_sha, hunks, quiz, quiz_hash) ou None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"État incrémental illisible, quiz complet : {e}")
+        return None
+
+    quiz = state.get("quiz") or []
+    answers = [q.get("answer") for q in quiz]
+    if not state.get("head_sha") or not quiz or state.get("quiz_hash") != hash_quiz_answers(answers):
+        logger.warning("État incrémental incohérent (hash des réponses), quiz complet")
+        return None
+    state["hunks"] = [tuple(key) for key in state.get("hunks", [])]
+    return state
+
+
+def save_incremental_state(
+    path: str,
+    base_sha: Optional[str],
+    head_sha: str,
+    hunks: List[Any],
+    quiz: List[Dict[str, Any]]
+) -> None:
+    """
+    Enregistre l'état quizzé d'une MR (écriture atomique).
+
+    Args:
+        path: Chemin du fichier d'état.
+        base_sha: Commit de base de la MR (optionnel).
+        head_sha: Dernier commit quizzé.
+        hunks: Clés des hunks couverts.
+        quiz: Questions du quiz, dans l'ordre présenté.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state = {
+        "base_sha": base_sha,
+        "head_sha": head_sha,
+        "hunks": [list(key) for key in hunks],
+        "quiz": quiz,
+        "quiz_hash": hash_quiz_answers([q["answer"] for q in quiz]),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def merge_quizzes(
+    carried: List[Dict[str, Any]],
+    generated: List[Dict[str, Any]],
+    max_questions: int
+) -> List[Dict[str, Any]]:
+    """
+    Combine les questions reprises et les nouvelles questions du delta.
+
+    Les nouvelles questions sont toujours conservées ; les plus anciennes
+    questions reprises sont abandonnées au-delà de max_questions.
+
+    Args:
+        carried: Questions des pushs précédents.
+        generated: Questions générées pour le delta.
+        max_questions: Nombre maximum de questions.
+
+    Returns:
+        Quiz combiné.
+    """
+    room = max(max_questions - len(generated), 0)
+    return (carried[-room:] if room else []) + generated
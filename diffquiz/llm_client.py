@@ -3,15 +3,29 @@ Client pour l'API LLM avec gestion d'erreurs améliorée.
 """
 import json
 import ssl
+import time
+import socket
+import select
+import functools
+import threading
+import http.client
+import urllib.parse
 import urllib.request
 import urllib.error
 import logging
-from typing import Optional, Dict, Any
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Dict, Any, Iterator, List, Tuple
 from diffquiz.config import Settings
-from diffquiz.exceptions import LLMAPIError
+from diffquiz.circuit_breaker import get_circuit_breaker, STATE_CLOSED
+from diffquiz.deadline import Deadline
+from diffquiz.exceptions import LLMAPIError, CircuitOpenError, DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
+# Modèle et tokens des appels LLM, collectés par record_llm_usage()
+_usage_records: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("diffquiz_llm_usage", default=None)
+
 
 def create_ssl_context(settings: Settings) -> ssl.SSLContext:
     """
@@ -51,10 +65,256 @@ def create_ssl_context(settings: Settings) -> ssl.SSLContext:
     return ctx
 
 
+class _TimedConnectionMixin:
+    """Applique un timeout de connexion distinct du timeout de lecture."""
+    
+    def __init__(self, *args, connect_timeout: float, read_timeout: float, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+    
+    def connect(self) -> None:
+        # Le timeout de connexion couvre TCP + poignée de main TLS
+        self.timeout = self.connect_timeout
+        super().connect()
+        self.sock.settimeout(self.read_timeout)
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, http.client.HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, http.client.HTTPSConnection):
+    pass
+
+
+# Connexions pré-ouvertes (TCP + TLS) pendant que git travaille : (classe, hôte) -> (connexion, date)
+_WARM_CONNECTIONS: Dict[Tuple[type, str], Tuple[http.client.HTTPConnection, float]] = {}
+_WARM_LOCK = threading.Lock()
+
+# Au-delà, le serveur a pu fermer la connexion inactive (keep-alive)
+WARM_CONNECTION_MAX_AGE = 30.0
+
+
+def _connection_alive(conn: http.client.HTTPConnection) -> bool:
+    """Une connexion inactive est lisible uniquement si le serveur l'a fermée."""
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable
+
+
+def _take_warm_connection(connection_class: type, host: str) -> Optional[http.client.HTTPConnection]:
+    """Retire du cache la connexion pré-ouverte vers un hôte, si elle est encore utilisable."""
+    with _WARM_LOCK:
+        entry = _WARM_CONNECTIONS.pop((connection_class, host), None)
+    if entry is None:
+        return None
+    conn, opened_at = entry
+    if time.monotonic() - opened_at > WARM_CONNECTION_MAX_AGE or not _connection_alive(conn):
+        conn.close()
+        return None
+    return conn
+
+
+def _open_connection(connection_class: type, host: str, *, connect_timeout: float, read_timeout: float, **kwargs):
+    """Fabrique de connexions des handlers : réutilise la connexion pré-ouverte si possible."""
+    conn = _take_warm_connection(connection_class, host)
+    if conn is not None:
+        logger.debug(f"Connexion pré-ouverte réutilisée vers {host}")
+        conn.read_timeout = read_timeout
+        conn.sock.settimeout(read_timeout)
+        return conn
+    return connection_class(host, connect_timeout=connect_timeout, read_timeout=read_timeout, **kwargs)
+
+
+def warm_up_connection(settings: Settings) -> bool:
+    """
+    Pré-ouvre la connexion (TCP + poignée de main TLS) vers l'API LLM.
+    
+    La connexion est réutilisée par le prochain call_llm_api. Rien n'est fait
+    derrière un proxy, ni quand le disjoncteur est ouvert ; les erreurs ne sont
+    pas bloquantes (l'appel ouvrira simplement sa propre connexion).
+    
+    Args:
+        settings: Configuration de l'application.
+        
+    Returns:
+        True si une connexion a été pré-ouverte.
+    """
+    url = urllib.parse.urlsplit(settings.llm_api_url)
+    if url.scheme not in ("http", "https") or not url.hostname:
+        return False
+    if url.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(url.hostname):
+        return False
+    breaker = get_circuit_breaker(settings)
+    if breaker is not None and breaker.state != STATE_CLOSED:
+        return False
+    
+    timeout = settings.llm_connect_timeout_seconds
+    try:
+        if url.scheme == "https":
+            connection_class = _TimedHTTPSConnection
+            conn = connection_class(url.netloc, connect_timeout=timeout, read_timeout=timeout,
+                                    context=create_ssl_context(settings))
+        else:
+            connection_class = _TimedHTTPConnection
+            conn = connection_class(url.netloc, connect_timeout=timeout, read_timeout=timeout)
+        started = time.monotonic()
+        conn.connect()
+    except (OSError, ssl.SSLError, http.client.HTTPException) as e:
+        logger.debug(f"Pré-connexion à l'API LLM impossible : {e}")
+        return False
+    
+    with _WARM_LOCK:
+        previous = _WARM_CONNECTIONS.pop((connection_class, url.netloc), None)
+        _WARM_CONNECTIONS[(connection_class, url.netloc)] = (conn, time.monotonic())
+    if previous is not None:
+        previous[0].close()
+    logger.info(f"Connexion à l'API LLM pré-ouverte en {time.monotonic() - started:.2f}s")
+    return True
+
+
+def close_warm_connections() -> None:
+    """Ferme les connexions pré-ouvertes non utilisées."""
+    with _WARM_LOCK:
+        entries = list(_WARM_CONNECTIONS.values())
+        _WARM_CONNECTIONS.clear()
+    for conn, _ in entries:
+        conn.close()
+
+
+class _TimedHTTPHandler(urllib.request.HTTPHandler):
+    def __init__(self, connect_timeout: float, read_timeout: float):
+        super().__init__()
+        self._connection_class = functools.partial(
+            _open_connection, _TimedHTTPConnection, connect_timeout=connect_timeout, read_timeout=read_timeout
+        )
+    
+    def http_open(self, req):
+        return self.do_open(self._connection_class, req)
+
+
+class _TimedHTTPSHandler(urllib.request.HTTPSHandler):
+    def __init__(self, context: ssl.SSLContext, connect_timeout: float, read_timeout: float):
+        super().__init__(context=context)
+        self._connection_class = functools.partial(
+            _open_connection, _TimedHTTPSConnection, connect_timeout=connect_timeout, read_timeout=read_timeout
+        )
+    
+    def https_open(self, req):
+        return self.do_open(self._connection_class, req, context=self._context)
+
+
+def _response_socket(response) -> Optional[socket.socket]:
+    """Socket d'une réponse http.client (None si la réponse n'en expose pas)."""
+    return getattr(getattr(getattr(response, 'fp', None), 'raw', None), '_sock', None)
+
+
+def _read_response(response, deadline: Optional[Deadline], read_timeout: Optional[float] = None) -> bytes:
+    """
+    Lit le corps de la réponse par blocs en respectant le budget global.
+    
+    Le timeout du socket est ramené au temps restant avant chaque bloc : un
+    serveur qui s'interrompt en cours de réponse ne dépasse pas le budget.
+    
+    Args:
+        response: Réponse HTTP ouverte.
+        deadline: Budget de temps global du job (optionnel).
+        read_timeout: Timeout de lecture de l'appel (plafond du timeout par bloc).
+        
+    Returns:
+        Corps de la réponse.
+        
+    Raises:
+        DeadlineExceededError: Si le budget est épuisé pendant la lecture.
+    """
+    sock = _response_socket(response) if deadline is not None else None
+    # read1 : une seule lecture du socket par bloc, le timeout par bloc s'applique
+    read = getattr(response, 'read1', response.read)
+    chunks = []
+    while True:
+        bounded = False
+        if deadline is not None:
+            deadline.check("lecture de la réponse LLM")
+            remaining = deadline.remaining()
+            if sock is not None and remaining is not None:
+                bounded = read_timeout is None or remaining < read_timeout
+                sock.settimeout(remaining if bounded else read_timeout)
+        try:
+            chunk = read(65536)
+        except TimeoutError as e:
+            if bounded:
+                raise DeadlineExceededError("Budget de temps épuisé pendant la lecture de la réponse LLM") from e
+            raise
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b''.join(chunks)
+
+
+@contextmanager
+def record_llm_usage() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Collecte le modèle et les tokens de chaque appel LLM effectué dans le bloc.
+    
+    La collecte est propre au contexte courant (thread ou tâche) : des
+    générations concurrentes ne mélangent pas leurs consommations.
+    
+    Yields:
+        Liste des appels : {"model", "prompt_tokens", "completion_tokens"}.
+    """
+    records: List[Dict[str, Any]] = []
+    token = _usage_records.set(records)
+    try:
+        yield records
+    finally:
+        _usage_records.reset(token)
+
+
+def summarize_usage(records: List[Dict[str, Any]]) -> Tuple[Optional[str], Dict[str, int]]:
+    """
+    Agrège les appels collectés par record_llm_usage().
+    
+    Args:
+        records: Appels LLM.
+        
+    Returns:
+        Tuple (modèle du dernier appel ou None, totaux : calls, prompt_tokens,
+        completion_tokens, total_tokens).
+    """
+    prompt_tokens = sum(record["prompt_tokens"] for record in records)
+    completion_tokens = sum(record["completion_tokens"] for record in records)
+    usage = {
+        "calls": len(records),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+    return (records[-1]["model"] if records else None), usage
+
+
+def _record_usage(result: Dict[str, Any], model: str) -> None:
+    """Enregistre le modèle et les tokens d'une réponse (formats OpenAI et Ollama)."""
+    records = _usage_records.get()
+    if records is None:
+        return
+    usage = result.get('usage') or {}
+    records.append({
+        "model": result.get('model') or model,
+        "prompt_tokens": int(usage.get('prompt_tokens', result.get('prompt_eval_count')) or 0),
+        "completion_tokens": int(usage.get('completion_tokens', result.get('eval_count')) or 0),
+    })
+
+
 def call_llm_api(
     prompt_system: str,
     prompt_user: str,
-    settings: Settings
+    settings: Settings,
+    model: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    seed: Optional[int] = None
 ) -> Optional[str]:
     """
     Appelle l'API LLM pour générer du contenu.
@@ -63,13 +323,34 @@ def call_llm_api(
         prompt_system: Prompt système.
         prompt_user: Prompt utilisateur.
         settings: Configuration de l'application.
+        model: Modèle à utiliser (par défaut settings.llm_model).
+        deadline: Budget de temps global du job (optionnel).
+        seed: Graine d'échantillonnage (mode déterministe), ignorée par les API qui ne la gèrent pas.
         
     Returns:
         Contenu généré ou None en cas d'erreur.
         
     Raises:
+        CircuitOpenError: Si le disjoncteur est ouvert (API détectée hors service).
+        DeadlineExceededError: Si le budget global est épuisé.
         LLMAPIError: En cas d'erreur API.
     """
+    # Timeouts : lecture bornée par le budget global, connexion bornée par la lecture
+    read_timeout = settings.llm_timeout_seconds
+    if deadline is not None:
+        read_timeout = deadline.timeout(settings.llm_timeout_seconds, "appel LLM")
+    connect_timeout = min(settings.llm_connect_timeout_seconds, read_timeout)
+    truncated_by_deadline = read_timeout < settings.llm_timeout_seconds
+    
+    # Échouer immédiatement si l'API est connue comme hors service
+    breaker = get_circuit_breaker(settings)
+    if breaker is not None and not breaker.allow_request():
+        error_msg = f"Disjoncteur ouvert : l'API LLM {settings.llm_api_url} est considérée hors service"
+        logger.warning(error_msg)
+        raise CircuitOpenError(error_msg)
+    
+    model = model or settings.llm_model
+    
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {settings.llm_api_key}"
@@ -79,7 +360,7 @@ def call_llm_api(
     is_openai = "openai.com" in settings.llm_api_url.lower()
     
     payload: Dict[str, Any] = {
-        "model": settings.llm_model,
+        "model": model,
         "stream": False,
         "messages": [
             {"role": "system", "content": prompt_system},
@@ -94,11 +375,18 @@ def call_llm_api(
     else:
         payload["options"] = {"num_predict": 4096}
     
+    # Mode déterministe : échantillonnage glouton et graine fixe
+    if seed is not None:
+        payload["temperature"] = 0
+        payload["seed"] = seed
+        if not is_openai:
+            payload["options"].update(seed=seed, temperature=0)
+    
     # Créer le contexte SSL
     ctx = create_ssl_context(settings)
     
     try:
-        logger.info(f"Appel LLM vers : {settings.llm_api_url} (Modèle: {settings.llm_model})")
+        logger.info(f"Appel LLM vers : {settings.llm_api_url} (Modèle: {model})")
         
         req = urllib.request.Request(
             settings.llm_api_url,
@@ -106,35 +394,60 @@ def call_llm_api(
             headers=headers
         )
         
-        with urllib.request.urlopen(
-            req,
-            context=ctx,
-            timeout=settings.llm_timeout_seconds
-        ) as response:
-            response_text = response.read().decode('utf-8')
-            result = json.loads(response_text)
-            
-            # Extraction du contenu selon le format
-            content = ""
-            if 'choices' in result and len(result['choices']) > 0:
-                content = result['choices'][0]['message']['content']
-            elif 'message' in result:
-                content = result['message']['content']
-            else:
-                error_msg = f"Format de réponse API inconnu : {list(result.keys())}"
-                logger.error(error_msg)
-                raise LLMAPIError(error_msg)
+        opener = urllib.request.build_opener(
+            _TimedHTTPHandler(connect_timeout, read_timeout),
+            _TimedHTTPSHandler(ctx, connect_timeout, read_timeout)
+        )
+        
+        with opener.open(req, timeout=read_timeout) as response:
+            response_text = _read_response(response, deadline, read_timeout).decode('utf-8')
+            try:
+                result = json.loads(response_text)
+                
+                # Extraction du contenu selon le format
+                content = None
+                if 'choices' in result and len(result['choices']) > 0:
+                    content = result['choices'][0]['message']['content']
+                elif 'message' in result:
+                    content = result['message']['content']
+                if not isinstance(content, str):
+                    error_msg = f"Format de réponse API inconnu : {list(result.keys())}"
+                    logger.error(error_msg)
+                    raise LLMAPIError(error_msg)
+            except Exception:
+                # Réponse 200 inexploitable (passerelle en erreur, corps tronqué...) : échec pour le disjoncteur
+                if breaker is not None:
+                    breaker.record_failure()
+                raise
+            # Succès seulement une fois le contenu extrait
+            if breaker is not None:
+                breaker.record_success()
             
+            _record_usage(result, model)
             logger.info(f"Réponse LLM reçue : {len(content)} caractères")
             return content
             
     except urllib.error.HTTPError as e:
         error_detail = e.read().decode('utf-8', errors='ignore')
         error_msg = f"Erreur HTTP {e.code}: {e.reason}"
+        if breaker is not None and e.code >= 500:
+            breaker.record_failure()
         logger.error(f"{error_msg} - Détail: {error_detail[:200]}")
         raise LLMAPIError(error_msg) from e
     except urllib.error.URLError as e:
         error_msg = f"Erreur de connexion (Réseau/SSL) : {e.reason}"
+        if breaker is not None:
+            breaker.record_failure()
+        logger.error(error_msg)
+        raise LLMAPIError(error_msg) from e
+    except DeadlineExceededError:
+        raise
+    except (TimeoutError, ConnectionError) as e:
+        if truncated_by_deadline and isinstance(e, TimeoutError):
+            raise DeadlineExceededError("Budget de temps épuisé pendant l'appel LLM") from e
+        error_msg = f"Timeout ou connexion interrompue lors de l'appel LLM : {e}"
+        if breaker is not None:
+            breaker.record_failure()
         logger.error(error_msg)
         raise LLMAPIError(error_msg) from e
     except json.JSONDecodeError as e:
@@ -145,5 +458,9 @@ def call_llm_api(
         error_msg = f"Erreur inattendue lors de l'appel LLM : {e}"
         logger.error(error_msg, exc_info=True)
         raise LLMAPIError(error_msg) from e
+    finally:
+        # Sonde terminée sans succès ni échec enregistré : libérée pour le job suivant
+        if breaker is not None:
+            breaker.release_probe()
 
 
@@ -0,0 +1,74 @@
+"""
+Cascade de modèles : un modèle rapide par défaut, escalade vers le modèle principal.
+
+Le modèle rapide (`llm_fast_model`) traite les diffs courts et sans risque. Le
+modèle principal (`llm_model`) est utilisé directement pour les diffs volumineux
+ou sensibles, et en escalade quand la réponse du modèle rapide est invalide.
+"""
+import re
+import logging
+from typing import List, Optional
+from diffquiz.config import Settings
+from diffquiz.git_utils import count_changed_lines
+
+logger = logging.getLogger(__name__)
+
+# Constructions sensibles pour la sécurité (cf. risques listés dans le prompt)
+SENSITIVE_PATTERN = re.compile(
+    r"rm\s+-[rf]{1,2}\b|del\s+/f|\bDROP\s+(TABLE|DATABASE)\b|\bDELETE\s+FROM\b|\bTRUNCATE\b"
+    r"|\beval\s*\(|\bexec\s*\(|os\.system|subprocess\.|shell\s*=\s*True|Runtime\.getRuntime\(\)\.exec"
+    r"|ProcessBuilder|ObjectInputStream|pickle\.loads?|yaml\.load\(|innerHTML|dangerouslySetInnerHTML"
+    r"|\.\./|verify\s*=\s*False"
+    # Identifiants sensibles en mots entiers (pas tokenizer, tokens_used, secret_hash...)
+    r"|\b(password|passwd|api[_-]?key|secret[_-]?key|client[_-]?secret|access[_-]?token|auth[_-]?token"
+    r"|private[_-]?key)\b",
+    re.IGNORECASE
+)
+
+
+def is_sensitive_diff(diff_text: Optional[str]) -> bool:
+    """
+    Détecte la présence de constructions sensibles dans les lignes modifiées.
+
+    Args:
+        diff_text: Texte du diff.
+
+    Returns:
+        True si au moins une ligne ajoutée/supprimée est sensible.
+    """
+    if not diff_text:
+        return False
+
+    for line in diff_text.splitlines():
+        if line.startswith('+++') or line.startswith('---'):
+            continue
+        if (line.startswith('+') or line.startswith('-')) and SENSITIVE_PATTERN.search(line):
+            return True
+    return False
+
+
+def select_models(diff_text: Optional[str], settings: Settings) -> List[str]:
+    """
+    Détermine l'ordre des modèles à essayer pour un diff.
+
+    Args:
+        diff_text: Texte du diff.
+        settings: Configuration de l'application.
+
+    Returns:
+        Liste ordonnée des modèles (le dernier est le modèle principal).
+    """
+    fast_model = settings.llm_fast_model
+    if not fast_model or fast_model == settings.llm_model:
+        return [settings.llm_model]
+
+    changes = count_changed_lines(diff_text)
+    if changes > settings.cascade_max_changed_lines:
+        logger.info(f"Diff volumineux ({changes} lignes) : modèle principal {settings.llm_model}")
+        return [settings.llm_model]
+
+    if is_sensitive_diff(diff_text):
+        logger.info(f"Diff sensible détecté : modèle principal {settings.llm_model}")
+        return [settings.llm_model]
+
+    return [fast_model, settings.llm_model]
@@ -0,0 +1,140 @@
+"""
+Modèles typés des questions et des quiz (cœur de validation compilé de pydantic v2).
+
+Une réponse du LLM est analysée une seule fois : les libellés "A) " des options
+sont retirés par parse_quiz, avant la validation (dataclasses.replace revalide
+une question, sans toucher à ses options), puis le mélange, le hash et le rendu HTML
+travaillent sur les textes et l'index de la bonne réponse. Les dictionnaires
+restent le format d'échange (JSON, index locaux, API).
+"""
+import re
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple, Union
+from pydantic import Field, TypeAdapter, field_validator, model_validator
+from pydantic import ValidationError as PydanticValidationError
+from pydantic.dataclasses import dataclass
+from diffquiz.exceptions import ValidationError
+
+OPTION_LABELS = ('A', 'B', 'C', 'D')
+
+# Libellé en tête d'option ("A) ", "b) ")
+_LABEL_PREFIX = re.compile(r'^\s*[A-Da-d]\)\s*')
+
+
+@dataclass(slots=True, frozen=True)
+class Question:
+    """
+    Question à choix multiple.
+
+    Args:
+        question: Énoncé.
+        options: Textes des options, sans libellé (2 à 4).
+        answer: Lettre de la bonne réponse.
+        explanation: Explication affichée après la réponse.
+        file: Fichier du diff concerné (optionnel).
+    """
+    question: str
+    options: Annotated[Tuple[str, ...], Field(min_length=2, max_length=len(OPTION_LABELS))]
+    answer: str
+    explanation: str
+    file: Optional[str] = None
+
+    @field_validator('answer', mode='before')
+    @classmethod
+    def _normalize_answer(cls, answer: Any) -> Any:
+        """Réponse en majuscule, sans espaces."""
+        return answer.strip().upper() if isinstance(answer, str) else answer
+
+    @model_validator(mode='after')
+    def _check_answer(self) -> "Question":
+        """La réponse désigne une des options."""
+        labels = OPTION_LABELS[:len(self.options)]
+        if self.answer not in labels:
+            raise ValueError(f"réponse '{self.answer}' invalide. Attendu: {', '.join(labels)}")
+        return self
+
+    @property
+    def answer_index(self) -> int:
+        """Index de la bonne réponse dans options."""
+        return OPTION_LABELS.index(self.answer)
+
+    @property
+    def labeled_options(self) -> List[str]:
+        """Options préfixées de leur libellé ("A) texte")."""
+        return [f"{label}) {text}" for label, text in zip(OPTION_LABELS, self.options)]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dictionnaire au format d'échange (options libellées)."""
+        data: Dict[str, Any] = {
+            "question": self.question,
+            "options": self.labeled_options,
+            "answer": self.answer,
+            "explanation": self.explanation,
+        }
+        if self.file is not None:
+            data["file"] = self.file
+        return data
+
+
+Quiz = List[Question]
+
+QUIZ_ADAPTER: TypeAdapter = TypeAdapter(Quiz)
+
+
+def _format_errors(error: PydanticValidationError) -> str:
+    """Erreurs pydantic par question et par champ."""
+    messages = []
+    for detail in error.errors():
+        location = list(detail["loc"])
+        prefix = f"Question {location.pop(0) + 1}" if location and isinstance(location[0], int) else "Quiz"
+        field = ".".join(str(part) for part in location)
+        message = detail["msg"].removeprefix("Value error, ")
+        messages.append(f"{prefix}, champ '{field}' : {message}" if field else f"{prefix} : {message}")
+    return "; ".join(messages)
+
+
+def _strip_labels(question: Any) -> Any:
+    """Retire les libellés "X) " des options d'une question brute (une seule fois, à l'analyse)."""
+    options = question.get("options") if isinstance(question, dict) else None
+    if not isinstance(options, (list, tuple)):
+        return question
+    return dict(question, options=[
+        _LABEL_PREFIX.sub('', opt, count=1).strip() if isinstance(opt, str) else opt for opt in options
+    ])
+
+
+def parse_quiz(quiz_data: Union[Sequence[Dict[str, Any]], Sequence[Question]]) -> Quiz:
+    """
+    Valide et convertit un quiz en questions typées.
+
+    Args:
+        quiz_data: Questions (dictionnaires ou questions déjà typées).
+
+    Returns:
+        Liste de questions.
+
+    Raises:
+        ValidationError: Si le quiz est vide ou invalide (toutes les erreurs, par champ).
+    """
+    if not isinstance(quiz_data, (list, tuple)):
+        raise ValidationError("Le quiz doit être une liste de questions")
+    if len(quiz_data) == 0:
+        raise ValidationError("Le quiz ne peut pas être vide")
+    if all(isinstance(q, Question) for q in quiz_data):
+        return list(quiz_data)
+    try:
+        return QUIZ_ADAPTER.validate_python([_strip_labels(q) for q in quiz_data])
+    except PydanticValidationError as e:
+        raise ValidationError(_format_errors(e)) from e
+
+
+def dump_quiz(questions: Quiz) -> List[Dict[str, Any]]:
+    """
+    Convertit des questions typées au format d'échange.
+
+    Args:
+        questions: Questions du quiz.
+
+    Returns:
+        Liste de dictionnaires.
+    """
+    return [q.to_dict() for q in questions]
@@ -0,0 +1,138 @@
+"""
+Mode profilage : temps CPU (cProfile) et mémoire (tracemalloc) par étape.
+
+Les rapports sont écrits à côté de `quiz_report.html` pour être publiés comme
+artifacts CI :
+- `quiz_profile.pstats` : statistiques cProfile brutes (lisibles avec pstats/snakeviz) ;
+- `quiz_profile.txt` : résumé lisible (fonctions les plus coûteuses, pic mémoire
+  et principaux sites d'allocation par étape).
+
+cProfile ne mesure que le thread principal : le préchauffage de la connexion,
+les explications générées en parallèle et les écritures en tâche de fond
+n'apparaissent pas dans les statistiques.
+"""
+
+# Rappel ajouté au rapport texte
+THREADS_NOTE = (
+    "cProfile ne couvre que le thread principal : préchauffage de la connexion, "
+    "explications (deuxième phase) et écritures en tâche de fond non inclus."
+)
+import io
+import os
+import time
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PSTATS_FILENAME = "quiz_profile.pstats"
+REPORT_FILENAME = "quiz_profile.txt"
+
+
+class RunProfiler:
+    """
+    Profileur d'exécution d'un job DiffQuiz.
+
+    Args:
+        output_dir: Répertoire des rapports.
+        top_n: Nombre de lignes conservées par classement.
+    """
+
+    def __init__(self, output_dir: str = ".", top_n: int = 15):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.stages: List[Dict[str, Any]] = []
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        """Démarre cProfile et tracemalloc."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Arrête le profilage."""
+        self._profile.disable()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Mesure la durée, le pic mémoire et les allocations d'une étape.
+
+        Args:
+            name: Nom de l'étape (ex : diff, generate, parse, render).
+        """
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            top_sites = after.compare_to(before, 'lineno')[:self.top_n]
+            self.stages.append({
+                "name": name,
+                "duration_seconds": duration,
+                "peak_bytes": peak,
+                "top_allocations": [str(stat) for stat in top_sites],
+            })
+            logger.info(f"⏱️ Étape '{name}' : {duration:.3f}s, pic mémoire {peak / 1024:.1f} Ko")
+
+    def format_report(self) -> str:
+        """Construit le résumé texte du profilage."""
+        lines = ["=== DiffQuiz - Profilage ===", ""]
+
+        for stage in self.stages:
+            lines.append(
+                f"[{stage['name']}] durée {stage['duration_seconds']:.3f}s - "
+                f"pic mémoire {stage['peak_bytes'] / 1024:.1f} Ko"
+            )
+            lines.extend(f"    {site}" for site in stage["top_allocations"])
+            lines.append("")
+
+        stream = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n * 2)
+        lines.append("=== cProfile (tri par temps cumulé) ===")
+        lines.append(THREADS_NOTE)
+        lines.append(stream.getvalue())
+        return "\n".join(lines)
+
+    def write_reports(self) -> None:
+        """Écrit les rapports pstats et texte dans le répertoire de sortie."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        pstats_path = os.path.join(self.output_dir, PSTATS_FILENAME)
+        report_path = os.path.join(self.output_dir, REPORT_FILENAME)
+
+        self._profile.dump_stats(pstats_path)
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(self.format_report())
+        logger.info(f"✅ Rapports de profilage sauvegardés : {pstats_path}, {report_path}")
+
+
+def profile_stage(profiler: Optional[RunProfiler], name: str) -> ContextManager[None]:
+    """
+    Retourne le contexte de mesure d'une étape, ou un contexte neutre sans profileur.
+
+    Args:
+        profiler: Profileur actif ou None.
+        name: Nom de l'étape.
+    """
+    if profiler is None:
+        return nullcontext()
+    return profiler.stage(name)
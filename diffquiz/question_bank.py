@@ -0,0 +1,270 @@
+"""
+Banque locale de questions validées, indexée par hunk.
+
+Chaque question générée est rattachée aux hunks qu'elle couvre, identifiés par
+(dépôt, chemin du fichier, empreinte du hunk, modèle). Une exécution ultérieure
+réutilise les questions des hunks inchangés ou re-touchés à l'identique et ne
+demande au LLM que des questions pour les hunks restants.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+from diffquiz.config import Settings
+
+logger = logging.getLogger(__name__)
+
+BANK_FILENAME = "question_bank.sqlite"
+
+# Clé d'un hunk : (chemin du fichier, empreinte)
+HunkKey = Tuple[str, str]
+
+
+def hunk_fingerprint(hunk: Dict[str, Any]) -> str:
+    """
+    Calcule l'empreinte d'un hunk, indépendante des numéros de ligne et des espaces.
+
+    Args:
+        hunk: Hunk au format de parse_diff.
+
+    Returns:
+        Empreinte hexadécimale (SHA-256).
+    """
+    digest = hashlib.sha256()
+    for line in hunk["lines"]:
+        if line.startswith('+') or line.startswith('-'):
+            digest.update((line[0] + ' '.join(line[1:].split()) + '\n').encode('utf-8'))
+    return digest.hexdigest()
+
+
+def diff_hunk_keys(files: List[Dict[str, Any]]) -> List[HunkKey]:
+    """
+    Calcule les clés des hunks d'un diff analysé.
+
+    Args:
+        files: Fichiers au format de parse_diff.
+
+    Returns:
+        Clés (chemin, empreinte) dans l'ordre du diff, sans doublon.
+    """
+    keys: List[HunkKey] = []
+    for file in files:
+        for hunk in file["hunks"]:
+            key = (file["path"], hunk_fingerprint(hunk))
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+def attribute_question(question: Dict[str, Any], keys: List[HunkKey]) -> List[HunkKey]:
+    """
+    Détermine les hunks couverts par une question à partir de son champ "file".
+
+    Args:
+        question: Question générée.
+        keys: Clés des hunks du diff envoyé au LLM.
+
+    Returns:
+        Hunks du fichier cité, ou tous les hunks si le fichier est absent ou inconnu.
+    """
+    file_path = str(question.get("file") or "").strip()
+    if file_path.startswith('a/') or file_path.startswith('b/'):
+        file_path = file_path[2:]
+    matched = [key for key in keys if file_path and (key[0] == file_path or key[0].endswith('/' + file_path))]
+    return matched or list(keys)
+
+
+def restrict_to_hunks(files: List[Dict[str, Any]], keys: Iterable[HunkKey]) -> List[Dict[str, Any]]:
+    """
+    Ne conserve que les hunks d'un diff analysé correspondant à des clés données.
+
+    Args:
+        files: Fichiers au format de parse_diff.
+        keys: Clés des hunks à conserver.
+
+    Returns:
+        Copie des fichiers, avec les seuls hunks retenus (voir format_diff).
+    """
+    wanted = set(keys)
+    return [
+        dict(file, hunks=[hunk for hunk in file["hunks"] if (file["path"], hunk_fingerprint(hunk)) in wanted])
+        for file in files
+    ]
+
+
+class QuestionBank:
+    """
+    Banque de questions persistante (SQLite).
+
+    Args:
+        path: Chemin du fichier SQLite.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS questions (
+                id INTEGER PRIMARY KEY,
+                repository TEXT NOT NULL,
+                model TEXT NOT NULL,
+                question TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS question_hunks (
+                repository TEXT NOT NULL,
+                file_path TEXT NOT NULL,
+                hunk_fingerprint TEXT NOT NULL,
+                model TEXT NOT NULL,
+                question_id INTEGER NOT NULL,
+                PRIMARY KEY (repository, file_path, hunk_fingerprint, model, question_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS question_hunks_by_question ON question_hunks (question_id);
+        """)
+
+    def __enter__(self) -> "QuestionBank":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    def store(self, repository: str, model: str, keys: List[HunkKey], quiz: List[Dict[str, Any]]) -> int:
+        """
+        Enregistre des questions validées, rattachées aux hunks qu'elles couvrent.
+
+        Args:
+            repository: Identifiant du dépôt.
+            model: Modèle ayant généré les questions.
+            keys: Clés des hunks du diff envoyé au LLM.
+            quiz: Questions générées.
+
+        Returns:
+            Nombre de questions enregistrées.
+        """
+        if not keys:
+            return 0
+        now = time.time()
+        with self._conn:
+            for question in quiz:
+                cursor = self._conn.execute(
+                    "INSERT INTO questions (repository, model, question, created_at) VALUES (?, ?, ?, ?)",
+                    (repository, model, json.dumps(question, ensure_ascii=False), now)
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO question_hunks "
+                    "(repository, file_path, hunk_fingerprint, model, question_id) VALUES (?, ?, ?, ?, ?)",
+                    [(repository, path, fingerprint, model, cursor.lastrowid)
+                     for path, fingerprint in attribute_question(question, keys)]
+                )
+        return len(quiz)
+
+    def lookup(self, repository: str, model: str, keys: Iterable[HunkKey]) -> List[Tuple[Dict[str, Any], Set[HunkKey]]]:
+        """
+        Cherche les questions réutilisables pour un ensemble de hunks.
+
+        Une question n'est réutilisable que si tous les hunks auxquels elle est
+        rattachée sont présents : elle ne porte alors que sur du code encore modifié.
+
+        Args:
+            repository: Identifiant du dépôt.
+            model: Modèle attendu.
+            keys: Clés des hunks du diff courant.
+
+        Returns:
+            Liste de tuples (question, hunks couverts), questions les plus récentes d'abord.
+        """
+        wanted = set(keys)
+        candidates: Set[int] = set()
+        for path, fingerprint in wanted:
+            rows = self._conn.execute(
+                "SELECT question_id FROM question_hunks "
+                "WHERE repository = ? AND file_path = ? AND hunk_fingerprint = ? AND model = ?",
+                (repository, path, fingerprint, model)
+            )
+            candidates.update(row[0] for row in rows)
+
+        results = []
+        for question_id in sorted(candidates, reverse=True):
+            covered = {
+                (row[0], row[1]) for row in self._conn.execute(
+                    "SELECT file_path, hunk_fingerprint FROM question_hunks WHERE question_id = ?",
+                    (question_id,)
+                )
+            }
+            if not covered <= wanted:
+                continue
+            question_json = self._conn.execute(
+                "SELECT question FROM questions WHERE id = ?", (question_id,)
+            ).fetchone()[0]
+            results.append((json.loads(question_json), covered))
+        return results
+
+
+def select_bank_questions(
+    candidates: List[Tuple[Dict[str, Any], Set[HunkKey]]],
+    keys: List[HunkKey],
+    count: int
+) -> Tuple[List[Dict[str, Any]], List[HunkKey]]:
+    """
+    Choisit les questions de la banque à réutiliser.
+
+    Les questions couvrant des hunks encore non couverts sont prises en premier.
+    S'il reste des hunks sans question, une place est gardée pour le LLM.
+
+    Args:
+        candidates: Résultat de QuestionBank.lookup.
+        keys: Clés des hunks du diff courant.
+        count: Nombre total de questions attendu.
+
+    Returns:
+        Tuple (questions retenues, hunks restant à couvrir, dans l'ordre du diff).
+    """
+    remaining = list(candidates)
+    selected: List[Tuple[Dict[str, Any], Set[HunkKey]]] = []
+    covered: Set[HunkKey] = set()
+
+    while remaining and len(selected) < count:
+        best = max(range(len(remaining)), key=lambda i: len(remaining[i][1] - covered))
+        selected.append(remaining.pop(best))
+        covered |= selected[-1][1]
+
+    if len(selected) >= count and any(key not in covered for key in keys):
+        # Garder une place pour une question sur les hunks restants
+        selected.pop()
+        covered = set().union(*(question_keys for _, question_keys in selected))
+
+    uncovered = [key for key in keys if key not in covered]
+    return [question for question, _ in selected], uncovered
+
+
+def open_question_bank(settings: Settings) -> Optional[QuestionBank]:
+    """
+    Ouvre la banque de questions configurée.
+
+    Args:
+        settings: Configuration de l'application.
+
+    Returns:
+        Banque ouverte, ou None si aucun répertoire de stockage n'est configuré
+        ou s'il ne peut pas être créé.
+    """
+    if not settings.quiz_store_dir:
+        return None
+    try:
+        return QuestionBank(os.path.join(settings.quiz_store_dir, BANK_FILENAME))
+    except OSError as e:
+        logger.warning(f"Banque de questions ignorée, répertoire inutilisable ({settings.quiz_store_dir}) : {e}")
+        return None
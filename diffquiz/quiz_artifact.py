@@ -0,0 +1,210 @@
+"""
+Artefact quiz.json : résultat structuré d'une génération, écrit avec le rapport HTML.
+
+Les tableaux de bord et les bots lisent le quiz, le modèle, les durées et la
+consommation de tokens sans analyser le HTML. L'artefact est publié (artefact
+CI, historique, notes git) : le hash attendu, qui débloque le pipeline, n'y
+figure pas et reste dans le rapport dotenv quiz.env. Un rapport
+peut être re-rendu depuis l'artefact sans nouvel appel au LLM
+(generate_quiz.py --from-json quiz.json). Le schéma documenté est donné par
+quiz_json_schema().
+
+quiz.json.gz (QUIZ_JSON_COMPRESSED) est une variante compacte, compressée avec gzip.
+Avec QUIZ_POOL_FACTOR, l'artefact porte aussi le pool de questions : d'autres
+variantes du quiz en sont tirées localement (generate_quiz.py --draw-from-pool).
+"""
+import os
+import gzip
+import random
+import logging
+import dataclasses
+from datetime import datetime, timezone
+from typing import Annotated, Any, Dict, List, Optional
+from pydantic import Field, TypeAdapter
+from pydantic import ValidationError as PydanticValidationError
+from pydantic.dataclasses import dataclass
+from diffquiz.exceptions import ValidationError
+from diffquiz.html_generator import write_html
+from diffquiz.models import Question, parse_quiz, dump_quiz
+from diffquiz.quiz_generator import draw_quiz
+from diffquiz.security import hash_quiz_answers, quiz_variant
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 2
+QUIZ_JSON_FILENAME = "quiz.json"
+QUIZ_JSON_GZ_FILENAME = "quiz.json.gz"
+
+
+@dataclass(frozen=True)
+class QuizArtifact:
+    """
+    Contenu de quiz.json (version 2 du schéma, sans le hash attendu ; les
+    champs inconnus des artefacts de version 1 sont ignorés à la lecture).
+
+    Args:
+        status: ok, skip ou pass.
+        questions: Questions (options sans libellé, réponse en lettre).
+        pool: Pool de questions validées dont le quiz est tiré (vide sans suréchantillonnage).
+        generated_at: Date de génération (UTC).
+        commit_url: URL du commit.
+        repository: Identifiant du dépôt.
+        source: Origine des questions (llm, similar, bank, mixed).
+        model: Modèle du dernier appel LLM.
+        usage: Consommation du LLM (calls, prompt_tokens, completion_tokens, total_tokens).
+        timings: Durée de chaque étape en secondes.
+        error: Raison du mode PASS.
+        diff_hash: Empreinte SHA-256 du diff quizzé (quiz pré-générés dans les notes git).
+        schema_version: Version du schéma.
+    """
+    status: Annotated[str, Field(description="Statut : ok, skip (aucun changement significatif) ou pass (échec, le quiz ne bloque pas)")]
+    questions: Annotated[List[Question], Field(default_factory=list, description="Questions du quiz : options sans libellé, réponse en lettre (A-D)")]
+    pool: Annotated[List[Question], Field(default_factory=list, description="Pool de questions validées dont le quiz est tiré (QUIZ_POOL_FACTOR), vide sinon")]
+    generated_at: Annotated[datetime, Field(default_factory=lambda: datetime.now(timezone.utc), description="Date de génération (ISO 8601, UTC)")]
+    commit_url: Annotated[Optional[str], Field(default=None, description="URL du commit quizzé")]
+    repository: Annotated[Optional[str], Field(default=None, description="Identifiant du dépôt (ex : groupe/projet)")]
+    source: Annotated[Optional[str], Field(default=None, description="Origine des questions : llm, similar, bank ou mixed")]
+    model: Annotated[Optional[str], Field(default=None, description="Modèle LLM ayant produit les questions (None si aucun appel)")]
+    usage: Annotated[Dict[str, int], Field(default_factory=dict, description="Consommation du LLM : calls, prompt_tokens, completion_tokens, total_tokens")]
+    timings: Annotated[Dict[str, float], Field(default_factory=dict, description="Durée de chaque étape en secondes")]
+    error: Annotated[Optional[str], Field(default=None, description="Raison du mode PASS")]
+    diff_hash: Annotated[Optional[str], Field(default=None, description="Empreinte SHA-256 du diff quizzé (quiz pré-générés dans les notes git)")]
+    schema_version: Annotated[int, Field(default=SCHEMA_VERSION, description="Version du schéma de quiz.json")]
+
+
+ARTIFACT_ADAPTER: TypeAdapter = TypeAdapter(QuizArtifact)
+
+
+def quiz_json_schema() -> Dict[str, Any]:
+    """
+    Schéma JSON documenté de quiz.json.
+
+    Returns:
+        Schéma JSON (draft 2020-12) de QuizArtifact.
+    """
+    return ARTIFACT_ADAPTER.json_schema(mode="serialization")
+
+
+def dump_artifact(artifact: QuizArtifact, compact: bool = False) -> bytes:
+    """
+    Sérialise un artefact.
+
+    Args:
+        artifact: Artefact.
+        compact: Sans indentation (variante compressée).
+
+    Returns:
+        JSON encodé en UTF-8.
+    """
+    return ARTIFACT_ADAPTER.dump_json(artifact, indent=None if compact else 2, exclude_none=compact)
+
+
+def write_artifact(artifact: QuizArtifact, directory: str = ".", compressed: bool = False) -> List[str]:
+    """
+    Écrit quiz.json (et quiz.json.gz si demandé).
+
+    Args:
+        artifact: Artefact.
+        directory: Répertoire de sortie.
+        compressed: Écrire aussi la variante compacte compressée.
+
+    Returns:
+        Chemins écrits.
+    """
+    paths = [os.path.join(directory, QUIZ_JSON_FILENAME)]
+    with open(paths[0], "wb") as f:
+        f.write(dump_artifact(artifact))
+    if compressed:
+        paths.append(os.path.join(directory, QUIZ_JSON_GZ_FILENAME))
+        with open(paths[1], "wb") as f:
+            f.write(gzip.compress(dump_artifact(artifact, compact=True), mtime=0))
+    return paths
+
+
+def load_artifact(path: str) -> QuizArtifact:
+    """
+    Charge un artefact quiz.json ou quiz.json.gz.
+
+    Args:
+        path: Chemin du fichier.
+
+    Returns:
+        Artefact validé.
+
+    Raises:
+        ValidationError: Si le contenu ne respecte pas le schéma.
+        OSError: Si le fichier est illisible.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        data = f.read()
+    try:
+        return ARTIFACT_ADAPTER.validate_json(data)
+    except PydanticValidationError as e:
+        raise ValidationError(f"{path} invalide : {e.error_count()} erreur(s) : {e.errors()[0]['msg']}") from e
+
+
+def find_artifact(directory: str) -> Optional[str]:
+    """
+    Cherche l'artefact d'un répertoire (quiz.json, sinon quiz.json.gz).
+
+    Args:
+        directory: Répertoire.
+
+    Returns:
+        Chemin trouvé ou None.
+    """
+    for filename in (QUIZ_JSON_FILENAME, QUIZ_JSON_GZ_FILENAME):
+        path = os.path.join(directory, filename)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def render_artifact(artifact: QuizArtifact, output: str, offline: bool = False) -> str:
+    """
+    Re-rend le rapport HTML d'un artefact, sans appel au LLM.
+
+    Args:
+        artifact: Artefact chargé (voir load_artifact).
+        output: Fichier HTML à écrire.
+        offline: Rapport autonome (styles intégrés).
+
+    Returns:
+        Hash des bonnes réponses, recalculé depuis les questions (lié à la variante
+        si le quiz est tiré d'un pool).
+
+    Raises:
+        ValidationError: Si l'artefact ne contient pas de quiz.
+    """
+    questions = parse_quiz(artifact.questions)
+    answers = [q.answer for q in questions]
+    variant = quiz_variant([q.question for q in questions]) if artifact.pool else ""
+    write_html(output, questions, answers, artifact.commit_url, offline, variant)
+    return hash_quiz_answers(answers, variant)
+
+
+def draw_from_pool(artifact: QuizArtifact, rng: Optional[random.Random] = None) -> QuizArtifact:
+    """
+    Tire une nouvelle variante du quiz dans le pool de l'artefact, sans appel au LLM.
+
+    Args:
+        artifact: Artefact généré avec QUIZ_POOL_FACTOR.
+        rng: Générateur du tirage (graine propre à la tentative ou au développeur).
+
+    Returns:
+        Artefact de la variante : autres questions et options (hash attendu : voir render_artifact).
+
+    Raises:
+        ValidationError: Si l'artefact ne contient pas de pool.
+    """
+    if not artifact.pool:
+        raise ValidationError("L'artefact ne contient pas de pool de questions (QUIZ_POOL_FACTOR)")
+    questions = parse_quiz(draw_quiz(dump_quiz(artifact.pool), len(artifact.questions), rng))
+    return dataclasses.replace(
+        artifact,
+        questions=questions,
+        generated_at=datetime.now(timezone.utc),
+        usage={},
+        timings={},
+    )
@@ -3,14 +3,27 @@ Génération et validation des quiz.
 """
 import json
 import random
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import contextvars
+import dataclasses
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Sequence, Tuple
 from diffquiz.config import Settings
+from diffquiz.deadline import Deadline
 from diffquiz.llm_client import call_llm_api
-from diffquiz.exceptions import QuizGenerationError, ValidationError
+from diffquiz.model_cascade import select_models
+from diffquiz.models import OPTION_LABELS, Quiz, parse_quiz, dump_quiz
+from diffquiz.exceptions import DiffQuizError, QuizGenerationError, ValidationError, DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
+# Taille maximale d'un pool de questions (réponse du LLM limitée à 4096 tokens)
+MAX_POOL_SIZE = 15
+
+# Explication affichée si sa génération (deuxième phase) a échoué
+MISSING_EXPLANATION = "Explication indisponible."
+
 
 def clean_json_text(text: str) -> str:
     """
@@ -66,27 +79,19 @@ def clean_json_text(text: str) -> str:
     return text.strip()
 
 
-def _validate_option_lengths(options: List[str], question_num: int) -> None:
+def _validate_option_lengths(options: Sequence[str], question_num: int) -> None:
     """
     Vérifie que les options ont des longueurs similaires pour éviter que la bonne réponse soit identifiable.
     
     Args:
-        options: Liste des options à valider.
+        options: Textes des options (sans libellé "A) ").
         question_num: Numéro de la question (pour les messages d'erreur).
     """
     if len(options) < 2:
         return
     
-    # Compter les mots dans chaque option (en retirant le préfixe "A) ", "B) ", etc.)
-    word_counts = []
-    for opt in options:
-        # Retirer le préfixe "X) " si présent
-        text = opt.split(')', 1)[1].strip() if ')' in opt else opt.strip()
-        word_count = len(text.split())
-        word_counts.append(word_count)
-    
-    if not word_counts:
-        return
+    # Compter les mots dans chaque option
+    word_counts = [len(text.split()) for text in options]
     
     # Calculer la moyenne et vérifier les écarts
     avg_words = sum(word_counts) / len(word_counts)
@@ -103,61 +108,43 @@ def _validate_option_lengths(options: List[str], question_num: int) -> None:
             )
 
 
-def validate_quiz_schema(quiz_data: List[Dict[str, Any]]) -> None:
+def validate_quiz_schema(quiz_data: List[Dict[str, Any]]) -> Quiz:
     """
     Valide le schéma du quiz.
     
     Args:
         quiz_data: Données du quiz à valider.
         
+    Returns:
+        Questions typées, analysées une seule fois.
+        
     Raises:
-        ValidationError: Si le schéma est invalide.
+        ValidationError: Si le schéma est invalide (erreurs détaillées par question et par champ).
     """
-    if not isinstance(quiz_data, list):
-        raise ValidationError("Le quiz doit être une liste de questions")
+    questions = parse_quiz(quiz_data)
     
-    if len(quiz_data) == 0:
-        raise ValidationError("Le quiz ne peut pas être vide")
-    
-    required_fields = ['question', 'options', 'answer', 'explanation']
-    option_labels = ['A', 'B', 'C', 'D']
-    
-    for i, question in enumerate(quiz_data):
-        if not isinstance(question, dict):
-            raise ValidationError(f"Question {i+1} doit être un dictionnaire")
-        
-        # Vérifier les champs requis
-        for field in required_fields:
-            if field not in question:
-                raise ValidationError(f"Question {i+1} manque le champ '{field}'")
-        
-        # Vérifier les options
-        options = question['options']
-        if not isinstance(options, list) or len(options) < 2:
-            raise ValidationError(f"Question {i+1} doit avoir au moins 2 options")
-        
-        if len(options) > len(option_labels):
-            raise ValidationError(f"Question {i+1} a trop d'options (max {len(option_labels)})")
-        
-        # Vérifier la réponse
-        answer = question['answer'].strip().upper()
-        if answer not in option_labels[:len(options)]:
-            raise ValidationError(
-                f"Question {i+1} : réponse '{answer}' invalide. "
-                f"Attendu: {', '.join(option_labels[:len(options)])}"
-            )
-        
-        # Vérifier l'équilibre de longueur des options (avertissement seulement)
-        _validate_option_lengths(options, i + 1)
+    # Vérifier l'équilibre de longueur des options (avertissement seulement)
+    for i, question in enumerate(questions):
+        _validate_option_lengths(question.options, i + 1)
+    return questions
 
 
-def generate_quiz_prompt(diff_text: str, count: int) -> tuple:
+def generate_quiz_prompt(
+    diff_text: str,
+    count: int,
+    context: Optional[str] = None,
+    commits: Optional[str] = None,
+    with_explanations: bool = True
+) -> tuple:
     """
     Génère les prompts système et utilisateur pour le LLM.
     
     Args:
         diff_text: Texte du diff.
         count: Nombre de questions à générer.
+        context: Définitions englobant les hunks (optionnel).
+        commits: Commits du diff avec leurs fichiers, pour l'attribution (optionnel).
+        with_explanations: Demander les explications (sinon générées séparément, voir add_explanations).
         
     Returns:
         Tuple (prompt_system, prompt_user).
@@ -166,12 +153,39 @@ def generate_quiz_prompt(diff_text: str, count: int) -> tuple:
 Ton rôle est de créer des QCM de haute qualité qui testent vraiment les connaissances techniques et détectent les risques de sécurité.
 Tu es un générateur de JSON strict. Tu ne parles pas, tu ne dis pas bonjour. Tu sors uniquement du JSON valide."""
 
+    context_section = ""
+    if context:
+        context_section = f"""
+Contexte (fonctions/classes englobantes après modification, pour comprendre le code ; les questions portent sur les lignes modifiées) :
+{context}
+"""
+    
+    commits_section = ""
+    if commits:
+        commits_section = f"""
+Commits inclus dans ce diff (du plus ancien au plus récent, avec les fichiers modifiés) :
+{commits}
+"""
+    
+    # Génération en deux phases : questions seules, explications demandées ensuite
+    if with_explanations:
+        explanation_rule = "4. Les explications doivent être DÉTAILLÉES et ÉDUCATIVES"
+        explanation_field = (
+            '    "explanation": "Explication détaillée et éducative expliquant pourquoi la bonne réponse est correcte '
+            'ET pourquoi les autres sont incorrectes. Inclure des exemples concrets si pertinent.",\n'
+        )
+        explanation_instruction = "6. Chaque explication doit être éducative et aider à apprendre ; désigne les options par leur contenu, jamais par leur lettre (l'ordre est remélangé)"
+    else:
+        explanation_rule = "4. N'écris PAS d'explication : elles sont demandées séparément"
+        explanation_field = ""
+        explanation_instruction = '6. Aucun champ "explanation" : les explications sont générées dans un second temps'
+    
     prompt_user = f"""
 Analyse le code suivant (git diff) et génère un QCM technique de haute qualité qui teste les connaissances ET détecte les risques de sécurité.
 
 Code Diff:
 {diff_text}
-
+{context_section}{commits_section}
 === OBJECTIFS PRINCIPAUX ===
 1. TESTER LES CONNAISSANCES : Vérifier que le développeur comprend vraiment ce qu'il a écrit/modifié
 2. DÉTECTER LES RISQUES : Identifier tout code dangereux ou problématique dans les changements
@@ -213,7 +227,7 @@ Priorité 3 - BONNES PRATIQUES :
 1. Chaque question doit être PRÉCISE et TESTABLE
 2. Les questions doivent porter sur le CODE MODIFIÉ, pas sur des concepts généraux
 3. Les mauvaises réponses doivent être CRÉDIBLES (pas évidentes)
-4. Les explications doivent être DÉTAILLÉES et ÉDUCATIVES
+{explanation_rule}
 5. Si un risque de sécurité est détecté, il DOIT faire l'objet d'au moins une question
 6. Les questions doivent tester la COMPRÉHENSION, pas la mémorisation
 
@@ -238,7 +252,7 @@ Génère exactement {count} question(s) au format JSON strict :
       "D) Distracteur crédible avec longueur similaire (15-25 mots)"
     ],
     "answer": "A",
-    "explanation": "Explication détaillée et éducative expliquant pourquoi la bonne réponse est correcte ET pourquoi les autres sont incorrectes. Inclure des exemples concrets si pertinent."
+{explanation_field}    "file": "Chemin du fichier modifié sur lequel porte la question (tel qu'il apparaît dans le diff)"
   }}
 ]
 
@@ -253,14 +267,240 @@ IMPORTANT :
 3. Format RAW JSON ARRAY uniquement (pas de Markdown, pas d'introduction)
 4. Si des risques de sécurité sont détectés, ils DOIVENT être couverts par les questions
 5. Les questions doivent être adaptées au niveau junior mais tester vraiment la compréhension
-6. Chaque explication doit être éducative et aider à apprendre
+{explanation_instruction}
 7. **CRITIQUE** : Vérifie que toutes les options ont une longueur similaire avant de générer le JSON. Si la bonne réponse est plus longue, réécris-la pour qu'elle soit aussi concise que les distracteurs.
 """
     
     return prompt_system, prompt_user
 
 
-def generate_quiz(diff_text: str, count: int, settings: Settings) -> Optional[List[Dict[str, Any]]]:
+def generate_explanations_prompt(
+    diff_text: str,
+    questions: Quiz,
+    context: Optional[str] = None
+) -> tuple:
+    """
+    Génère les prompts de la deuxième phase : explications de questions déjà validées.
+    
+    Args:
+        diff_text: Texte du diff.
+        questions: Questions (options dans leur ordre final, bonne réponse connue).
+        context: Définitions englobant les hunks (optionnel).
+        
+    Returns:
+        Tuple (prompt_system, prompt_user).
+    """
+    prompt_system = """Tu es un expert technique Senior en développement logiciel, spécialisé en sécurité et bonnes pratiques.
+Tu rédiges les explications pédagogiques de QCM portant sur un git diff.
+Tu es un générateur de JSON strict. Tu ne parles pas, tu ne dis pas bonjour. Tu sors uniquement du JSON valide."""
+
+    context_section = f"\nContexte (fonctions/classes englobantes après modification) :\n{context}\n" if context else ""
+    listing = "\n\n".join(
+        f"Question {i}: {q.question}\n" + "\n".join(q.labeled_options) + f"\nBonne réponse : {q.answer}"
+        for i, q in enumerate(questions, 1)
+    )
+    
+    prompt_user = f"""
+Code Diff:
+{diff_text}
+{context_section}
+Questions :
+
+{listing}
+
+Pour chaque question, rédige une explication détaillée et éducative : pourquoi la bonne réponse est correcte
+ET pourquoi les autres options sont incorrectes, avec des exemples concrets si pertinent.
+Désigne chaque option par son contenu, jamais par sa lettre : l'ordre des options est remélangé
+à l'affichage (tirage dans un pool, réutilisation d'un quiz), les lettres A), B), ... changent.
+
+Format : RAW JSON ARRAY de exactement {len(questions)} chaîne(s), une par question, dans l'ordre :
+["Explication de la question 1", ...]
+"""
+    
+    return prompt_system, prompt_user
+
+
+def quiz_seed(diff_text: str) -> int:
+    """
+    Dérive une graine stable du contenu du diff (mode déterministe).
+    
+    Args:
+        diff_text: Texte du diff.
+        
+    Returns:
+        Graine sur 31 bits, acceptée par les API compatibles OpenAI et Ollama.
+    """
+    digest = hashlib.sha256(diff_text.encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big') & 0x7FFFFFFF
+
+
+def quiz_rng(diff_text: str, settings: Settings) -> Optional[random.Random]:
+    """
+    Générateur aléatoire du mélange des options : graine du diff en mode déterministe.
+    
+    Args:
+        diff_text: Texte du diff.
+        settings: Configuration de l'application.
+        
+    Returns:
+        Générateur initialisé ou None (module random global).
+    """
+    if not settings.deterministic_mode:
+        return None
+    return random.Random(quiz_seed(diff_text))
+
+
+def _request_quiz(
+    prompt_system: str,
+    prompt_user: str,
+    settings: Settings,
+    model: str,
+    deadline: Optional[Deadline] = None,
+    seed: Optional[int] = None,
+    with_explanations: bool = True
+) -> Optional[Quiz]:
+    """
+    Appelle le LLM avec un modèle donné, puis parse et valide sa réponse.
+    
+    Args:
+        prompt_system: Prompt système.
+        prompt_user: Prompt utilisateur.
+        settings: Configuration de l'application.
+        model: Modèle à utiliser.
+        deadline: Budget de temps global du job (optionnel).
+        seed: Graine d'échantillonnage du LLM (optionnel).
+        with_explanations: Explications attendues dans la réponse (sinon laissées vides).
+        
+    Returns:
+        Questions validées ou None si aucun contenu n'a été reçu.
+        
+    Raises:
+        json.JSONDecodeError: Si la réponse n'est pas du JSON valide.
+        ValidationError: Si le schéma du quiz est invalide.
+    """
+    content = call_llm_api(prompt_system, prompt_user, settings, model=model, deadline=deadline, seed=seed)
+    
+    if not content:
+        logger.error("Aucun contenu reçu de l'API LLM")
+        return None
+    
+    # Nettoyer et parser le JSON
+    cleaned_json = clean_json_text(content)
+    logger.debug(f"JSON nettoyé (premiers 200 caractères): {cleaned_json[:200]}")
+    
+    try:
+        quiz_data = json.loads(cleaned_json)
+    except json.JSONDecodeError as e:
+        logger.error(f"Erreur de parsing JSON à la position {e.pos}: {e.msg}")
+        logger.error(f"Contexte autour de l'erreur: ...{cleaned_json[max(0, e.pos-50):e.pos+50]}...")
+        logger.error(f"JSON complet reçu (premiers 1000 caractères):\n{cleaned_json[:1000]}")
+        raise
+    
+    # Première phase : explications ajoutées ensuite par add_explanations
+    if not with_explanations and isinstance(quiz_data, list):
+        for item in quiz_data:
+            if isinstance(item, dict):
+                item.setdefault("explanation", "")
+    
+    # Valider le schéma
+    return validate_quiz_schema(quiz_data)
+
+
+def _request_explanations(
+    prompt_system: str,
+    prompt_user: str,
+    settings: Settings,
+    count: int,
+    deadline: Optional[Deadline] = None,
+    seed: Optional[int] = None
+) -> List[str]:
+    """
+    Appelle le LLM pour un lot d'explications et valide sa réponse.
+    
+    Args:
+        prompt_system: Prompt système.
+        prompt_user: Prompt utilisateur.
+        settings: Configuration de l'application.
+        count: Nombre d'explications attendues.
+        deadline: Budget de temps global du job (optionnel).
+        seed: Graine d'échantillonnage du LLM (optionnel).
+        
+    Returns:
+        Explications, dans l'ordre des questions.
+        
+    Raises:
+        json.JSONDecodeError: Si la réponse n'est pas du JSON valide.
+        ValidationError: Si la réponse n'est pas une liste de count explications.
+    """
+    content = call_llm_api(prompt_system, prompt_user, settings, deadline=deadline, seed=seed)
+    if not content:
+        raise ValidationError("Aucun contenu reçu de l'API LLM")
+    
+    explanations = json.loads(clean_json_text(content))
+    if isinstance(explanations, list):
+        explanations = [e.get("explanation") if isinstance(e, dict) else e for e in explanations]
+    if (not isinstance(explanations, list) or len(explanations) != count
+            or not all(isinstance(e, str) and e.strip() for e in explanations)):
+        raise ValidationError(f"{count} explication(s) attendue(s) sous forme de liste de textes")
+    return [e.strip() for e in explanations]
+
+
+def add_explanations(
+    diff_text: str,
+    questions: Quiz,
+    settings: Settings,
+    deadline: Optional[Deadline] = None,
+    context: Optional[str] = None
+) -> Quiz:
+    """
+    Deuxième phase : génère les explications par lots, en appels LLM parallèles.
+    
+    Les explications, la partie la plus longue de chaque question, ne
+    rallongent plus l'appel principal. Par défaut (EXPLANATION_BATCH_SIZE=0),
+    un seul appel les produit toutes : chaque lot supplémentaire renverrait le
+    diff et le contexte. Les lots éventuels sont traités simultanément ; un lot
+    en échec reçoit MISSING_EXPLANATION sans bloquer le quiz.
+    
+    Args:
+        diff_text: Texte du diff (déjà tronqué).
+        questions: Questions validées, options dans leur ordre final.
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel).
+        context: Définitions englobant les hunks (optionnel).
+        
+    Returns:
+        Questions complétées de leurs explications.
+    """
+    size = settings.explanation_batch_size or len(questions) or 1
+    batches = [questions[i:i + size] for i in range(0, len(questions), size)]
+    seed = quiz_seed(diff_text) if settings.deterministic_mode else None
+    
+    def explain(batch: Quiz) -> List[str]:
+        prompt_system, prompt_user = generate_explanations_prompt(diff_text, batch, context)
+        try:
+            return _request_explanations(prompt_system, prompt_user, settings, len(batch), deadline, seed)
+        except (json.JSONDecodeError, DiffQuizError) as e:
+            logger.warning(f"Explications indisponibles pour {len(batch)} question(s) : {e}")
+            return [MISSING_EXPLANATION] * len(batch)
+    
+    if not batches:
+        return questions
+    # Un contexte par appel : la consommation de tokens reste attribuée à la génération en cours
+    with ThreadPoolExecutor(max_workers=len(batches), thread_name_prefix="diffquiz-explain") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, explain, batch) for batch in batches]
+        explanations = [text for future in futures for text in future.result()]
+    logger.info(f"Explications générées en {len(batches)} appel(s) parallèle(s)")
+    return [dataclasses.replace(q, explanation=text) for q, text in zip(questions, explanations)]
+
+
+def generate_quiz(
+    diff_text: str,
+    count: int,
+    settings: Settings,
+    deadline: Optional[Deadline] = None,
+    context: Optional[str] = None,
+    commits: Optional[str] = None
+) -> Optional[List[Dict[str, Any]]]:
     """
     Génère un quiz basé sur le diff.
     
@@ -268,20 +508,57 @@ def generate_quiz(diff_text: str, count: int, settings: Settings) -> Optional[Li
         diff_text: Texte du diff.
         count: Nombre de questions à générer.
         settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel), partagé par les escalades.
+        context: Définitions englobant les hunks, ajoutées au prompt (optionnel).
+        commits: Attribution des changements par commit, ajoutée au prompt (optionnel).
         
     Returns:
-        Liste de questions du quiz ou None en cas d'erreur.
+        Questions du quiz, ou None en cas d'erreur (voir generate_quiz_with_model pour le modèle).
         
     Raises:
         QuizGenerationError: En cas d'erreur de génération.
+        DeadlineExceededError: Si le budget global est épuisé.
+    """
+    quiz, _ = generate_quiz_with_model(diff_text, count, settings, deadline, context, commits)
+    return quiz
+
+
+def generate_quiz_with_model(
+    diff_text: str,
+    count: int,
+    settings: Settings,
+    deadline: Optional[Deadline] = None,
+    context: Optional[str] = None,
+    commits: Optional[str] = None,
+    explain: bool = True
+) -> Tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Génère un quiz basé sur le diff et indique le modèle de la cascade qui l'a produit.
+    
+    Args:
+        diff_text: Texte du diff.
+        count: Nombre de questions à générer.
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel), partagé par les escalades.
+        context: Définitions englobant les hunks, ajoutées au prompt (optionnel).
+        commits: Attribution des changements par commit, ajoutée au prompt (optionnel).
+        explain: En génération en deux phases, demander aussi les explications (sinon
+            laissées vides, à compléter avec add_explanations, voir QuizClient.start_quiz).
+        
+    Returns:
+        Tuple (questions du quiz, modèle qui les a produites), (None, None) en cas d'erreur.
+        
+    Raises:
+        QuizGenerationError: En cas d'erreur de génération.
+        DeadlineExceededError: Si le budget global est épuisé.
     """
     if not diff_text:
         logger.warning("Aucun diff fourni")
-        return None
+        return None, None
     
     if count <= 0:
         logger.warning(f"Nombre de questions invalide : {count}")
-        return None
+        return None, None
     
     # Limiter la longueur du diff
     truncated_diff = diff_text[:settings.max_diff_length]
@@ -289,37 +566,49 @@ def generate_quiz(diff_text: str, count: int, settings: Settings) -> Optional[Li
         logger.warning(f"Diff tronqué de {len(diff_text)} à {settings.max_diff_length} caractères")
     
     try:
-        # Générer les prompts
-        prompt_system, prompt_user = generate_quiz_prompt(truncated_diff, count)
-        
-        # Appeler l'API LLM
-        content = call_llm_api(prompt_system, prompt_user, settings)
-        
-        if not content:
-            logger.error("Aucun contenu reçu de l'API LLM")
-            return None
+        # Générer les prompts (sans les explications en génération en deux phases)
+        two_phase = settings.two_phase_generation
+        prompt_system, prompt_user = generate_quiz_prompt(
+            truncated_diff, count, context, commits, with_explanations=not two_phase
+        )
         
-        # Nettoyer et parser le JSON
-        cleaned_json = clean_json_text(content)
-        logger.debug(f"JSON nettoyé (premiers 200 caractères): {cleaned_json[:200]}")
+        # Mode déterministe : même diff, même graine pour le LLM et le mélange
+        seed = quiz_seed(truncated_diff) if settings.deterministic_mode else None
         
-        try:
-            quiz_data = json.loads(cleaned_json)
-        except json.JSONDecodeError as e:
-            logger.error(f"Erreur de parsing JSON à la position {e.pos}: {e.msg}")
-            logger.error(f"Contexte autour de l'erreur: ...{cleaned_json[max(0, e.pos-50):e.pos+50]}...")
-            logger.error(f"JSON complet reçu (premiers 1000 caractères):\n{cleaned_json[:1000]}")
-            raise
+        # Cascade : modèle rapide d'abord, escalade si la réponse est inexploitable
+        models = select_models(truncated_diff, settings)
+        quiz_data = None
+        for attempt, model in enumerate(models):
+            is_last = attempt == len(models) - 1
+            try:
+                quiz_data = _request_quiz(
+                    prompt_system, prompt_user, settings, model, deadline, seed, with_explanations=not two_phase
+                )
+            except (json.JSONDecodeError, ValidationError) as e:
+                if is_last:
+                    raise
+                logger.warning(f"Réponse invalide du modèle {model}, escalade vers {models[attempt + 1]} : {e}")
+                continue
+            
+            if quiz_data is not None or is_last:
+                break
+            logger.warning(f"Aucun contenu du modèle {model}, escalade vers {models[attempt + 1]}")
         
-        # Valider le schéma
-        validate_quiz_schema(quiz_data)
+        if quiz_data is None:
+            return None, None
         
         # Mélanger les options
-        shuffled_quiz = shuffle_quiz_options(quiz_data)
+        shuffled_quiz = shuffle_questions(quiz_data, quiz_rng(truncated_diff, settings))
+        
+        # Deuxième phase : explications des questions validées, options dans leur ordre final
+        if two_phase and explain:
+            shuffled_quiz = add_explanations(truncated_diff, shuffled_quiz, settings, deadline, context)
         
         logger.info(f"Quiz généré avec succès : {len(shuffled_quiz)} questions")
-        return shuffled_quiz
+        return dump_quiz(shuffled_quiz), model
         
+    except DeadlineExceededError:
+        raise
     except (json.JSONDecodeError, ValidationError) as e:
         error_msg = f"Erreur de validation du quiz : {e}"
         logger.error(error_msg)
@@ -330,68 +619,88 @@ def generate_quiz(diff_text: str, count: int, settings: Settings) -> Optional[Li
         raise QuizGenerationError(error_msg) from e
 
 
-def shuffle_quiz_options(quiz_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+def shuffle_questions(questions: Quiz, rng: Optional[random.Random] = None) -> Quiz:
     """
-    Mélange aléatoirement l'ordre des options pour chaque question.
+    Mélange l'ordre des options de chaque question typée.
     
     Args:
-        quiz_data: Liste des questions du quiz.
+        questions: Questions du quiz.
+        rng: Générateur aléatoire (mode déterministe), sinon le module random global.
         
     Returns:
-        Quiz avec options mélangées.
+        Questions aux options mélangées, bonne réponse mise à jour.
     """
-    if not quiz_data:
-        return quiz_data
-    
-    shuffled_quiz = []
-    option_labels = ['A', 'B', 'C', 'D']
+    shuffled_quiz: Quiz = []
+    for question in questions:
+        indices = list(range(len(question.options)))
+        (rng or random).shuffle(indices)
+        shuffled_quiz.append(dataclasses.replace(
+            question,
+            options=tuple(question.options[idx] for idx in indices),
+            answer=OPTION_LABELS[indices.index(question.answer_index)]
+        ))
+    return shuffled_quiz
+
+
+def pool_size(count: int, factor: int) -> int:
+    """
+    Nombre de questions à demander au LLM pour un quiz tiré dans un pool.
     
-    for question in quiz_data:
-        shuffled_question = question.copy()
-        options = question.get('options', [])
-        
-        if not options:
-            shuffled_quiz.append(shuffled_question)
-            continue
-        
-        correct_answer_letter = question.get('answer', 'A').strip().upper()
-        correct_index = ord(correct_answer_letter) - ord('A')
-        
-        if correct_index < 0 or correct_index >= len(options):
-            correct_index = 0
-        
-        # Extraire les textes des options
-        options_with_text = []
-        for opt in options:
-            if ')' in opt:
-                opt_text = opt.split(')', 1)[1].strip()
-            else:
-                opt_text = opt.strip()
-            options_with_text.append(opt_text)
-        
-        # Mélanger les indices
-        indices = list(range(len(options_with_text)))
-        random.shuffle(indices)
+    Args:
+        count: Nombre de questions du quiz.
+        factor: Facteur de suréchantillonnage (QUIZ_POOL_FACTOR).
         
-        # Trouver la nouvelle position de la bonne réponse
-        new_correct_index = None
-        for i, idx in enumerate(indices):
-            if idx == correct_index:
-                new_correct_index = i
-                break
+    Returns:
+        Taille du pool, plafonnée à MAX_POOL_SIZE (jamais inférieure à count).
+    """
+    return max(count, min(count * factor, MAX_POOL_SIZE))
+
+
+def draw_quiz(
+    pool: List[Dict[str, Any]],
+    count: int,
+    rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
+    """
+    Tire un quiz dans un pool de questions validées, sans appel au LLM.
+    
+    Chaque tirage (graine différente) donne un sous-ensemble et un ordre
+    des options distincts, donc son propre hash de réponses.
+    
+    Args:
+        pool: Questions du pool.
+        count: Nombre de questions à tirer.
+        rng: Générateur aléatoire (tirage reproductible), sinon le module random global.
         
-        if new_correct_index is None:
-            new_correct_index = 0
+    Returns:
+        Questions tirées dans l'ordre du pool, options mélangées.
         
-        # Reconstruire les options
-        shuffled_options = []
-        for i, idx in enumerate(indices):
-            shuffled_options.append(f"{option_labels[i]}) {options_with_text[idx]}")
+    Raises:
+        ValidationError: Si une question est invalide.
+    """
+    if len(pool) > count:
+        indices = sorted((rng or random).sample(range(len(pool)), count))
+        pool = [pool[idx] for idx in indices]
+    return shuffle_quiz_options(pool, rng)
+
+
+def shuffle_quiz_options(
+    quiz_data: List[Dict[str, Any]],
+    rng: Optional[random.Random] = None
+) -> List[Dict[str, Any]]:
+    """
+    Mélange aléatoirement l'ordre des options pour chaque question.
+    
+    Args:
+        quiz_data: Liste des questions du quiz.
+        rng: Générateur aléatoire (mode déterministe), sinon le module random global.
         
-        shuffled_question['options'] = shuffled_options
-        shuffled_question['answer'] = option_labels[new_correct_index]
+    Returns:
+        Quiz avec options mélangées.
         
-        shuffled_quiz.append(shuffled_question)
-    
-    return shuffled_quiz
-
+    Raises:
+        ValidationError: Si une question est invalide.
+    """
+    if not quiz_data:
+        return quiz_data
+    return dump_quiz(shuffle_questions(parse_quiz(quiz_data), rng))
@@ -0,0 +1,436 @@
+"""
+Quiz pré-générés sur le poste du développeur, publiés dans les notes git.
+
+Le hook pre-push lance en tâche de fond la génération du quiz des commits
+poussés, avec le même intervalle que le job CI, puis publie l'artefact
+quiz.json dans les notes git (refs/notes/diffquiz) rattachées au commit.
+Avec QUIZ_NOTES_LOOKUP, le job llm-quiz-generation récupère ces notes et
+réutilise le quiz si l'empreinte du diff correspond : l'appel au LLM sort du
+chemin critique du pipeline, et le LLM n'est appelé qu'en cas d'absence.
+
+Les notes ne sont pas authentifiées : quiconque peut pousser refs/notes/diffquiz
+peut publier un quiz rédigé à la main pour un diff donné. QUIZ_NOTES_LOOKUP ne
+convient qu'aux équipes où le quiz n'est pas un contrôle.
+
+Usage :
+    python -m diffquiz.quiz_notes install          # installe le hook pre-push
+    python -m diffquiz.quiz_notes generate [REV]   # pré-génère le quiz d'un commit
+    python -m diffquiz.quiz_notes show [REV]       # affiche le quiz publié
+"""
+import os
+import sys
+import time
+import hashlib
+import logging
+import argparse
+import subprocess
+import dataclasses
+from typing import Iterable, List, Optional, TextIO, Tuple
+from pydantic import ValidationError as PydanticValidationError
+from diffquiz.config import Settings, get_settings
+from diffquiz.deadline import Deadline
+from diffquiz.git_utils import fetch_git_diff, get_merge_base, is_ancestor
+from diffquiz.diff_range import get_target_branch, get_commit_attribution
+from diffquiz.api import QuizClient, QuizOptions
+from diffquiz.quiz_artifact import ARTIFACT_ADAPTER, QuizArtifact, dump_artifact
+
+logger = logging.getLogger(__name__)
+
+NOTES_REF = "refs/notes/diffquiz"
+# Notes distantes, fusionnées avec les notes locales avant une nouvelle publication
+REMOTE_NOTES_REF = "refs/notes/diffquiz-remote"
+LOG_FILENAME = "diffquiz-pregenerate.log"
+HOOK_MARKER = "# diffquiz pre-push"
+
+PRE_PUSH_HOOK = f"""#!/bin/sh
+{HOOK_MARKER} : pré-génère en tâche de fond le quiz des commits poussés
+python3 -m diffquiz.quiz_notes pre-push "$1" || true
+"""
+
+
+def _git(
+    args: List[str],
+    timeout: float = 30,
+    stdin: Optional[str] = None,
+    cwd: Optional[str] = None
+) -> Optional[str]:
+    """
+    Exécute une commande git (les échecs attendus, comme une note absente, ne sont pas des erreurs).
+
+    Args:
+        args: Arguments passés à git.
+        timeout: Timeout de la commande en secondes.
+        stdin: Entrée standard (optionnel).
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        Sortie standard, ou None si git a échoué.
+    """
+    try:
+        result = subprocess.run(
+            ["git", *args], input=stdin, capture_output=True, text=True, timeout=timeout, cwd=cwd
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        logger.warning(f"git {args[0]} impossible : {e}")
+        return None
+    if result.returncode != 0:
+        logger.debug(f"git {' '.join(args)} : {result.stderr.strip()}")
+        return None
+    return result.stdout
+
+
+def diff_fingerprint(diff_text: str) -> str:
+    """
+    Empreinte d'un diff, comparée entre le poste du développeur et la CI.
+
+    Args:
+        diff_text: Texte du diff, tel que récupéré par fetch_git_diff.
+
+    Returns:
+        SHA-256 hexadécimal.
+    """
+    return hashlib.sha256(diff_text.encode('utf-8')).hexdigest()
+
+
+def write_quiz_note(commit: str, artifact: QuizArtifact, timeout: float = 30, cwd: Optional[str] = None) -> bool:
+    """
+    Rattache un quiz à un commit dans les notes git (remplace la note existante).
+
+    Args:
+        commit: Révision du commit.
+        artifact: Quiz généré.
+        timeout: Timeout de la commande git en secondes.
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        True si la note a été écrite.
+    """
+    content = dump_artifact(artifact, compact=True).decode('utf-8')
+    return _git(["notes", "--ref", NOTES_REF, "add", "-f", "-F", "-", commit], timeout, content, cwd) is not None
+
+
+def read_quiz_note(commit: str, timeout: float = 30, cwd: Optional[str] = None) -> Optional[QuizArtifact]:
+    """
+    Lit le quiz rattaché à un commit.
+
+    Args:
+        commit: Révision du commit.
+        timeout: Timeout de la commande git en secondes.
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        Quiz publié, ou None si la note est absente ou invalide.
+    """
+    content = _git(["notes", "--ref", NOTES_REF, "show", commit], timeout, cwd=cwd)
+    if not content:
+        return None
+    try:
+        return ARTIFACT_ADAPTER.validate_json(content)
+    except PydanticValidationError as e:
+        logger.warning(f"Note diffquiz invalide pour {commit} : {e.error_count()} erreur(s)")
+        return None
+
+
+def lookup_quiz_note(
+    commit: str,
+    diff_text: str,
+    timeout: float = 30,
+    cwd: Optional[str] = None
+) -> Optional[QuizArtifact]:
+    """
+    Cherche un quiz pré-généré pour un commit et le diff calculé par la CI.
+
+    Args:
+        commit: Révision du commit.
+        diff_text: Diff quizzé par la CI.
+        timeout: Timeout de la commande git en secondes.
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        Quiz réutilisable, ou None (note absente, autre intervalle ou autre configuration).
+    """
+    artifact = read_quiz_note(commit, timeout, cwd)
+    if artifact is None or not artifact.questions:
+        return None
+    if artifact.diff_hash != diff_fingerprint(diff_text):
+        logger.info("Quiz pré-généré ignoré : le diff ne correspond pas à celui de la CI")
+        return None
+    return artifact
+
+
+def fetch_notes(remote: str = "origin", timeout: float = 30, cwd: Optional[str] = None) -> bool:
+    """
+    Récupère les notes diffquiz du dépôt distant (remplace les notes locales, usage CI).
+
+    Args:
+        remote: Dépôt distant.
+        timeout: Timeout de la commande git en secondes.
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        True si les notes ont été récupérées.
+    """
+    return _git(["fetch", "--quiet", remote, f"+{NOTES_REF}:{NOTES_REF}"], timeout, cwd=cwd) is not None
+
+
+def push_notes(remote: str = "origin", timeout: float = 30, cwd: Optional[str] = None) -> bool:
+    """
+    Publie les notes diffquiz, en fusionnant d'abord celles d'autres développeurs si nécessaire.
+
+    Args:
+        remote: Dépôt distant.
+        timeout: Timeout de chaque commande git en secondes.
+        cwd: Dépôt git (défaut : répertoire courant).
+
+    Returns:
+        True si les notes ont été publiées.
+    """
+    if _git(["push", "--quiet", remote, NOTES_REF], timeout, cwd=cwd) is not None:
+        return True
+    # Notes distantes plus récentes : fusion (les notes locales l'emportent) puis nouvelle tentative
+    if _git(["fetch", "--quiet", remote, f"+{NOTES_REF}:{REMOTE_NOTES_REF}"], timeout, cwd=cwd) is None:
+        return False
+    if _git(["notes", "--ref", NOTES_REF, "merge", "-s", "ours", REMOTE_NOTES_REF], timeout, cwd=cwd) is None:
+        return False
+    return _git(["push", "--quiet", remote, NOTES_REF], timeout, cwd=cwd) is not None
+
+
+def find_pregenerated_quiz(
+    commit: str,
+    diff_text: str,
+    settings: Settings,
+    deadline: Optional[Deadline] = None,
+    remote: str = "origin",
+    poll_seconds: float = 5.0
+) -> Optional[QuizArtifact]:
+    """
+    Job CI : cherche le quiz publié par le hook pre-push, en attendant au plus QUIZ_NOTES_WAIT_SECONDS.
+
+    Args:
+        commit: Révision du commit quizzé.
+        diff_text: Diff quizzé par la CI.
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job (optionnel).
+        remote: Dépôt distant.
+        poll_seconds: Intervalle entre deux récupérations des notes.
+
+    Returns:
+        Quiz réutilisable ou None (le LLM est alors appelé).
+    """
+    timeout = settings.git_timeout_seconds
+    wait_until = time.monotonic() + settings.quiz_notes_wait_seconds
+    while True:
+        fetch_notes(remote, timeout)
+        artifact = lookup_quiz_note(commit, diff_text, timeout)
+        remaining = wait_until - time.monotonic()
+        if deadline is not None and deadline.remaining() is not None:
+            remaining = min(remaining, deadline.remaining() - settings.deadline_reserve_seconds)
+        if artifact is not None or remaining <= 0:
+            return artifact
+        time.sleep(min(poll_seconds, remaining))
+
+
+def pre_push_range(commit: str, remote_sha: Optional[str], settings: Settings, remote: str = "origin") -> str:
+    """
+    Base du diff d'un commit poussé, calculée comme le fera le job CI (DIFF_RANGE_MODE).
+
+    Sur le poste du développeur, les variables de merge request de la CI
+    (CI_MERGE_REQUEST_TARGET_BRANCH_NAME) n'existent pas : sans DIFF_TARGET_BRANCH,
+    la branche cible est inconnue et la base retenue diffère de celle d'un
+    pipeline de merge request, dont le quiz pré-généré n'est alors jamais trouvé.
+
+    Args:
+        commit: Commit poussé.
+        remote_sha: Commit distant remplacé par le push (None pour une nouvelle branche).
+        settings: Configuration de l'application.
+        remote: Dépôt distant du push (nom ou URL, premier argument du hook).
+
+    Returns:
+        Révision de base du diff.
+    """
+    mode = settings.diff_range_mode
+    timeout = settings.git_timeout_seconds
+    if mode in ("merge-base", "auto"):
+        target = get_target_branch(settings)
+        # Branche de suivi du dépôt poussé (absente si le push vise une URL), puis branche locale
+        refs = (f"{remote}/{target}", target) if target else ()
+        for ref in refs:
+            base = get_merge_base(ref, commit, timeout)
+            if base:
+                return base
+    if mode in ("push", "auto") and remote_sha and is_ancestor(remote_sha, commit, timeout):
+        return remote_sha
+    return f"{commit}^"
+
+
+def pregenerate(commit: str, base: str, settings: Settings, remote: Optional[str] = None) -> Optional[QuizArtifact]:
+    """
+    Génère le quiz d'un commit et le publie dans les notes git.
+
+    Args:
+        commit: Commit quizzé.
+        base: Révision de base du diff (voir pre_push_range).
+        settings: Configuration de l'application.
+        remote: Dépôt distant où publier les notes (None = notes locales seulement).
+
+    Returns:
+        Quiz publié, ou None (aucun changement significatif, échec de la génération).
+    """
+    timeout = settings.git_timeout_seconds
+    diff, changes = fetch_git_diff(
+        base=base,
+        head=commit,
+        max_chars=settings.max_diff_length,
+        exclude_patterns=settings.diff_exclude_pattern_list,
+        timeout=timeout,
+        compaction_min_repeats=settings.diff_compaction_min_repeats
+    )
+    if not diff:
+        return None
+    commits = get_commit_attribution(base, commit, settings)
+    with QuizClient(settings) as client:
+        result = client.run(diff, QuizOptions(changed_lines=changes, commits=commits, render_html=False))
+    if not result.ok:
+        logger.info(f"Pas de quiz pré-généré pour {commit[:8]} ({result.status})")
+        return None
+
+    artifact = dataclasses.replace(result.artifact(), diff_hash=diff_fingerprint(diff))
+    if not write_quiz_note(commit, artifact, timeout):
+        logger.error(f"Impossible d'écrire la note diffquiz de {commit[:8]}")
+        return None
+    if remote and not push_notes(remote, timeout):
+        logger.warning(f"Notes diffquiz non publiées sur {remote} : le job CI appellera le LLM")
+    logger.info(f"Quiz de {commit[:8]} pré-généré ({len(artifact.questions)} questions, {NOTES_REF})")
+    return artifact
+
+
+def parse_pre_push(lines: Iterable[str]) -> List[Tuple[str, Optional[str]]]:
+    """
+    Analyse l'entrée standard du hook pre-push.
+
+    Args:
+        lines: Lignes "<ref locale> <sha local> <ref distante> <sha distant>".
+
+    Returns:
+        Commits poussés avec le commit distant remplacé (None pour une nouvelle branche).
+        Les suppressions de branches et les notes sont ignorées.
+    """
+    pushed = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) != 4:
+            continue
+        local_ref, local_sha, _, remote_sha = parts
+        if set(local_sha) == {"0"} or local_ref.startswith("refs/notes/"):
+            continue
+        pushed.append((local_sha, None if set(remote_sha) == {"0"} else remote_sha))
+    return pushed
+
+
+def run_pre_push(remote: str, stdin: TextIO, settings: Settings) -> int:
+    """
+    Hook pre-push : lance en tâche de fond la pré-génération des commits poussés, sans retarder le push.
+
+    Args:
+        remote: Dépôt distant du push.
+        stdin: Entrée standard du hook.
+        settings: Configuration de l'application.
+
+    Returns:
+        Code de sortie (toujours 0 : le push n'est jamais bloqué).
+    """
+    git_dir = (_git(["rev-parse", "--git-dir"]) or ".git").strip()
+    with open(os.path.join(git_dir, LOG_FILENAME), "a", encoding="utf-8") as log:
+        for commit, remote_sha in parse_pre_push(stdin):
+            base = pre_push_range(commit, remote_sha, settings, remote)
+            subprocess.Popen(
+                [sys.executable, "-m", "diffquiz.quiz_notes", "generate", commit, "--base", base, "--push", remote],
+                stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True
+            )
+            logger.info(f"Pré-génération du quiz de {commit[:8]} lancée (journal : {git_dir}/{LOG_FILENAME})")
+    return 0
+
+
+def install_hook(git_dir: str) -> str:
+    """
+    Installe le hook pre-push (un hook existant d'un autre outil n'est pas remplacé).
+
+    Args:
+        git_dir: Répertoire .git du dépôt.
+
+    Returns:
+        Chemin du hook.
+
+    Raises:
+        FileExistsError: Si un autre hook pre-push est déjà installé.
+    """
+    path = os.path.join(git_dir, "hooks", "pre-push")
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            if HOOK_MARKER not in f.read():
+                raise FileExistsError(f"{path} existe déjà : ajoutez-y l'appel à python3 -m diffquiz.quiz_notes pre-push")
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PRE_PUSH_HOOK)
+    os.chmod(path, 0o755)
+    return path
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande."""
+    parser = argparse.ArgumentParser(description="Quiz DiffQuiz pré-générés dans les notes git.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("install", help="Installe le hook pre-push du dépôt courant")
+
+    pre_push = commands.add_parser("pre-push", help="Point d'entrée du hook pre-push (commits lus sur l'entrée standard)")
+    pre_push.add_argument("remote")
+
+    generate = commands.add_parser("generate", help="Pré-génère le quiz d'un commit")
+    generate.add_argument("commit", nargs="?", default="HEAD")
+    generate.add_argument("--base", help="Base du diff (défaut : COMMIT^)")
+    generate.add_argument("--push", metavar="REMOTE", help="Publie les notes sur ce dépôt distant")
+
+    show = commands.add_parser("show", help="Affiche le quiz publié pour un commit (JSON)")
+    show.add_argument("commit", nargs="?", default="HEAD")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée : python -m diffquiz.quiz_notes."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    if args.command == "install":
+        git_dir = _git(["rev-parse", "--git-dir"])
+        if git_dir is None:
+            logger.error("Pas de dépôt git dans le répertoire courant")
+            return 1
+        try:
+            logger.info(f"Hook installé : {install_hook(git_dir.strip())}")
+        except FileExistsError as e:
+            logger.error(str(e))
+            return 1
+        return 0
+    if args.command == "show":
+        artifact = read_quiz_note(args.commit)
+        if artifact is None:
+            logger.error(f"Aucun quiz publié pour {args.commit}")
+            return 1
+        sys.stdout.write(dump_artifact(artifact).decode('utf-8') + "\n")
+        return 0
+
+    try:
+        settings = get_settings()
+    except Exception as e:
+        # Le push n'est jamais bloqué par une configuration incomplète
+        logger.error(f"Erreur de configuration, pas de pré-génération : {e}")
+        return 0 if args.command == "pre-push" else 1
+    if args.command == "pre-push":
+        return run_pre_push(args.remote, sys.stdin, settings)
+    commit = (_git(["rev-parse", args.commit]) or args.commit).strip()
+    artifact = pregenerate(commit, args.base or f"{commit}^", settings, args.push)
+    return 0 if artifact is not None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
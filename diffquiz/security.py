@@ -4,7 +4,7 @@ Fonctions de sécurité : hash, validation, etc.
 import secrets
 import hashlib
 import logging
-from typing import Tuple
+from typing import Sequence, Tuple
 from diffquiz.exceptions import SecurityError
 
 logger = logging.getLogger(__name__)
@@ -97,7 +97,23 @@ def hash_secret_simple(secret: str) -> str:
     return hash_obj.hexdigest()
 
 
-def hash_quiz_answers(answers: list) -> str:
+def quiz_variant(questions: Sequence[str]) -> str:
+    """
+    Identifiant d'une variante tirée dans un pool : empreinte des énoncés, dans l'ordre.
+    
+    Les réponses triées d'un petit quiz ne prennent que quelques valeurs : sans
+    cet identifiant, deux variantes d'un même pool auraient souvent le même code.
+    
+    Args:
+        questions: Énoncés des questions tirées.
+        
+    Returns:
+        Identifiant hexadécimal (16 caractères), public.
+    """
+    return hashlib.sha256('\n'.join(questions).encode('utf-8')).hexdigest()[:16]
+
+
+def hash_quiz_answers(answers: list, variant: str = "") -> str:
     """
     Hash les réponses d'un quiz pour générer un code secret basé sur les bonnes réponses.
     
@@ -108,6 +124,7 @@ def hash_quiz_answers(answers: list) -> str:
     
     Args:
         answers: Liste des réponses correctes (ex: ['A', 'B', 'C']).
+        variant: Identifiant de la variante (quiz_variant) pour un quiz tiré dans un pool.
         
     Returns:
         Hash hexadécimal des réponses.
@@ -119,8 +136,23 @@ def hash_quiz_answers(answers: list) -> str:
     answers_string = '|'.join(sorted(str(a).upper().strip() for a in answers))
     
     # Hasher avec le même salt fixe que hash_secret_simple pour compatibilité CI/CD
-    hash_obj = hashlib.sha256((answers_string + FIXED_SALT).encode('utf-8'))
+    hash_obj = hashlib.sha256((answers_string + variant + FIXED_SALT).encode('utf-8'))
     
     logger.debug(f"Hash des réponses calculé ({len(answers)} réponses)")
     return hash_obj.hexdigest()
 
+
+def verify_quiz_secret(submitted: str, expected_hash: str) -> bool:
+    """
+    Compare un code saisi au hash attendu des réponses, en temps constant.
+    
+    Args:
+        submitted: Code obtenu dans le rapport (QUIZ_SECRET).
+        expected_hash: Hash attendu (voir hash_quiz_answers).
+        
+    Returns:
+        True si le code correspond, False sinon.
+    """
+    if not submitted or not expected_hash:
+        return False
+    return secrets.compare_digest(submitted.strip().lower().encode('utf-8'), expected_hash.lower().encode('utf-8'))
@@ -0,0 +1,212 @@
+"""
+Index local des diffs déjà quizzés, pour réutiliser un quiz sur un changement quasi identique.
+
+Chaque diff est résumé par une signature MinHash calculée sur ses lignes
+ajoutées/supprimées normalisées. Les signatures sont découpées en bandes (LSH)
+stockées dans une table SQLite indexée : une recherche ne lit que les quelques
+entrées partageant au moins une bande, quelle que soit la taille de l'index.
+"""
+import os
+import json
+import time
+import struct
+import random
+import sqlite3
+import hashlib
+import logging
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+from diffquiz.config import Settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "similar_diffs.sqlite"
+
+NUM_PERMUTATIONS = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+MAX_CANDIDATES = 50
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20250127)  # Graine fixe : signatures stables entre exécutions
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+_SIGNATURE_FORMAT = f"<{NUM_PERMUTATIONS}Q"
+
+
+def normalize_diff_lines(diff_text: Optional[str]) -> Set[str]:
+    """
+    Extrait les lignes ajoutées/supprimées normalisées (espaces compactés).
+
+    Args:
+        diff_text: Texte du diff.
+
+    Returns:
+        Ensemble de lignes préfixées par '+' ou '-'.
+    """
+    shingles = set()
+    if not diff_text:
+        return shingles
+
+    for line in diff_text.splitlines():
+        if line.startswith('+++') or line.startswith('---'):
+            continue
+        if line.startswith('+') or line.startswith('-'):
+            content = ' '.join(line[1:].split())
+            if content:
+                shingles.add(line[0] + content)
+    return shingles
+
+
+def minhash_signature(shingles: Iterable[str]) -> Optional[List[int]]:
+    """
+    Calcule la signature MinHash d'un ensemble de lignes.
+
+    Args:
+        shingles: Lignes normalisées.
+
+    Returns:
+        Signature de NUM_PERMUTATIONS entiers ou None si l'ensemble est vide.
+    """
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'little')
+        for s in shingles
+    ]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(first: List[int], second: List[int]) -> float:
+    """Estime la similarité de Jaccard entre deux signatures."""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERMUTATIONS
+
+
+def _band_keys(signature: List[int]) -> List[Tuple[int, int]]:
+    """Calcule la clé de chaque bande LSH (entier signé 63 bits pour SQLite)."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS_PER_BAND}Q", *rows), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, 'little') >> 1))
+    return keys
+
+
+class SimilarityIndex:
+    """
+    Index MinHash/LSH persistant (SQLite).
+
+    Args:
+        path: Chemin du fichier SQLite.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY,
+                signature BLOB NOT NULL,
+                quiz TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                entry_id INTEGER NOT NULL,
+                PRIMARY KEY (band, bucket, entry_id)
+            ) WITHOUT ROWID;
+        """)
+
+    def __enter__(self) -> "SimilarityIndex":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self._conn.close()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def add(self, signature: List[int], quiz: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute un quiz à l'index.
+
+        Args:
+            signature: Signature MinHash du diff.
+            quiz: Questions du quiz.
+
+        Returns:
+            Identifiant de l'entrée.
+        """
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO entries (signature, quiz, created_at) VALUES (?, ?, ?)",
+                (struct.pack(_SIGNATURE_FORMAT, *signature), json.dumps(quiz, ensure_ascii=False), time.time())
+            )
+            entry_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO buckets (band, bucket, entry_id) VALUES (?, ?, ?)",
+                [(band, bucket, entry_id) for band, bucket in _band_keys(signature)]
+            )
+        return entry_id
+
+    def query(self, signature: List[int], threshold: float) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        """
+        Cherche le quiz du diff le plus similaire au-dessus d'un seuil.
+
+        Args:
+            signature: Signature MinHash du diff.
+            threshold: Similarité minimale (0 à 1).
+
+        Returns:
+            Tuple (similarité, quiz) ou None.
+        """
+        candidates: Set[int] = set()
+        for band, bucket in _band_keys(signature):
+            rows = self._conn.execute(
+                "SELECT entry_id FROM buckets WHERE band = ? AND bucket = ? LIMIT ?",
+                (band, bucket, MAX_CANDIDATES)
+            )
+            candidates.update(row[0] for row in rows)
+            if len(candidates) >= MAX_CANDIDATES:
+                break
+
+        best: Optional[Tuple[float, int]] = None
+        for entry_id in candidates:
+            row = self._conn.execute("SELECT signature FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            similarity = estimate_similarity(signature, list(struct.unpack(_SIGNATURE_FORMAT, row[0])))
+            if similarity >= threshold and (best is None or similarity > best[0]):
+                best = (similarity, entry_id)
+
+        if best is None:
+            return None
+        quiz_json = self._conn.execute("SELECT quiz FROM entries WHERE id = ?", (best[1],)).fetchone()[0]
+        return best[0], json.loads(quiz_json)
+
+
+def open_similarity_index(settings: Settings) -> Optional[SimilarityIndex]:
+    """
+    Ouvre l'index de similarité configuré.
+
+    Args:
+        settings: Configuration de l'application.
+
+    Returns:
+        Index ouvert, ou None si aucun répertoire de stockage n'est configuré
+        ou s'il ne peut pas être créé.
+    """
+    if not settings.quiz_store_dir:
+        return None
+    try:
+        return SimilarityIndex(os.path.join(settings.quiz_store_dir, INDEX_FILENAME))
+    except OSError as e:
+        logger.warning(f"Index de similarité ignoré, répertoire inutilisable ({settings.quiz_store_dir}) : {e}")
+        return None
@@ -0,0 +1,215 @@
+"""
+Classification locale des changements triviaux, sans appel au LLM.
+
+Documentation, commentaires, formatage, montées de version et lockfiles ne
+méritent pas de question : selon TRIVIAL_CHANGE_POLICY, un diff entièrement
+trivial passe en mode SKIP (ou se limite à une question) et un diff mixte
+voit son nombre de questions calculé sur les seules lignes substantielles.
+"""
+import os
+import re
+import logging
+from typing import List, Dict, Any, Optional
+from diffquiz.diff_parser import parse_diff
+
+logger = logging.getLogger(__name__)
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock",
+    "Pipfile.lock", "uv.lock", "Cargo.lock", "go.sum", "composer.lock", "Gemfile.lock",
+    "packages.lock.json", "mix.lock", "pubspec.lock", "flake.lock",
+}
+DOC_EXTENSIONS = {".md", ".markdown", ".rst", ".adoc", ".asciidoc"}
+DOC_NAMES = {"LICENSE", "LICENCE", "AUTHORS", "CONTRIBUTORS", "NOTICE", "CODEOWNERS"}
+# Fichiers .txt de documentation (CMakeLists.txt, requirements.txt... sont du code)
+DOC_TXT_STEMS = {"README", "CHANGELOG", "CHANGES", "HISTORY", "NEWS", "CONTRIBUTING", "AUTHORS",
+                 "LICENSE", "LICENCE", "NOTICE", "COPYING", "INSTALL", "TODO"}
+# Répertoires de documentation à la racine du dépôt, pour les seuls fichiers texte
+DOC_DIRECTORIES = ("docs/", "doc/")
+
+# Langages où l'indentation et les retours à la ligne sont significatifs
+_INDENT_SENSITIVE = {".py", ".pyw", ".pyi", ".yml", ".yaml", ".mk", ".coffee", ".haml", ".pug",
+                     ".sass", ".styl", ".nim", ".hs"}
+MAKEFILE_NAMES = {"Makefile", "makefile", "GNUmakefile"}
+
+# Commentaires de ligne selon l'extension
+_HASH_COMMENT = {".py", ".sh", ".bash", ".rb", ".pl", ".yml", ".yaml", ".toml", ".cfg", ".ini",
+                 ".conf", ".r", ".tf", ".mk", ".dockerfile"}
+_SLASH_COMMENT = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".java", ".kt", ".kts", ".scala",
+                  ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".go", ".rs", ".swift", ".php", ".dart",
+                  ".css", ".scss", ".less", ".groovy", ".gradle"}
+_DASH_COMMENT = {".sql", ".lua", ".hs"}
+
+# Chaînes (un seul jeton) puis identifiants/nombres, puis tout autre caractère
+_TOKEN = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|`[^`]*`|\w+|\S')
+
+# Ligne ne modifiant qu'un numéro de version (littéral x.y[.z...], pas une expression)
+VERSION_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'["\']?(?:version|__version__|VERSION|appVersion|app_version)["\']?\s*[:=]\s*'
+    r'(?:"v?\d+(?:\.\d+)+[\w.+-]*"|\'v?\d+(?:\.\d+)+[\w.+-]*\'|v?\d+(?:\.\d+)+[\w.+-]*),?'
+    r'|<version>v?\d+(?:\.\d+)+[\w.+-]*</version>'
+    r')\s*$'
+)
+
+# Ligne de dépendance épinglée, reconnue uniquement dans les manifestes
+DEPENDENCY_PATTERN = re.compile(
+    r'^\s*(?:'
+    r'["\']?[@\w./-]+["\']?\s*[:=]\s*["\']?[~^>=<! ]*v?\d+(?:\.\d+)+[\w.+-]*["\']?,?'
+    r'|[\w.\[\],-]+\s*(?:==|>=|~=|<=|>|<)\s*v?\d+(?:\.\d+)*[\w.+-]*'
+    r'|(?:require\s+)?[\w./-]+\s+v\d+(?:\.\d+)+[\w.+-]*(?:\s*//\s*indirect)?'
+    r')\s*$'
+)
+MANIFEST_NAMES = {
+    "package.json", "pyproject.toml", "setup.cfg", "Cargo.toml", "go.mod", "pom.xml", "build.gradle",
+    "build.gradle.kts", "Chart.yaml", "Gemfile", "composer.json", "pubspec.yaml", "mix.exs",
+}
+
+
+def _file_category(path: str) -> Optional[str]:
+    """Catégorie triviale déduite du seul chemin (lockfile ou documentation)."""
+    name = os.path.basename(path)
+    if name in LOCKFILE_NAMES:
+        return "lockfile"
+    stem, extension = os.path.splitext(name)
+    extension = extension.lower()
+    if extension in DOC_EXTENSIONS or name in DOC_NAMES:
+        return "docs"
+    if extension == ".txt" and (stem.upper() in DOC_TXT_STEMS
+                                or (path.startswith(DOC_DIRECTORIES) and not _is_manifest(path))):
+        return "docs"
+    return None
+
+
+def code_tokens(line: str, extension: str) -> List[str]:
+    """
+    Découpe une ligne de code en jetons, sans espaces ni commentaire.
+
+    Args:
+        line: Contenu de la ligne (sans le préfixe +/-).
+        extension: Extension du fichier (ex : '.py').
+
+    Returns:
+        Jetons significatifs de la ligne.
+    """
+    stripped = line.strip()
+    if extension in _SLASH_COMMENT and (stripped.startswith(('/*', '*/', '* ')) or stripped == '*'):
+        return []
+    if extension in (".html", ".htm", ".xml", ".vue", ".svg") and stripped.startswith('<!--'):
+        return []
+
+    tokens: List[str] = []
+    for token in _TOKEN.findall(line):
+        if extension in _HASH_COMMENT and token == '#':
+            break
+        if extension in _SLASH_COMMENT and token == '/' and tokens and tokens[-1] == '/':
+            tokens.pop()
+            break
+        if extension in _DASH_COMMENT and token == '-' and tokens and tokens[-1] == '-':
+            tokens.pop()
+            break
+        tokens.append(token)
+    return tokens
+
+
+def _is_manifest(path: str) -> bool:
+    """Fichier de dépendances (versions épinglées)."""
+    name = os.path.basename(path)
+    return name in MANIFEST_NAMES or (name.startswith("requirements") and name.endswith(".txt"))
+
+
+def _line_tokens(line: str, extension: str) -> List[str]:
+    """
+    Jetons d'une ligne pour la comparaison des hunks.
+
+    Pour les langages sensibles à l'indentation, chaque ligne de code commence
+    par son indentation : déplacer une instruction dans un bloc n'est pas du formatage.
+    """
+    tokens = code_tokens(line, extension)
+    if tokens and extension in _INDENT_SENSITIVE:
+        tokens.insert(0, line[:len(line) - len(line.lstrip())])
+    return tokens
+
+
+def _hunk_category(lines: List[str], extension: str, manifest: bool = False) -> Optional[str]:
+    """Catégorie triviale d'un hunk (commentaires, formatage, version) ou None."""
+    removed = [line[1:] for line in lines if line.startswith('-')]
+    added = [line[1:] for line in lines if line.startswith('+')]
+    if not removed and not added:
+        return None
+
+    removed_tokens = [t for line in removed for t in _line_tokens(line, extension)]
+    added_tokens = [t for line in added for t in _line_tokens(line, extension)]
+    if removed_tokens == added_tokens:
+        return "comments" if not added_tokens else "formatting"
+
+    changed = [line for line in removed + added if line.strip()]
+    if changed and all(VERSION_PATTERN.match(line) or (manifest and DEPENDENCY_PATTERN.match(line))
+                       for line in changed):
+        return "version_bump"
+    return None
+
+
+def classify_diff(diff_text: Optional[str]) -> Dict[str, Any]:
+    """
+    Classe les lignes modifiées d'un diff en triviales ou substantielles.
+
+    Args:
+        diff_text: Texte du diff.
+
+    Returns:
+        Dictionnaire : trivial_lines, substantive_lines et categories
+        (nombre de lignes triviales par catégorie : docs, lockfile, comments,
+        formatting, version_bump).
+    """
+    result: Dict[str, Any] = {"trivial_lines": 0, "substantive_lines": 0, "categories": {}}
+
+    for file in parse_diff(diff_text):
+        path = file["path"] or ""
+        extension = os.path.splitext(path)[1].lower()
+        if os.path.basename(path) == "Dockerfile":
+            extension = ".dockerfile"
+        elif os.path.basename(path) in MAKEFILE_NAMES:
+            extension = ".mk"
+        file_category = _file_category(path)
+
+        for hunk in file["hunks"]:
+            changed = sum(1 for line in hunk["lines"] if line.startswith(('+', '-')))
+            category = file_category or _hunk_category(hunk["lines"], extension, _is_manifest(path))
+            if category is None:
+                result["substantive_lines"] += changed
+                continue
+            result["trivial_lines"] += changed
+            result["categories"][category] = result["categories"].get(category, 0) + changed
+    return result
+
+
+def effective_changed_lines(diff_text: Optional[str], changes: int, policy: str = "skip") -> int:
+    """
+    Calcule le nombre de lignes modifiées à prendre en compte pour le quiz.
+
+    Les lignes triviales sont retirées du total ; les lignes non visibles dans
+    le texte du diff (au-delà du budget) restent comptées comme substantielles.
+
+    Args:
+        diff_text: Texte du diff.
+        changes: Nombre total de lignes modifiées.
+        policy: skip (0 si tout est trivial), reduce (au moins 1) ou off (inchangé).
+
+    Returns:
+        Nombre de lignes modifiées effectif (0 = mode SKIP).
+    """
+    if policy == "off" or not diff_text or changes <= 0:
+        return changes
+
+    classification = classify_diff(diff_text)
+    if not classification["trivial_lines"]:
+        return changes
+
+    effective = max(changes - classification["trivial_lines"], classification["substantive_lines"])
+    categories = ", ".join(f"{name} ({count})" for name, count in sorted(classification["categories"].items()))
+    logger.info(f"Changements triviaux : {classification['trivial_lines']} ligne(s) sur {changes} — {categories}")
+
+    if effective == 0 and policy == "reduce":
+        return 1
+    return effective
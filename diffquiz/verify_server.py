@@ -0,0 +1,488 @@
+"""
+Service de validation des quiz, à la place du job manuel wait-for-quiz-answer.
+
+Le job de génération enregistre le hash attendu (hash_quiz_answers) d'un
+pipeline ; le développeur soumet le code obtenu dans le rapport, comparé en
+temps constant avec un nombre d'essais limité ; le job CI attend la validation
+par long polling, sans relance manuelle ni nouveau conteneur par essai.
+
+API HTTP (JSON) :
+    PUT  /pipelines/<id>          {"expected_hash": "..."}  (jeton requis, une seule fois par pipeline)
+    POST /pipelines/<id>/answers  {"secret": "..."} ou {"answers": ["A", "B"], "variant": "..."}
+    GET  /pipelines/<id>?wait=30  statut, attendu jusqu'à la validation (au plus wait secondes)
+
+Usage :
+    python -m diffquiz.verify_server serve --port 8080 --db verify.sqlite
+    python -m diffquiz.verify_server register "$CI_PIPELINE_ID" "$EXPECTED_SECRET_HASH"
+    python -m diffquiz.verify_server wait "$CI_PIPELINE_ID"
+
+Le jeton d'enregistrement est obligatoire : sans lui, n'importe qui pourrait
+enregistrer un hash connu (ou SKIP/PASS) et valider son propre pipeline.
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import secrets
+import logging
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from diffquiz.exceptions import SecurityError, VerificationError
+from diffquiz.security import hash_quiz_answers, verify_quiz_secret
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_VALIDATED = "validated"
+STATUS_LOCKED = "locked"
+
+# Hash des pipelines sans quiz bloquant (voir generate_quiz.py)
+AUTO_VALIDATED_HASHES = ("SKIP", "PASS")
+
+# Code de sortie de `wait` quand le service ne peut pas trancher (pipeline inconnu, service injoignable)
+EXIT_UNAVAILABLE = 3
+
+MAX_WAIT_SECONDS = 60
+MAX_BODY_BYTES = 16 * 1024
+
+_PIPELINE_PATH = re.compile(r'^/pipelines/([\w.-]{1,128})(/answers)?/?$')
+
+
+class VerificationStore:
+    """
+    Hash attendus et états de validation par pipeline (SQLite, sûr entre threads).
+
+    Les requêtes sont courtes : une connexion unique protégée par un verrou
+    suffit pour des centaines de validations concurrentes. Les attentes
+    (long polling) se font sur une condition, sans requête SQL répétée.
+
+    Args:
+        path: Chemin du fichier SQLite (":memory:" pour un stockage non persistant).
+        max_attempts: Nombre d'essais erronés avant verrouillage du pipeline.
+        retention_seconds: Durée de conservation d'un pipeline.
+        clock: Fonction retournant l'heure courante (injectable pour les tests).
+    """
+
+    def __init__(
+        self,
+        path: str = ":memory:",
+        max_attempts: int = 10,
+        retention_seconds: float = 7 * 24 * 3600,
+        clock=time.time
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.retention_seconds = retention_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode = WAL;
+            CREATE TABLE IF NOT EXISTS pipelines (
+                pipeline_id TEXT PRIMARY KEY,
+                expected_hash TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                validated_at REAL
+            ) WITHOUT ROWID;
+        """)
+
+    def __enter__(self) -> "VerificationStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        with self._lock:
+            self._conn.close()
+
+    def register(self, pipeline_id: str, expected_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Enregistre le hash attendu d'un pipeline.
+
+        Les pipelines SKIP et PASS sont validés d'office. Un pipeline déjà
+        enregistré n'est jamais remplacé : seul le même hash est accepté
+        (relance du job de génération).
+
+        Args:
+            pipeline_id: Identifiant du pipeline.
+            expected_hash: Hash attendu des bonnes réponses, ou 'SKIP' / 'PASS'.
+
+        Returns:
+            État du pipeline, ou None s'il est déjà enregistré avec un autre hash.
+        """
+        now = self._clock()
+        validated = expected_hash in AUTO_VALIDATED_HASHES
+        with self._changed:
+            self._conn.execute("DELETE FROM pipelines WHERE created_at < ?", (now - self.retention_seconds,))
+            row = self._conn.execute(
+                "SELECT expected_hash FROM pipelines WHERE pipeline_id = ?", (pipeline_id,)
+            ).fetchone()
+            if row is not None:
+                self._conn.commit()
+                return self._state(pipeline_id) if row[0] == expected_hash else None
+            self._conn.execute(
+                "INSERT INTO pipelines VALUES (?, ?, ?, 0, ?, ?)",
+                (pipeline_id, expected_hash, STATUS_VALIDATED if validated else STATUS_PENDING,
+                 now, now if validated else None)
+            )
+            self._conn.commit()
+            self._changed.notify_all()
+            return self._state(pipeline_id)
+
+    def submit(self, pipeline_id: str, secret: str) -> Optional[Dict[str, Any]]:
+        """
+        Vérifie un code soumis pour un pipeline.
+
+        Args:
+            pipeline_id: Identifiant du pipeline.
+            secret: Code obtenu dans le rapport.
+
+        Returns:
+            État du pipeline avec "valid" (résultat de cet essai), ou None si le pipeline est inconnu.
+        """
+        with self._changed:
+            row = self._conn.execute(
+                "SELECT expected_hash, status, attempts FROM pipelines WHERE pipeline_id = ?", (pipeline_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            expected_hash, status, attempts = row
+            # Pipeline verrouillé : plus aucune comparaison ; déjà validé : pas de décompte
+            valid = status != STATUS_LOCKED and verify_quiz_secret(secret, expected_hash)
+            if status != STATUS_PENDING:
+                return dict(self._state(pipeline_id), valid=valid)
+            if valid:
+                self._conn.execute(
+                    "UPDATE pipelines SET status = ?, validated_at = ? WHERE pipeline_id = ?",
+                    (STATUS_VALIDATED, self._clock(), pipeline_id)
+                )
+            else:
+                attempts += 1
+                status = STATUS_LOCKED if attempts >= self.max_attempts else STATUS_PENDING
+                self._conn.execute(
+                    "UPDATE pipelines SET attempts = ?, status = ? WHERE pipeline_id = ?",
+                    (attempts, status, pipeline_id)
+                )
+            self._conn.commit()
+            self._changed.notify_all()
+            return dict(self._state(pipeline_id), valid=valid)
+
+    def status(self, pipeline_id: str, wait: float = 0.0) -> Optional[Dict[str, Any]]:
+        """
+        État d'un pipeline, en attendant au plus `wait` secondes qu'il ne soit plus en attente.
+
+        Args:
+            pipeline_id: Identifiant du pipeline.
+            wait: Durée maximale d'attente (long polling).
+
+        Returns:
+            État du pipeline, ou None s'il est inconnu.
+        """
+        deadline = time.monotonic() + wait
+        with self._changed:
+            state = self._state(pipeline_id)
+            while state is not None and state["status"] == STATUS_PENDING:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._changed.wait(remaining)
+                state = self._state(pipeline_id)
+            return state
+
+    def _state(self, pipeline_id: str) -> Optional[Dict[str, Any]]:
+        """État public d'un pipeline (sans le hash attendu). Verrou tenu par l'appelant."""
+        row = self._conn.execute(
+            "SELECT status, attempts FROM pipelines WHERE pipeline_id = ?", (pipeline_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        status, attempts = row
+        return {
+            "pipeline_id": pipeline_id,
+            "status": status,
+            "attempts": attempts,
+            "attempts_left": max(self.max_attempts - attempts, 0),
+        }
+
+
+class VerificationHandler(BaseHTTPRequestHandler):
+    """Requêtes HTTP du service (voir la documentation du module)."""
+
+    server_version = "DiffQuizVerify"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def store(self) -> VerificationStore:
+        return self.server.store
+
+    def do_GET(self) -> None:
+        pipeline_id, answers = self._route()
+        if pipeline_id is None or answers:
+            return self._reply(404, {"error": "Ressource inconnue"})
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        try:
+            wait = min(max(float(query.get("wait", ["0"])[0]), 0.0), MAX_WAIT_SECONDS)
+        except ValueError:
+            return self._reply(400, {"error": "Paramètre wait invalide"})
+        state = self.store.status(pipeline_id, wait)
+        if state is None:
+            return self._reply(404, {"error": f"Pipeline {pipeline_id} inconnu"})
+        self._reply(200, state)
+
+    def do_PUT(self) -> None:
+        body = self._body()
+        pipeline_id, answers = self._route()
+        if pipeline_id is None or answers:
+            return self._reply(404, {"error": "Ressource inconnue"})
+        authorization = self.headers.get("Authorization", "").encode("utf-8")
+        if not secrets.compare_digest(authorization, f"Bearer {self.server.token}".encode("utf-8")):
+            return self._reply(401, {"error": "Jeton d'enregistrement invalide"})
+        expected_hash = body.get("expected_hash") if body else None
+        if not isinstance(expected_hash, str) or not expected_hash:
+            return self._reply(400, {"error": "Champ expected_hash requis"})
+        state = self.store.register(pipeline_id, expected_hash)
+        if state is None:
+            return self._reply(409, {"error": f"Pipeline {pipeline_id} déjà enregistré"})
+        self._reply(200, state)
+
+    def do_POST(self) -> None:
+        body = self._body() or {}
+        pipeline_id, answers = self._route()
+        if pipeline_id is None or not answers:
+            return self._reply(404, {"error": "Ressource inconnue"})
+        secret = body.get("secret")
+        if isinstance(body.get("answers"), list):
+            variant = body.get("variant") or ""
+            if not isinstance(variant, str):
+                return self._reply(400, {"error": "Champ variant invalide"})
+            try:
+                secret = hash_quiz_answers(body["answers"], variant)
+            except SecurityError as e:
+                return self._reply(400, {"error": str(e)})
+        if not isinstance(secret, str) or not secret:
+            return self._reply(400, {"error": "Champ secret ou answers requis"})
+        state = self.store.submit(pipeline_id, secret)
+        if state is None:
+            return self._reply(404, {"error": f"Pipeline {pipeline_id} inconnu"})
+        self._reply(429 if state["status"] == STATUS_LOCKED else 200, state)
+
+    def _route(self) -> Tuple[Optional[str], bool]:
+        """Pipeline visé et indicateur de la ressource /answers."""
+        match = _PIPELINE_PATH.match(urllib.parse.urlsplit(self.path).path)
+        if not match:
+            return None, False
+        return match.group(1), bool(match.group(2))
+
+    def _body(self) -> Optional[Dict[str, Any]]:
+        """Corps JSON de la requête (None s'il est absent, trop gros ou invalide)."""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length > MAX_BODY_BYTES or length < 0:
+            # Corps non lu : la connexion ne peut pas être réutilisée
+            self.close_connection = True
+            return None
+        if length == 0:
+            return None
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+
+    def _reply(self, code: int, payload: Dict[str, Any]) -> None:
+        """Réponse JSON (connexion conservée pour le client)."""
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+
+class VerificationServer(ThreadingHTTPServer):
+    """
+    Serveur HTTP du service : un thread par connexion, file d'attente élargie.
+
+    Args:
+        address: Adresse d'écoute (hôte, port).
+        store: Stockage des validations.
+        token: Jeton exigé pour enregistrer un hash.
+
+    Raises:
+        ValueError: Si le jeton est vide.
+    """
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address: Tuple[str, int], store: VerificationStore, token: str):
+        if not token:
+            raise ValueError("Jeton d'enregistrement requis")
+        super().__init__(address, VerificationHandler)
+        self.store = store
+        self.token = token
+
+
+def _request(method: str, url: str, body: Optional[Dict[str, Any]] = None,
+             token: Optional[str] = None, timeout: float = 10.0) -> Dict[str, Any]:
+    """Requête JSON vers le service ; les erreurs HTTP sont retournées avec leur statut."""
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        try:
+            payload = json.loads(e.read())
+        except ValueError:
+            payload = {}
+        return dict(payload, http_status=e.code)
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise VerificationError(f"Service de validation injoignable ({url}) : {e}") from e
+
+
+def register_hash(base_url: str, pipeline_id: str, expected_hash: str, token: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Enregistre le hash attendu d'un pipeline auprès du service.
+
+    Args:
+        base_url: URL du service.
+        pipeline_id: Identifiant du pipeline.
+        expected_hash: Hash attendu (EXPECTED_SECRET_HASH).
+        token: Jeton d'enregistrement.
+
+    Returns:
+        État du pipeline.
+
+    Raises:
+        VerificationError: Si le service est injoignable ou refuse l'enregistrement.
+    """
+    state = _request("PUT", f"{base_url.rstrip('/')}/pipelines/{pipeline_id}", {"expected_hash": expected_hash}, token)
+    if "http_status" in state:
+        raise VerificationError(f"Enregistrement refusé ({state['http_status']}) : {state.get('error')}")
+    return state
+
+
+def wait_for_validation(
+    base_url: str,
+    pipeline_id: str,
+    timeout: float,
+    poll_seconds: float = 30.0
+) -> Optional[Dict[str, Any]]:
+    """
+    Attend la validation d'un pipeline par long polling.
+
+    Args:
+        base_url: URL du service.
+        pipeline_id: Identifiant du pipeline.
+        timeout: Durée maximale d'attente en secondes.
+        poll_seconds: Durée de chaque requête d'attente.
+
+    Returns:
+        Dernier état connu (status pending si le délai est écoulé), ou None si
+        le pipeline est inconnu du service (enregistrement échoué).
+
+    Raises:
+        VerificationError: Si le service est injoignable ou répond en erreur.
+    """
+    url = f"{base_url.rstrip('/')}/pipelines/{pipeline_id}"
+    deadline = time.monotonic() + timeout
+    while True:
+        wait = max(min(poll_seconds, deadline - time.monotonic(), MAX_WAIT_SECONDS), 0)
+        state = _request("GET", f"{url}?wait={wait:.0f}", timeout=wait + 10)
+        if state.get("http_status") == 404:
+            return None
+        if "http_status" in state:
+            raise VerificationError(f"Statut indisponible ({state['http_status']}) : {state.get('error')}")
+        if state["status"] != STATUS_PENDING or time.monotonic() >= deadline:
+            return state
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Analyse les arguments de la ligne de commande."""
+    url = os.environ.get("DIFFQUIZ_VERIFY_URL")
+    token = os.environ.get("DIFFQUIZ_VERIFY_TOKEN")
+    parser = argparse.ArgumentParser(description="Service de validation des quiz DiffQuiz.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Démarre le service")
+    serve.add_argument("--host", default="0.0.0.0", help="Adresse d'écoute (défaut : 0.0.0.0)")
+    serve.add_argument("--port", type=int, default=8080, help="Port d'écoute (défaut : 8080)")
+    serve.add_argument("--db", default="diffquiz_verify.sqlite", help="Fichier SQLite des validations")
+    serve.add_argument("--max-attempts", type=int, default=10, help="Essais erronés avant verrouillage (défaut : 10)")
+    serve.add_argument("--token", default=token, help="Jeton d'enregistrement, requis (défaut : DIFFQUIZ_VERIFY_TOKEN)")
+
+    register = commands.add_parser("register", help="Enregistre le hash attendu d'un pipeline")
+    register.add_argument("pipeline_id")
+    register.add_argument("expected_hash")
+    register.add_argument("--url", default=url, required=url is None, help="URL du service (défaut : DIFFQUIZ_VERIFY_URL)")
+    register.add_argument("--token", default=token, help="Jeton d'enregistrement (défaut : DIFFQUIZ_VERIFY_TOKEN)")
+
+    wait = commands.add_parser("wait", help="Attend la validation d'un pipeline (job CI)")
+    wait.add_argument("pipeline_id")
+    wait.add_argument("--url", default=url, required=url is None, help="URL du service (défaut : DIFFQUIZ_VERIFY_URL)")
+    wait.add_argument("--timeout", type=float, default=3600, help="Attente maximale en secondes (défaut : 3600)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Point d'entrée : python -m diffquiz.verify_server."""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    args = parse_args(argv)
+    try:
+        if args.command == "register":
+            state = register_hash(args.url, args.pipeline_id, args.expected_hash, args.token)
+            logger.info(f"Hash enregistré pour le pipeline {args.pipeline_id} (statut : {state['status']})")
+            return 0
+        if args.command == "wait":
+            logger.info(f"Attente de la validation du quiz du pipeline {args.pipeline_id}...")
+            state = wait_for_validation(args.url, args.pipeline_id, args.timeout)
+            if state is None:
+                logger.warning(f"Pipeline {args.pipeline_id} inconnu du service de validation")
+                return EXIT_UNAVAILABLE
+            logger.info(f"Pipeline {args.pipeline_id} : {state['status']} ({state['attempts']} essai(s) erroné(s))")
+            return 0 if state["status"] == STATUS_VALIDATED else 1
+    except VerificationError as e:
+        logger.error(str(e))
+        return EXIT_UNAVAILABLE if args.command == "wait" else 1
+
+    if not args.token:
+        logger.error("Jeton d'enregistrement requis : --token ou DIFFQUIZ_VERIFY_TOKEN")
+        return 1
+
+    with VerificationStore(args.db, max_attempts=args.max_attempts) as store:
+        server = VerificationServer((args.host, args.port), store, args.token)
+        logger.info(f"Service de validation à l'écoute sur {args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
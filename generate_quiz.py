@@ -5,8 +5,12 @@ Génère un quiz basé sur les modifications Git pour valider les connaissances
 """
 import os
 import sys
+import time
+import random
 import logging
-from typing import Optional
+import argparse
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 # Configuration du logging
 logging.basicConfig(
@@ -17,11 +21,25 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from diffquiz.config import get_settings
-from diffquiz.git_utils import get_git_diff, calculate_question_count
-from diffquiz.quiz_generator import generate_quiz
-from diffquiz.html_generator import generate_html
-from diffquiz.security import hash_quiz_answers
-from diffquiz.exceptions import DiffQuizError, GitDiffError, QuizGenerationError
+from diffquiz.deadline import Deadline
+from diffquiz.git_utils import fetch_git_diff, count_changed_lines, get_head_sha, is_ancestor
+from diffquiz.diff_input import read_diff_file, read_diff_stream
+from diffquiz.diff_parser import parse_diff, format_diff
+from diffquiz.question_bank import HunkKey, diff_hunk_keys, restrict_to_hunks
+from diffquiz.diff_range import resolve_diff_range, get_commit_attribution
+from diffquiz.incremental import (
+    get_merge_request_id, get_merge_request_base, incremental_state_path,
+    load_incremental_state, save_incremental_state, merge_quizzes
+)
+from diffquiz.api import QuizClient, get_repository_id, timed, STATUS_OK, STATUS_SKIP, STATUS_PASS, SOURCE_NOTES
+from diffquiz.llm_client import warm_up_connection, close_warm_connections, record_llm_usage, summarize_usage
+from diffquiz.models import parse_quiz, dump_quiz
+from diffquiz.quiz_generator import quiz_seed
+from diffquiz.quiz_notes import find_pregenerated_quiz
+from diffquiz.quiz_artifact import QuizArtifact, write_artifact, load_artifact, render_artifact, draw_from_pool
+from diffquiz.security import hash_quiz_answers, quiz_variant
+from diffquiz.profiling import RunProfiler, profile_stage
+from diffquiz.exceptions import DiffQuizError, GitDiffError, QuizGenerationError, DeadlineExceededError
 
 
 def _write_pass_mode_files(error_reason: str) -> None:
@@ -36,6 +54,114 @@ def _write_pass_mode_files(error_reason: str) -> None:
         f.write("EXPECTED_SECRET_HASH=PASS\n")
     with open("quiz_report.html", "w", encoding="utf-8") as f:
         f.write("<h1>Erreur IA - Utilisez le code 'PASS' pour valider.</h1>")
+    write_artifact(QuizArtifact(status=STATUS_PASS, error=error_reason))
+
+
+def _write_output(path: str, content: Union[str, Iterable[str]]) -> None:
+    """
+    Écrit un fichier de sortie (exécuté en parallèle des autres écritures).
+    
+    Args:
+        path: Chemin du fichier.
+        content: Contenu texte, ou fragments écrits au fil du rendu.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines([content] if isinstance(content, str) else content)
+    logger.info(f"✅ Fichier sauvegardé : {path}")
+
+
+def _load_incremental(settings, deadline: Deadline) -> Optional[Dict[str, Any]]:
+    """
+    Prépare le mode incrémental : état quizzé de la MR et commit courant.
+    
+    Args:
+        settings: Configuration de l'application.
+        deadline: Budget de temps global du job.
+        
+    Returns:
+        Contexte (path, head_sha, base_sha, state) ou None hors d'une MR.
+        state vaut None si la MR n'a pas encore été quizzée ou si son historique a été réécrit.
+    """
+    merge_request_id = get_merge_request_id()
+    path = incremental_state_path(settings, get_repository_id(), merge_request_id) if merge_request_id else None
+    if not path:
+        logger.info("ℹ️ Mode incrémental ignoré (pas de merge request ou QUIZ_STORE_DIR absent)")
+        return None
+    
+    head_sha = get_head_sha(settings.git_timeout_seconds, deadline)
+    if not head_sha:
+        return None
+    base_sha = get_merge_request_base()
+    state = load_incremental_state(path)
+    if state and (state.get("base_sha") != base_sha
+                  or not is_ancestor(state["head_sha"], head_sha, settings.git_timeout_seconds, deadline)):
+        logger.info("🔁 Historique de la MR réécrit (rebase, force-push) : quiz complet")
+        state = None
+    elif state:
+        logger.info(f"🔁 Quiz incrémental depuis {state['head_sha'][:8]} ({len(state['quiz'])} question(s) à reprendre)")
+    return {"path": path, "head_sha": head_sha, "base_sha": base_sha, "state": state}
+
+
+def _drop_covered_hunks(diff: str, changes: int, covered: List[HunkKey]) -> Tuple[Optional[str], int]:
+    """
+    Retire du delta les hunks déjà quizzés (ex : modification annulée puis refaite).
+    
+    Args:
+        diff: Texte du delta.
+        changes: Nombre de lignes modifiées du delta.
+        covered: Clés des hunks déjà couverts.
+        
+    Returns:
+        Tuple (delta réduit ou None s'il ne reste rien, nombre de lignes modifiées).
+    """
+    files = parse_diff(diff)
+    keys = diff_hunk_keys(files)
+    covered_set = set(covered)
+    remaining = [key for key in keys if key not in covered_set]
+    if len(remaining) == len(keys):
+        return diff, changes
+    
+    logger.info(f"🔁 {len(keys) - len(remaining)} hunk(s) du delta déjà quizzé(s)")
+    if not remaining:
+        return None, 0
+    reduced = format_diff(restrict_to_hunks(files, remaining))
+    return reduced, count_changed_lines(reduced)
+
+
+def _finish_incremental(
+    settings,
+    incremental: Dict[str, Any],
+    diff: Optional[str],
+    generated: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Combine les questions reprises et celles du delta, puis enregistre l'état de la MR.
+    
+    Args:
+        settings: Configuration de l'application.
+        incremental: Contexte retourné par _load_incremental.
+        diff: Delta quizzé (None si aucun nouveau hunk).
+        generated: Questions du delta.
+        
+    Returns:
+        Quiz complet de la MR.
+    """
+    previous = incremental["state"]
+    carried = previous["quiz"] if previous else []
+    quiz = merge_quizzes(carried, generated, settings.max_questions)
+    
+    hunks = list(previous["hunks"]) if previous else []
+    for key in diff_hunk_keys(parse_diff(diff)):
+        if key not in hunks:
+            hunks.append(key)
+    try:
+        save_incremental_state(incremental["path"], incremental["base_sha"], incremental["head_sha"], hunks, quiz)
+    except OSError as e:
+        logger.warning(f"⚠️ Impossible d'enregistrer l'état incrémental : {e}")
+    
+    if carried:
+        logger.info(f"🔁 {len(quiz) - len(generated)} question(s) reprise(s), {len(generated)} nouvelle(s)")
+    return quiz
 
 
 def get_commit_url() -> Optional[str]:
@@ -63,13 +189,151 @@ def get_commit_url() -> Optional[str]:
     return None
 
 
-def main() -> int:
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Analyse les arguments de la ligne de commande.
+    
+    Args:
+        argv: Arguments (par défaut sys.argv[1:]).
+        
+    Returns:
+        Arguments analysés.
+    """
+    parser = argparse.ArgumentParser(description="Génère un quiz à partir du dernier commit Git.")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=os.environ.get("DIFFQUIZ_PROFILE", "").lower() in ("true", "1", "yes"),
+        help="Enregistre un profil cProfile/tracemalloc (quiz_profile.pstats, quiz_profile.txt). "
+             "Équivalent : DIFFQUIZ_PROFILE=1"
+    )
+    parser.add_argument(
+        "--diff-file",
+        metavar="PATH",
+        help="Utilise un diff pré-calculé au lieu de lancer git ('-' pour l'entrée standard)"
+    )
+    parser.add_argument(
+        "--from-json",
+        metavar="PATH",
+        help="Re-rend quiz_report.html et quiz.env depuis un quiz.json (ou quiz.json.gz), sans git ni LLM"
+    )
+    parser.add_argument(
+        "--draw-from-pool",
+        metavar="PATH",
+        help="Tire une nouvelle variante du quiz dans le pool d'un quiz.json (QUIZ_POOL_FACTOR), sans git ni LLM"
+    )
+    parser.add_argument(
+        "--seed",
+        help="Graine du tirage --draw-from-pool (ex : identifiant du développeur ou numéro de tentative), "
+             "aléatoire par défaut"
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """
     Fonction principale.
     
+    Args:
+        argv: Arguments de la ligne de commande (par défaut sys.argv[1:]).
+    
     Returns:
         Code de sortie (0 = succès, 1 = erreur).
     """
+    args = parse_args(argv)
+    if args.from_json:
+        return render_from_json(args.from_json)
+    if args.draw_from_pool:
+        return draw_quiz_from_pool(args.draw_from_pool, args.seed)
+    if not args.profile:
+        return run(diff_file=args.diff_file)
+    
+    profiler = RunProfiler()
+    profiler.start()
+    try:
+        return run(profiler, diff_file=args.diff_file)
+    finally:
+        profiler.stop()
+        try:
+            profiler.write_reports()
+        except OSError as e:
+            logger.error(f"❌ Impossible d'écrire les rapports de profilage : {e}")
+
+
+def render_from_json(path: str) -> int:
+    """
+    Re-rend le rapport d'un quiz déjà généré, sans git ni appel au LLM.
+    
+    Args:
+        path: Chemin de quiz.json (ou quiz.json.gz).
+    
+    Returns:
+        Code de sortie (0 = succès, 1 = erreur).
+    """
+    try:
+        settings = get_settings()
+    except Exception as e:
+        logger.error(f"❌ Erreur de configuration : {e}")
+        return 1
+    try:
+        artifact = load_artifact(path)
+        secret_hash = render_artifact(artifact, "quiz_report.html", settings.html_offline)
+        _write_output("quiz.env", f"EXPECTED_SECRET_HASH={secret_hash}\n")
+    except (OSError, DiffQuizError) as e:
+        logger.error(f"❌ Impossible de re-rendre le quiz depuis {path} : {e}")
+        return 1
+    logger.info(f"✅ Rapport re-rendu depuis {path} ({len(artifact.questions)} questions, sans LLM)")
+    return 0
+
+
+def draw_quiz_from_pool(path: str, seed: Optional[str] = None) -> int:
+    """
+    Tire une nouvelle variante d'un quiz dans son pool, sans git ni appel au LLM.
+    
+    Écrit quiz_report.html, quiz.env (nouveau hash attendu) et quiz.json.
+    
+    Args:
+        path: Chemin de quiz.json (ou quiz.json.gz) généré avec QUIZ_POOL_FACTOR.
+        seed: Graine du tirage (même graine, même variante), aléatoire si absente.
+    
+    Returns:
+        Code de sortie (0 = succès, 1 = erreur).
+    """
+    try:
+        settings = get_settings()
+    except Exception as e:
+        logger.error(f"❌ Erreur de configuration : {e}")
+        return 1
+    rng = random.Random(quiz_seed(seed)) if seed else None
+    try:
+        artifact = draw_from_pool(load_artifact(path), rng)
+        secret_hash = render_artifact(artifact, "quiz_report.html", settings.html_offline)
+        _write_output("quiz.env", f"EXPECTED_SECRET_HASH={secret_hash}\n")
+        write_artifact(artifact)
+    except (OSError, DiffQuizError) as e:
+        logger.error(f"❌ Impossible de tirer un quiz depuis {path} : {e}")
+        return 1
+    logger.info(
+        f"✅ Variante tirée depuis {path} : {len(artifact.questions)} questions "
+        f"parmi {len(artifact.pool)}, sans LLM"
+    )
+    return 0
+
+
+def run(profiler: Optional[RunProfiler] = None, diff_file: Optional[str] = None) -> int:
+    """
+    Exécute la génération du quiz.
+    
+    Args:
+        profiler: Profileur actif (mode --profile) ou None.
+        diff_file: Chemin d'un diff pré-calculé ('-' pour l'entrée standard), sinon git est utilisé.
+    
+    Returns:
+        Code de sortie (0 = succès, 1 = erreur).
+    """
+    client: Optional[QuizClient] = None
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
     try:
         logger.info("🚀 Démarrage du Compliance Guard...")
         
@@ -81,65 +345,166 @@ def main() -> int:
             logger.error(f"❌ Erreur de configuration : {e}")
             return 1
         
-        # 1. Récupération du Diff
-        try:
-            diff = get_git_diff()
-        except GitDiffError as e:
-            logger.error(f"❌ {e}")
-            return 1
+        # Budget de temps global, partagé par toutes les étapes
+        deadline = Deadline.from_settings(settings)
         
-        if not diff:
-            logger.info("ℹ️ Aucun diff significatif trouvé. Mode SKIP.")
-            with open("quiz.env", "w", encoding="utf-8") as f:
-                f.write("EXPECTED_SECRET_HASH=SKIP\n")
-            return 0
+        # Pipeline : connexion à l'API pré-ouverte pendant git, gabarit HTML et
+        # enregistrements locaux pendant l'appel LLM, écritures en parallèle
+        client = QuizClient(settings)
+        if settings.llm_connection_warmup:
+            threading.Thread(
+                target=warm_up_connection, args=(settings,), name="diffquiz-warmup", daemon=True
+            ).start()
         
-        # 2. Calcul du nombre de questions
-        count = calculate_question_count(
-            diff,
-            lines_per_question=settings.lines_per_question,
-            max_questions=settings.max_questions
-        )
-        logger.info(f"📝 Analyse du code : {len(diff)} caractères. Génération de {count} question(s)...")
-        
-        # 3. Génération du quiz
-        try:
-            quiz = generate_quiz(diff, count, settings)
-        except QuizGenerationError as e:
-            logger.error(f"❌ Erreur lors de la génération du quiz : {e}")
-            _write_pass_mode_files("Erreur lors de la génération du quiz")
-            return 0
-        
-        if not quiz:
-            logger.warning("⚠️ Échec de la génération du quiz (Erreur IA/Réseau). Mode PASS activé.")
-            _write_pass_mode_files("Erreur IA/Réseau")
-            return 0
+        with profile_stage(profiler, "diff"), timed(timings, "diff"):
+            # 1. Récupération du Diff (fichier/entrée standard ou git)
+            incremental = None
+            previous = None
+            commits = None
+            pregenerated = None
+            try:
+                if diff_file == "-":
+                    diff, changes = read_diff_stream(sys.stdin.buffer, max_chars=settings.max_diff_length)
+                elif diff_file:
+                    diff, changes = read_diff_file(diff_file, max_chars=settings.max_diff_length)
+                else:
+                    # Mode incrémental : seul le delta depuis le dernier push quizzé de la MR
+                    if settings.incremental_mode:
+                        incremental = _load_incremental(settings, deadline)
+                    previous = incremental["state"] if incremental else None
+                    # Intervalle : dernier commit, push complet ou merge request (un seul diff agrégé)
+                    base, head = resolve_diff_range(settings, deadline)
+                    if previous:
+                        base = previous["head_sha"]
+                    commits = get_commit_attribution(base, head, settings, deadline)
+                    diff, changes = fetch_git_diff(
+                        base=base,
+                        head=head,
+                        max_chars=settings.max_diff_length,
+                        exclude_patterns=settings.diff_exclude_pattern_list,
+                        timeout=settings.git_timeout_seconds,
+                        deadline=deadline,
+                        compaction_min_repeats=settings.diff_compaction_min_repeats
+                    )
+                    # Quiz pré-généré par le hook pre-push du développeur (notes git)
+                    if settings.quiz_notes_lookup and diff and not previous:
+                        pregenerated = find_pregenerated_quiz(head, diff, settings, deadline)
+            except DeadlineExceededError as e:
+                logger.error(f"❌ {e}")
+                _write_pass_mode_files("Budget de temps épuisé")
+                return 0
+            except GitDiffError as e:
+                logger.error(f"❌ {e}")
+                return 1
+            
+            if diff and previous:
+                diff, changes = _drop_covered_hunks(diff, changes, previous["hunks"])
+            
+            # Changements triviaux écartés, refactorings mécaniques compactés
+            diff, changes = client.prepare(diff, changes)
+            
+            if not diff and not previous:
+                logger.info("ℹ️ Aucun diff significatif trouvé. Mode SKIP.")
+                with open("quiz.env", "w", encoding="utf-8") as f:
+                    f.write("EXPECTED_SECRET_HASH=SKIP\n")
+                write_artifact(QuizArtifact(status=STATUS_SKIP))
+                return 0
+            
+            # 2. Calcul du nombre de questions (sur le diff complet, même tronqué à la lecture)
+            count = client.question_count(changes)
+            if diff:
+                logger.info(f"📝 Analyse du code : {len(diff)} caractères. Génération de {count} question(s)...")
         
-        # 4. Calcul du hash des réponses correctes (code secret basé sur les réponses)
-        # Le code secret est le hash des bonnes réponses - jamais présent dans le HTML initial
-        correct_answers = [q['answer'] for q in quiz]
-        secret_hash = hash_quiz_answers(correct_answers)
-        logger.info(f"✅ Hash des réponses calculé (code secret basé sur {len(correct_answers)} réponses)")
+        with profile_stage(profiler, "generate"), timed(timings, "generate"), record_llm_usage() as usage:
+            # 3. Génération du quiz (ou réutilisation du quiz d'un diff quasi identique)
+            commit_url = get_commit_url()
+            template = client.template()
+            quiz: List[Dict[str, Any]] = []
+            pool: List[Dict[str, Any]] = []
+            source = None
+            explanations = None
+            if pregenerated is not None:
+                logger.info("⚡ Quiz pré-généré trouvé dans les notes git : aucun appel au LLM")
+                quiz, pool, source = dump_quiz(pregenerated.questions), dump_quiz(pregenerated.pool), SOURCE_NOTES
+            elif diff:
+                try:
+                    # Index locaux (diff similaire, banque de questions) puis LLM pour le reste
+                    # Deux phases : retour dès les questions, explications générées en tâche de fond
+                    quiz, source, pool, explanations = client.start_quiz(
+                        diff, count, get_repository_id(), deadline, commits=commits
+                    )
+                except DeadlineExceededError as e:
+                    logger.error(f"❌ {e}")
+                    _write_pass_mode_files("Budget de temps épuisé")
+                    return 0
+                except QuizGenerationError as e:
+                    logger.error(f"❌ Erreur lors de la génération du quiz : {e}")
+                    _write_pass_mode_files("Erreur lors de la génération du quiz")
+                    return 0
+                
+                if not quiz:
+                    logger.warning("⚠️ Échec de la génération du quiz (Erreur IA/Réseau). Mode PASS activé.")
+                    _write_pass_mode_files("Erreur IA/Réseau")
+                    return 0
+            
+            if incremental:
+                # Reprise des questions des pushs précédents et mise à jour de l'état de la MR
+                # (le pool ne couvre que le delta : pas de tirage de variantes)
+                quiz = _finish_incremental(settings, incremental, diff, client.apply_explanations(quiz, explanations))
+                pool, explanations = [], None
         
-        # 5. Génération du HTML (sans code secret en clair)
-        commit_url = get_commit_url()
-        html_content = generate_html(quiz, correct_answers, commit_url)
+        with profile_stage(profiler, "parse"):
+            questions = parse_quiz(quiz)
         
-        # 6. Sauvegarde des fichiers
-        try:
-            # Sauvegarde HTML
-            with open("quiz_report.html", "w", encoding="utf-8") as f:
-                f.write(html_content)
-            logger.info("✅ Fichier HTML sauvegardé : quiz_report.html")
+        with profile_stage(profiler, "render"):
+            # 4. Calcul du hash des réponses correctes (code secret basé sur les réponses)
+            # Le code secret est le hash des bonnes réponses - jamais présent dans le HTML initial
+            # Quiz tiré dans un pool : code lié aux questions tirées (variantes distinctes)
+            variant = quiz_variant([q.question for q in questions]) if pool else ""
+            secret_hash = hash_quiz_answers([q.answer for q in questions], variant)
+            logger.info(f"✅ Hash des réponses calculé (code secret basé sur {len(quiz)} réponses)")
             
-            # Sauvegarde du hash attendu (le code secret sera calculé côté client après validation)
-            with open("quiz.env", "w", encoding="utf-8") as f:
-                f.write(f"EXPECTED_SECRET_HASH={secret_hash}\n")
-            logger.info("✅ Hash attendu sauvegardé : quiz.env")
-            
-        except Exception as e:
-            logger.error(f"❌ Erreur lors de la sauvegarde des fichiers : {e}")
-            return 1
+            try:
+                writes = []
+                if explanations is not None:
+                    # Le hash ne dépend pas des explications : quiz.env écrit sans les attendre
+                    _write_output("quiz.env", f"EXPECTED_SECRET_HASH={secret_hash}\n")
+                    with timed(timings, "explanations"):
+                        quiz = client.apply_explanations(quiz, explanations)
+                        pool = client.apply_explanations(pool, explanations)
+                    questions = parse_quiz(quiz)
+                else:
+                    writes.append(client.submit(_write_output, "quiz.env", f"EXPECTED_SECRET_HASH={secret_hash}\n"))
+                
+                # Résultat structuré (quiz.json) : questions, hash, modèle, tokens et durées
+                model, usage_totals = summarize_usage(usage)
+                artifact = QuizArtifact(
+                    status=STATUS_OK,
+                    questions=questions,
+                    pool=parse_quiz(pool) if pool else [],
+                    commit_url=commit_url,
+                    repository=get_repository_id(),
+                    source=source,
+                    model=model,
+                    usage=usage_totals,
+                    timings=dict(timings, total=time.perf_counter() - started),
+                )
+                
+                # 5. Génération du HTML (sans code secret en clair) dans le gabarit compilé pendant l'appel LLM,
+                # rendu directement dans le fichier
+                # 6. Sauvegarde des fichiers, en parallèle : rapport HTML, hash attendu et quiz.json
+                # (le code secret sera calculé côté client après validation)
+                template.result()
+                writes += [
+                    client.submit(_write_output, "quiz_report.html", client.stream(questions, commit_url, variant)),
+                    client.submit(write_artifact, artifact, ".", settings.quiz_json_compressed),
+                ]
+                for write in writes:
+                    write.result()
+                
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de la sauvegarde des fichiers : {e}")
+                return 1
         
         logger.info("✅ Quiz généré avec succès.")
         logger.info("👉 Ouvrez l'artifact 'quiz_report.html' pour répondre aux questions.")
@@ -152,6 +517,11 @@ def main() -> int:
     except Exception as e:
         logger.error(f"❌ Erreur inattendue : {e}", exc_info=True)
         return 1
+    finally:
+        if client is not None:
+            # Attendre les enregistrements locaux (banque, index) avant de quitter
+            client.close()
+        close_warm_connections()
 
 
 if __name__ == "__main__":
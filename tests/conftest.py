@@ -0,0 +1,91 @@
+"""
+Fixtures partagées des tests.
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from diffquiz import api
+from diffquiz.config import Settings
+from diffquiz.llm_client import close_warm_connections
+
+
+class FakeClock:
+    """Horloge contrôlable pour les tests."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Horloge contrôlable, avancée en modifiant clock.now."""
+    return FakeClock()
+
+
+class _LLMHandler(BaseHTTPRequestHandler):
+    """Répond un quiz vide, après server.delay secondes, en enregistrant client et payload."""
+
+    def do_POST(self):
+        self.server.clients.append(self.client_address)
+        self.server.payloads.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+        time.sleep(self.server.delay)
+        body = json.dumps({
+            "model": "llama3:8b", "message": {"content": "[]"}, "prompt_eval_count": 120, "eval_count": 30
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def llm_server(monkeypatch):
+    """Serveur LLM local (format Ollama) : clients, payloads et délai de réponse sur le serveur."""
+    monkeypatch.delenv("http_proxy", raising=False)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    server = HTTPServer(("127.0.0.1", 0), _LLMHandler)
+    server.clients, server.payloads, server.delay = [], [], 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    close_warm_connections()
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def llm_settings(llm_server):
+    """Configuration pointant vers le serveur LLM local, sans disjoncteur."""
+    return Settings(
+        llm_api_key="test-key",
+        llm_api_url=f"http://127.0.0.1:{llm_server.server_port}/api/chat",
+        circuit_breaker_enabled=False
+    )
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Remplace la génération par le LLM et compte les appels."""
+    calls = []
+
+    def fake_generate_quiz(diff_text, count, settings, deadline=None, context=None, commits=None, explain=True):
+        calls.append(count)
+        return [{
+            "question": f"Q{len(calls)}-{i}?",
+            "options": ["A) Oui", "B) Non"],
+            "answer": "A",
+            "explanation": "Car.",
+            "file": "app.py"
+        } for i in range(count)], settings.llm_fast_model or settings.llm_model
+
+    monkeypatch.setattr(api, "generate_quiz_with_model", fake_generate_quiz)
+    return calls
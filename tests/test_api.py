@@ -0,0 +1,193 @@
+"""
+Tests pour le module api.
+"""
+import os
+import sys
+import json
+import threading
+import subprocess
+import pytest
+from diffquiz import api, quiz_generator
+from diffquiz.api import QuizClient, QuizOptions, STATUS_OK, STATUS_SKIP, STATUS_PASS
+from diffquiz.config import Settings
+from diffquiz.exceptions import QuizGenerationError
+from diffquiz.diff_parser import parse_diff
+from diffquiz.question_bank import open_question_bank, diff_hunk_keys
+from diffquiz.security import hash_quiz_answers, quiz_variant
+from diffquiz.similarity_index import open_similarity_index, INDEX_FILENAME
+
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,3 @@
+ import os
+-x = compute(1)
++x = compute(2)
++y = x * 2
+"""
+
+
+@pytest.fixture
+def settings(tmp_path):
+    """Configuration avec stockage local dans un répertoire temporaire."""
+    return Settings(
+        llm_api_key="test-key",
+        quiz_store_dir=str(tmp_path / "store"),
+        context_enrichment_enabled=False,
+        circuit_breaker_enabled=False
+    )
+
+
+def test_run_returns_result_without_writing_files(settings, fake_llm, tmp_path, monkeypatch):
+    """Le résultat porte le quiz, le hash, le HTML et les durées ; rien n'est écrit."""
+    monkeypatch.chdir(tmp_path)
+    with QuizClient(settings) as client:
+        result = client.run(DIFF, QuizOptions(repository="team/app", commit_url="https://example.com/c/1"))
+
+    assert result.ok and result.status == STATUS_OK
+    assert result.source == api.SOURCE_LLM
+    assert len(result.quiz) == 1
+    assert result.secret_hash == hash_quiz_answers([q["answer"] for q in result.quiz])
+    assert "https://example.com/c/1" in result.html
+    assert {"prepare", "generate", "render", "total"} <= set(result.timings)
+    assert not (tmp_path / "quiz.env").exists()
+
+    result.write(str(tmp_path))
+    assert (tmp_path / "quiz.env").read_text() == f"EXPECTED_SECRET_HASH={result.secret_hash}\n"
+    assert (tmp_path / "quiz_report.html").read_text() == result.html
+
+
+def test_run_reuses_local_store(settings, fake_llm):
+    """Un client réutilisé retrouve les questions enregistrées par les générations précédentes."""
+    with QuizClient(settings) as client:
+        client.run(DIFF, QuizOptions(repository="team/app"))
+    with QuizClient(settings) as client:
+        result = client.run(DIFF, QuizOptions(repository="team/app"))
+
+    assert fake_llm == [1]
+    assert result.source == api.SOURCE_SIMILAR
+
+
+def test_similarity_index_round_trip_and_unwritable_store(settings, fake_llm, tmp_path):
+    """Le quiz est écrit dans l'index réel puis relu ; un répertoire inutilisable est ignoré."""
+    with QuizClient(settings) as client:
+        client.run(DIFF, QuizOptions(repository="team/app"))
+    with open_similarity_index(settings) as index:
+        assert len(index) == 1
+    with QuizClient(settings) as client:
+        assert client.run(DIFF, QuizOptions(repository="team/app")).source == api.SOURCE_SIMILAR
+
+    (tmp_path / "file").write_text("")
+    broken = settings.model_copy(update={"quiz_store_dir": str(tmp_path / "file" / "store")})
+    assert open_similarity_index(broken) is None
+    with QuizClient(broken) as client:
+        result = client.run(DIFF, QuizOptions(repository="team/app"))
+    assert result.status == STATUS_OK and result.source == api.SOURCE_LLM
+
+
+def test_question_bank_round_trip_with_cascade_model(settings, fake_llm, tmp_path):
+    """Les questions du modèle rapide sont enregistrées sous ce modèle dans la banque réelle puis réutilisées."""
+    settings = settings.model_copy(update={"llm_fast_model": "small-model"})
+    with QuizClient(settings) as client:
+        client.run(DIFF, QuizOptions(repository="team/app"))
+    with open_question_bank(settings) as bank:
+        assert len(bank) == 1
+        keys = diff_hunk_keys(parse_diff(DIFF))
+        assert bank.lookup("team/app", "small-model", keys)
+        assert bank.lookup("team/app", settings.llm_model, keys) == []
+
+    os.remove(os.path.join(settings.quiz_store_dir, INDEX_FILENAME))
+    with QuizClient(settings) as client:
+        result = client.run(DIFF, QuizOptions(repository="team/app"))
+    assert fake_llm == [1]
+    assert result.source == api.SOURCE_BANK
+
+
+def test_pool_oversampling_draws_variants(settings, fake_llm):
+    """Un seul appel pour un pool élargi ; la génération suivante tire sa variante dans le pool stocké."""
+    settings = settings.model_copy(update={"quiz_pool_factor": 3})
+    with QuizClient(settings) as client:
+        first = client.run(DIFF, QuizOptions(repository="team/app"))
+    with QuizClient(settings) as client:
+        second = client.run(DIFF, QuizOptions(repository="team/app"))
+
+    assert fake_llm == [3]
+    assert len(first.quiz) == 1 and len(first.pool) == 3
+    assert second.source == api.SOURCE_SIMILAR and len(second.pool) == 3
+    token = quiz_variant([q["question"] for q in first.quiz])
+    assert first.secret_hash == hash_quiz_answers([q["answer"] for q in first.quiz], token)
+    assert f'"{token}"' in first.html
+    assert len(first.artifact().pool) == 3
+
+
+def test_start_quiz_returns_before_explanations(settings, monkeypatch):
+    """Deux phases : le quiz (et son hash) est disponible avant les explications, demandées en un seul appel."""
+    settings = settings.model_copy(update={"two_phase_generation": True})
+    explaining = threading.Event()
+    prompts = []
+
+    def fake_call(prompt_system, prompt_user, settings, model=None, deadline=None, seed=None):
+        prompts.append(prompt_user)
+        if "Bonne réponse" not in prompt_user:
+            return json.dumps([{"question": f"Q{i}?", "options": ["A) Un", "B) Deux"], "answer": "A"} for i in range(3)])
+        assert explaining.wait(5)
+        return json.dumps([f"Parce que {i}." for i in range(3)])
+
+    monkeypatch.setattr(quiz_generator, "call_llm_api", fake_call)
+    with QuizClient(settings) as client:
+        quiz, source, pool, explanations = client.start_quiz(DIFF, 3, "team/app")
+        assert source == api.SOURCE_LLM and not explanations.done()
+        secret_hash = hash_quiz_answers([q["answer"] for q in quiz])
+        explaining.set()
+        explained = client.apply_explanations(quiz, explanations)
+
+    assert len(prompts) == 2
+    assert [q["explanation"] for q in explained] == ["Parce que 0.", "Parce que 1.", "Parce que 2."]
+    assert hash_quiz_answers([q["answer"] for q in explained]) == secret_hash
+
+
+def test_run_skip_and_pass(settings, monkeypatch):
+    """Diff trivial : SKIP ; échec du LLM : PASS avec la raison."""
+    with QuizClient(settings) as client:
+        skipped = client.run("diff --git a/README.md b/README.md\n--- a/README.md\n+++ b/README.md\n@@ -1 +1 @@\n-Doc\n+Docs\n")
+        assert skipped.status == STATUS_SKIP
+        assert skipped.secret_hash == "SKIP" and skipped.html is None
+
+        def failing(*args, **kwargs):
+            raise QuizGenerationError("JSON invalide")
+
+        monkeypatch.setattr(api, "generate_quiz_with_model", failing)
+        failed = client.run(DIFF, QuizOptions(use_store=False))
+    assert failed.status == STATUS_PASS
+    assert failed.secret_hash == "PASS"
+    assert "JSON invalide" in failed.error
+
+
+def test_client_is_thread_safe(settings, fake_llm):
+    """Plusieurs threads partagent le même client et ses index locaux."""
+    results = []
+    with QuizClient(settings) as client:
+        def worker(n):
+            diff = DIFF.replace("compute(2)", f"compute({n + 10})")
+            results.append(client.run(diff, QuizOptions(repository=f"team/app{n}", render_html=False)))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert len(results) == 8
+    assert all(result.ok and result.html is None for result in results)
+
+
+def test_package_exports_are_lazy():
+    """`import diffquiz` ne charge l'API qu'au premier accès (pas d'avertissement de python -m)."""
+    code = (
+        "import sys, diffquiz; assert 'diffquiz.api' not in sys.modules; "
+        "assert diffquiz.QuizClient is sys.modules['diffquiz.api'].QuizClient"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+    subprocess.run([sys.executable, "-W", "error", "-m", "diffquiz.quiz_notes", "--help"],
+                   check=True, capture_output=True)
@@ -0,0 +1,157 @@
+"""
+Tests pour le module circuit_breaker.
+"""
+import io
+import json
+import urllib.error
+import pytest
+from diffquiz.circuit_breaker import (
+    CircuitBreaker,
+    STATE_CLOSED,
+    STATE_OPEN,
+    STATE_HALF_OPEN
+)
+from diffquiz.config import Settings
+from diffquiz.exceptions import CircuitOpenError, LLMAPIError
+from diffquiz import llm_client
+
+
+def make_breaker(tmp_path, clock, **kwargs):
+    """Crée un disjoncteur avec un fichier d'état temporaire."""
+    return CircuitBreaker(
+        state_file=str(tmp_path / "state.json"),
+        key="https://llm.example/v1",
+        failure_threshold=kwargs.get("failure_threshold", 2),
+        reset_timeout=kwargs.get("reset_timeout", 60),
+        probe_timeout=kwargs.get("probe_timeout", 30),
+        clock=clock
+    )
+
+
+def test_breaker_opens_after_threshold(tmp_path, clock):
+    """Le disjoncteur s'ouvre après le seuil d'échecs."""
+    breaker = make_breaker(tmp_path, clock)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+
+
+def test_breaker_state_is_shared_between_instances(tmp_path, clock):
+    """Deux instances sur le même fichier partagent l'état."""
+    first = make_breaker(tmp_path, clock)
+    second = make_breaker(tmp_path, clock)
+
+    first.record_failure()
+    first.record_failure()
+    assert not second.allow_request()
+
+
+def test_breaker_half_open_allows_single_probe(tmp_path, clock):
+    """Une seule sonde est autorisée en état semi-ouvert."""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    clock.now += 61
+    assert breaker.state == STATE_HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    # Sonde abandonnée : un autre job peut sonder après probe_timeout
+    clock.now += 31
+    assert breaker.allow_request()
+
+
+def test_breaker_probe_outcome(tmp_path, clock):
+    """Une sonde réussie referme, une sonde échouée rouvre."""
+    breaker = make_breaker(tmp_path, clock)
+    breaker.record_failure()
+    breaker.record_failure()
+
+    clock.now += 61
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    clock.now += 61
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+
+
+def test_breaker_recovers_from_corrupted_state(tmp_path, clock):
+    """Un fichier d'état corrompu est ignoré."""
+    (tmp_path / "state.json").write_text("{not json", encoding="utf-8")
+    breaker = make_breaker(tmp_path, clock)
+    assert breaker.allow_request()
+
+
+def test_call_llm_api_fails_fast_when_open(tmp_path, monkeypatch):
+    """call_llm_api n'appelle pas le réseau quand le disjoncteur est ouvert."""
+    settings = Settings(
+        llm_api_key="test-key",
+        circuit_breaker_state_file=str(tmp_path / "state.json"),
+        circuit_breaker_failure_threshold=1
+    )
+    breaker = llm_client.get_circuit_breaker(settings)
+    breaker.record_failure()
+
+    def fail_urlopen(*args, **kwargs):
+        raise AssertionError("urlopen ne doit pas être appelé")
+
+    monkeypatch.setattr(llm_client.urllib.request, "urlopen", fail_urlopen)
+    with pytest.raises(CircuitOpenError):
+        llm_client.call_llm_api("system", "user", settings)
+
+
+@pytest.mark.parametrize("error", [
+    urllib.error.HTTPError("https://llm.example", 400, "Bad Request", {}, io.BytesIO(b"")),
+    RuntimeError("inattendu"),
+])
+def test_probe_released_without_verdict(tmp_path, monkeypatch, error):
+    """Une sonde terminée par une erreur 4xx ou inattendue est libérée pour le job suivant."""
+    settings = Settings(
+        llm_api_key="test-key",
+        circuit_breaker_state_file=str(tmp_path / "state.json"),
+        circuit_breaker_failure_threshold=1
+    )
+    (tmp_path / "state.json").write_text(json.dumps({settings.llm_api_url: {"failures": 1, "opened_at": 0}}))
+
+    class FailingOpener:
+        def open(self, *args, **kwargs):
+            raise error
+
+    monkeypatch.setattr(llm_client.urllib.request, "build_opener", lambda *handlers: FailingOpener())
+    with pytest.raises(LLMAPIError):
+        llm_client.call_llm_api("system", "user", settings)
+
+    state = json.loads((tmp_path / "state.json").read_text())[settings.llm_api_url]
+    assert state["opened_at"] == 0 and state["probe_started_at"] is None
+    assert llm_client.get_circuit_breaker(settings).allow_request()
+
+
+@pytest.mark.parametrize("body", [b"<html>Bad Gateway</html>", b'{"error": "upstream"}', b'{"choices": [{}]}'])
+def test_unusable_response_is_not_a_success(tmp_path, monkeypatch, body):
+    """Une réponse 200 sans contenu exploitable compte comme un échec de la sonde."""
+    settings = Settings(
+        llm_api_key="test-key",
+        circuit_breaker_state_file=str(tmp_path / "state.json"),
+        circuit_breaker_failure_threshold=1
+    )
+    (tmp_path / "state.json").write_text(json.dumps({settings.llm_api_url: {"failures": 1, "opened_at": 0}}))
+
+    class GarbageOpener:
+        def open(self, *args, **kwargs):
+            return io.BytesIO(body)
+
+    monkeypatch.setattr(llm_client.urllib.request, "build_opener", lambda *handlers: GarbageOpener())
+    with pytest.raises(LLMAPIError):
+        llm_client.call_llm_api("system", "user", settings)
+
+    state = json.loads((tmp_path / "state.json").read_text())[settings.llm_api_url]
+    assert state["opened_at"] > 0
+    assert not llm_client.get_circuit_breaker(settings).allow_request()
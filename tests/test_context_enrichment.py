@@ -0,0 +1,121 @@
+"""
+Tests pour le module context_enrichment.
+"""
+import time
+import subprocess
+import pytest
+from diffquiz.api import QuizClient
+from diffquiz.config import Settings
+from diffquiz.context_enrichment import (
+    BlobReader,
+    build_diff_context,
+    find_enclosing_definition
+)
+from diffquiz.exceptions import GitDiffError
+
+
+PYTHON_SOURCE = """import os
+
+
+class Service:
+    def start(self):
+        self.ready = True
+        return self.ready
+
+    def stop(self):
+        self.ready = False
+""".splitlines()
+
+
+def test_find_enclosing_definition_python():
+    """La méthode englobant une ligne est trouvée avec ses bornes."""
+    assert find_enclosing_definition(PYTHON_SOURCE, 6) == (5, 8)
+    assert find_enclosing_definition(PYTHON_SOURCE, 10) == (9, 10)
+
+
+def test_find_enclosing_definition_top_level():
+    """Une instruction de premier niveau n'a pas de définition englobante."""
+    assert find_enclosing_definition(PYTHON_SOURCE, 1) is None
+
+
+def test_find_enclosing_definition_braces():
+    """Les langages à accolades incluent l'accolade fermante."""
+    source = [
+        "function add(a, b) {",
+        "    const total = a + b;",
+        "    return total;",
+        "}",
+        "",
+    ]
+    assert find_enclosing_definition(source, 2) == (1, 4)
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Dépôt git temporaire dont le dernier commit modifie une méthode."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True, text=True).stdout
+
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "Test")
+    source = tmp_path / "service.py"
+    source.write_text("\n".join(PYTHON_SOURCE) + "\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+    source.write_text(source.read_text().replace("self.ready = True", "self.ready = check()"))
+    git("commit", "-q", "-am", "update")
+    monkeypatch.chdir(tmp_path)
+    return git
+
+
+def test_blob_reader_uses_cache(git_repo):
+    """Les lectures répétées d'un blob sont servies par le cache."""
+    sha = git_repo("rev-parse", "HEAD:service.py").strip()
+    with BlobReader(cache_size=2) as reader:
+        first = reader.read(sha)
+        second = reader.read(sha)
+        assert reader.read("0" * 40) is None
+
+    assert first == second
+    assert b"check()" in first
+    assert reader.hits == 1
+    assert reader.misses == 2
+
+
+def test_build_diff_context(git_repo):
+    """Le contexte contient la méthode englobante et respecte le plafond."""
+    diff = git_repo("diff", "HEAD^", "HEAD", "--unified=0")
+
+    context = build_diff_context(diff)
+    assert "--- service.py (lignes 5-8)" in context
+    assert "def start(self):" in context
+    assert "def stop(self):" not in context
+
+    assert build_diff_context(diff, max_chars=10) is None
+
+
+def test_client_keeps_blob_reader_between_quizzes(git_repo):
+    """Le lecteur de blobs du client sert son cache au quiz suivant ; close() l'arrête."""
+    diff = git_repo("diff", "HEAD^", "HEAD", "--unified=0")
+    client = QuizClient(Settings(llm_api_key="test-key"))
+
+    assert "def start(self):" in client._diff_context(diff, None, None)
+    assert client._diff_context(diff, None, None) is not None
+    reader = client._blob_readers[None]
+    assert (reader.hits, reader.misses) == (1, 1)
+
+    client.close()
+    assert reader._process is None and not client._blob_readers
+
+
+def test_blob_reader_times_out_on_hung_git():
+    """Un processus git qui ne répond plus est arrêté au bout du timeout."""
+    reader = BlobReader(timeout=0.3)
+    reader._process = subprocess.Popen(["sleep", "30"], stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+
+    started = time.monotonic()
+    with pytest.raises(GitDiffError):
+        reader.read("HEAD:service.py")
+    assert time.monotonic() - started < 5
+    assert reader._process is None
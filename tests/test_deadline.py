@@ -0,0 +1,52 @@
+"""
+Tests pour le module deadline.
+"""
+import time
+import pytest
+from diffquiz.deadline import Deadline
+from diffquiz.exceptions import DeadlineExceededError
+from diffquiz.llm_client import call_llm_api
+
+
+def test_deadline_unbounded():
+    """Sans budget, les timeouts des étapes sont inchangés."""
+    deadline = Deadline(None)
+    assert deadline.remaining() is None
+    assert not deadline.expired()
+    assert deadline.timeout(30, "git diff") == 30
+
+
+def test_deadline_caps_stage_timeout(clock):
+    """Le timeout d'une étape est borné par le temps restant, réserve déduite."""
+    deadline = Deadline(100, reserve_seconds=5, clock=clock)
+
+    assert deadline.timeout(30, "git diff") == 30
+    clock.now += 80
+    assert deadline.timeout(30, "appel LLM") == pytest.approx(15)
+
+
+def test_deadline_expired_raises(clock):
+    """Une étape ne démarre pas si le budget est épuisé."""
+    deadline = Deadline(10, reserve_seconds=5, clock=clock)
+    clock.now += 6
+
+    assert deadline.expired()
+    with pytest.raises(DeadlineExceededError):
+        deadline.timeout(30, "appel LLM")
+
+
+def test_call_llm_api_within_deadline(llm_settings):
+    """L'appel aboutit quand le budget est suffisant."""
+    content = call_llm_api("system", "user", llm_settings, deadline=Deadline(60))
+    assert content == "[]"
+
+
+def test_call_llm_api_read_bounded_by_deadline(llm_server, llm_settings):
+    """Un serveur trop lent est abandonné à l'échéance globale."""
+    llm_server.delay = 1.0
+    deadline = Deadline(10.3, reserve_seconds=10)
+
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceededError):
+        call_llm_api("system", "user", llm_settings, deadline=deadline)
+    assert time.monotonic() - start < 0.9
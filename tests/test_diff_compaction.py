@@ -0,0 +1,61 @@
+"""
+Tests pour le module diff_compaction.
+"""
+from diffquiz.diff_compaction import compact_diff
+from diffquiz.diff_parser import parse_diff
+
+
+def make_file_diff(path: str, removed: str, added: str) -> str:
+    """Construit le diff d'un fichier à un hunk."""
+    return (f"diff --git a/{path} b/{path}\n--- a/{path}\n+++ b/{path}\n"
+            f"@@ -3 +3 @@\n-{removed}\n+{added}")
+
+
+def test_repeated_hunks_are_grouped():
+    """Un import mis à jour dans 20 fichiers devient un hunk et la liste des fichiers."""
+    files = [make_file_diff(f"pkg/mod_{i}.py", "from old import api", "from new import api") for i in range(20)]
+    files.append(make_file_diff("pkg/core.py", "retries = 1", "retries = 3"))
+    diff = "\n".join(files)
+
+    compacted = compact_diff(diff, min_repeats=3, max_listed_files=5)
+    parsed = parse_diff(compacted)
+
+    assert [f["path"] for f in parsed] == ["pkg/mod_0.py", "pkg/core.py"]
+    note = parsed[0]["hunks"][0]["lines"][-1]
+    assert "19 autre(s) hunk(s)" in note
+    assert "pkg/mod_1.py" in note and "et 14 autre(s)" in note
+    assert "+retries = 3" in compacted
+    assert len(compacted) < len(diff) / 5
+
+
+def test_unique_hunks_are_untouched():
+    """Sans répétition suffisante, le diff est inchangé."""
+    diff = "\n".join(make_file_diff(f"m{i}.py", "a = 1", "a = 2") for i in range(2))
+    assert compact_diff(diff, min_repeats=3) == diff
+    assert compact_diff(diff, min_repeats=0) == diff
+    assert compact_diff(None) is None
+
+
+def test_rename_across_call_sites_is_grouped():
+    """Un renommage appliqué à des appels différents forme un groupe ; des constantes différentes non."""
+    files = [make_file_diff(f"svc/h{i}.py", f"r{i} = fetch_user(uid, {i})", f"r{i} = load_user(uid, {i})")
+             for i in range(6)]
+    files += [make_file_diff(f"cfg/{name}.py", f"{name} = 1", f"{name} = 3") for name in ("retries", "timeout", "depth")]
+    diff = "\n".join(files)
+
+    parsed = parse_diff(compact_diff(diff, min_repeats=3))
+
+    assert [f["path"] for f in parsed] == ["svc/h0.py", "cfg/retries.py", "cfg/timeout.py", "cfg/depth.py"]
+    note = parsed[0]["hunks"][0]["lines"][-1]
+    assert "`fetch_user` → `load_user`" in note and "5 autre(s) hunk(s)" in note
+
+
+def test_same_tokens_in_different_context_are_kept():
+    """`True` -> `False` dans trois contextes différents : trois modifications distinctes, aucune masquée."""
+    diff = "\n".join([
+        make_file_diff("a.py", "DEBUG = True", "DEBUG = False"),
+        make_file_diff("b.py", "requests.get(url, verify=True)", "requests.get(url, verify=False)"),
+        make_file_diff("c.py", "if user.is_admin is True:", "if user.is_admin is False:"),
+    ])
+
+    assert compact_diff(diff, 3) == diff
@@ -0,0 +1,98 @@
+"""
+Tests pour le module diff_input.
+"""
+import io
+import pytest
+from diffquiz.diff_input import (
+    count_changed_lines_bytes,
+    read_diff_file,
+    read_diff_stream
+)
+from diffquiz.exceptions import GitDiffError
+from diffquiz.git_utils import count_changed_lines
+import generate_quiz
+
+
+SAMPLE_DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1 +1,2 @@
+-print('hello')
++print('héllo')
++print('world')
+"""
+
+
+def test_count_changed_lines_bytes_matches_text():
+    """Le comptage sur octets est identique au comptage sur texte."""
+    assert count_changed_lines_bytes(SAMPLE_DIFF.encode('utf-8')) == count_changed_lines(SAMPLE_DIFF)
+
+
+def test_read_diff_file(tmp_path):
+    """Lecture complète d'un fichier diff."""
+    path = tmp_path / "change.diff"
+    path.write_text(SAMPLE_DIFF, encoding="utf-8")
+
+    diff, changes = read_diff_file(str(path))
+    assert diff == SAMPLE_DIFF.strip()
+    assert changes == 3
+
+
+def test_read_diff_file_truncates_but_counts_everything(tmp_path):
+    """Seul le début est décodé, mais toutes les lignes sont comptées."""
+    path = tmp_path / "big.diff"
+    path.write_text("\n".join(f"+ligne é {i}" for i in range(1000)), encoding="utf-8")
+
+    diff, changes = read_diff_file(str(path), max_chars=1000)
+    assert len(diff) <= 1000
+    assert diff.startswith("+ligne é 0")
+    assert changes == 1000
+
+
+def test_read_diff_file_empty_and_missing(tmp_path):
+    """Fichier vide : None ; fichier absent : GitDiffError."""
+    path = tmp_path / "empty.diff"
+    path.write_bytes(b"")
+    assert read_diff_file(str(path)) == (None, 0)
+
+    with pytest.raises(GitDiffError):
+        read_diff_file(str(tmp_path / "missing.diff"))
+
+
+def test_read_diff_stream_from_pipe(monkeypatch):
+    """Un flux non mappable est lu par blocs sans couper les lignes."""
+    monkeypatch.setattr("diffquiz.diff_input._CHUNK_SIZE", 7)
+    stream = io.BytesIO(SAMPLE_DIFF.encode('utf-8'))
+
+    diff, changes = read_diff_stream(stream, max_chars=20)
+    assert diff == SAMPLE_DIFF[:20].strip()
+    assert changes == 3
+
+
+def test_read_diff_stream_from_regular_file(tmp_path):
+    """Un flux redirigé depuis un fichier est mappé en mémoire."""
+    path = tmp_path / "change.diff"
+    path.write_text(SAMPLE_DIFF, encoding="utf-8")
+
+    with open(path, "rb") as stream:
+        diff, changes = read_diff_stream(stream)
+    assert diff == SAMPLE_DIFF.strip()
+    assert changes == 3
+
+
+def test_docs_only_diff_file_is_skipped(tmp_path, monkeypatch):
+    """Un diff de documentation lu depuis un fichier ne compte que ses lignes modifiées : mode SKIP sans LLM."""
+    path = tmp_path / "docs.diff"
+    path.write_text(
+        "diff --git a/README.md b/README.md\n--- a/README.md\n+++ b/README.md\n"
+        "@@ -1 +1 @@\n-Bonjour\n+Bonjour à tous\n",
+        encoding="utf-8"
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_API_KEY", "test-key")
+    monkeypatch.setenv("LLM_CONNECTION_WARMUP", "false")
+    monkeypatch.setattr(generate_quiz.QuizClient, "build_quiz", lambda *args, **kwargs: pytest.fail("LLM appelé"))
+
+    assert read_diff_file(str(path))[1] == 2
+    assert generate_quiz.run(diff_file=str(path)) == 0
+    assert (tmp_path / "quiz.env").read_text(encoding="utf-8") == "EXPECTED_SECRET_HASH=SKIP\n"
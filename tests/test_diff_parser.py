@@ -0,0 +1,53 @@
+"""
+Tests pour le module diff_parser.
+"""
+from diffquiz.diff_parser import parse_diff
+
+
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -3 +3,2 @@ def main():
+-    x = 1
++    x = 2
++    y = 3
+@@ -10,0 +12 @@ def other():
++    return y
+diff --git a/old.txt b/old.txt
+deleted file mode 100644
+index 3333333..0000000
+--- a/old.txt
++++ /dev/null
+@@ -1 +0,0 @@
+-bye
+"""
+
+
+def test_parse_diff_files_and_hunks():
+    """Découpage en fichiers et hunks avec numéros de lignes."""
+    files = parse_diff(DIFF)
+
+    assert [f["path"] for f in files] == ["app.py", "old.txt"]
+    app = files[0]
+    assert app["old_blob"] == "1111111"
+    assert app["new_blob"] == "2222222"
+    assert len(app["hunks"]) == 2
+    assert app["hunks"][0]["new_start"] == 3
+    assert app["hunks"][0]["new_count"] == 2
+    assert app["hunks"][0]["lines"] == ["-    x = 1", "+    x = 2", "+    y = 3"]
+    assert app["hunks"][1]["old_count"] == 0
+
+
+def test_parse_diff_deleted_file():
+    """Un fichier supprimé n'a pas de blob après modification."""
+    deleted = parse_diff(DIFF)[1]
+    assert deleted["new_blob"] is None
+    assert deleted["old_path"] == "old.txt"
+    assert deleted["hunks"][0]["new_count"] == 0
+
+
+def test_parse_diff_empty():
+    """Diff vide : aucun fichier."""
+    assert parse_diff(None) == []
+    assert parse_diff("") == []
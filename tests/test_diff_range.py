@@ -0,0 +1,83 @@
+"""
+Tests pour le module diff_range.
+"""
+import subprocess
+import pytest
+from diffquiz.config import Settings
+from diffquiz.diff_range import format_commit_log, get_commit_attribution, resolve_diff_range
+from diffquiz.git_utils import fetch_git_diff
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Dépôt avec une branche main et une branche de fonctionnalité de trois commits."""
+    def git(*args):
+        result = subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    git("init", "-q", "-b", "main")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "Test")
+    (tmp_path / "app.py").write_text("a = 1\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+    git("checkout", "-q", "-b", "feature")
+    for i, name in enumerate(["one.py", "two.py", "three.py"]):
+        (tmp_path / name).write_text(f"value = {i}\n")
+        git("add", name)
+        git("commit", "-q", "-m", f"add {name}")
+    monkeypatch.chdir(tmp_path)
+    for var in ("CI_COMMIT_BEFORE_SHA", "GITHUB_EVENT_PATH", "CI_MERGE_REQUEST_TARGET_BRANCH_NAME", "GITHUB_BASE_REF"):
+        monkeypatch.delenv(var, raising=False)
+    return git
+
+
+def make_settings(**kwargs):
+    return Settings(llm_api_key="test", **kwargs)
+
+
+def test_commit_mode_is_last_commit(git_repo):
+    """Le mode par défaut conserve HEAD^..HEAD."""
+    assert resolve_diff_range(make_settings()) == ("HEAD^", "HEAD")
+
+
+def test_merge_base_mode_squashes_the_branch(git_repo):
+    """Toute la branche est quizzée en un seul diff, avec l'attribution par commit."""
+    settings = make_settings(diff_range_mode="merge-base", diff_target_branch="main")
+    base, head = resolve_diff_range(settings)
+    assert base == git_repo("rev-parse", "main")
+
+    diff, changes = fetch_git_diff(base, head)
+    assert all(name in diff for name in ("one.py", "two.py", "three.py"))
+    assert changes == 3
+
+    commits = get_commit_attribution(base, head, settings)
+    lines = commits.splitlines()
+    assert len(lines) == 3
+    assert "add one.py" in lines[0] and lines[0].endswith(": one.py")
+
+
+def test_push_mode_uses_before_sha(git_repo, monkeypatch):
+    """Le mode push part du commit précédant le push, et retombe sur HEAD^ s'il est inconnu."""
+    before = git_repo("rev-parse", "HEAD~2")
+    monkeypatch.setenv("CI_COMMIT_BEFORE_SHA", before)
+    assert resolve_diff_range(make_settings(diff_range_mode="push")) == (before, "HEAD")
+
+    monkeypatch.setenv("CI_COMMIT_BEFORE_SHA", "0" * 40)
+    assert resolve_diff_range(make_settings(diff_range_mode="auto")) == ("HEAD^", "HEAD")
+
+
+def test_invalid_range_mode():
+    """Un mode inconnu est refusé."""
+    with pytest.raises(ValueError):
+        make_settings(diff_range_mode="everything")
+
+
+def test_format_commit_log_caps_size():
+    """Un seul commit n'apporte rien ; la liste est plafonnée."""
+    commit = {"sha": "abc1234", "author": "Dev", "subject": "Fix", "files": ["a.py"]}
+    assert format_commit_log([commit]) is None
+
+    text = format_commit_log([commit] * 100, max_chars=200)
+    assert text.splitlines()[-1].startswith("- ...")
+    assert len(text) < 300
@@ -1,8 +1,16 @@
 """
 Tests pour le module git_utils.
 """
+import logging
+import subprocess
 import pytest
-from diffquiz.git_utils import calculate_question_count
+from diffquiz.git_utils import (
+    calculate_question_count,
+    parse_numstat,
+    select_diff_files,
+    fetch_git_diff,
+    is_ancestor
+)
 
 
 def test_calculate_question_count_empty():
@@ -35,3 +43,97 @@ def test_calculate_question_count_no_changes():
     assert calculate_question_count(diff) == 0
 
 
+def test_parse_numstat_with_rename_and_binary():
+    """Analyse de la sortie --numstat -z (renommage et binaire)."""
+    output = "3\t1\tsrc/app.py\0-\t-\tlogo.png\0" "2\t0\t\0old/name.py\0new/name.py\0"
+    files = parse_numstat(output)
+
+    assert files[0] == {"path": "src/app.py", "old_path": None, "added": 3, "deleted": 1, "binary": False}
+    assert files[1]["binary"] is True
+    assert files[2]["path"] == "new/name.py"
+    assert files[2]["old_path"] == "old/name.py"
+
+
+def test_select_diff_files_filters_and_budget():
+    """Les binaires et exclusions sont écartés, la sélection s'arrête au budget."""
+    files = [
+        {"path": "a.py", "old_path": None, "added": 100, "deleted": 0, "binary": False},
+        {"path": "poetry.lock", "old_path": None, "added": 5, "deleted": 5, "binary": False},
+        {"path": "img.png", "old_path": None, "added": 0, "deleted": 0, "binary": True},
+        {"path": "b.py", "old_path": None, "added": 1000, "deleted": 0, "binary": False},
+        {"path": "c.py", "old_path": None, "added": 1, "deleted": 0, "binary": False},
+    ]
+    selected = select_diff_files(files, max_chars=1000, exclude_patterns=["*.lock"])
+    assert [f["path"] for f in selected] == ["a.py", "b.py"]
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch):
+    """Dépôt git temporaire avec deux commits."""
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "test@example.com")
+    git("config", "user.name", "Test")
+    (tmp_path / "keep.py").write_text("a = 1\n")
+    (tmp_path / "yarn.lock").write_text("v1\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "initial")
+    (tmp_path / "keep.py").write_text("a = 2\nb = 3\n")
+    (tmp_path / "yarn.lock").write_text("v2\n")
+    git("commit", "-q", "-am", "update")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_fetch_git_diff_two_phase(git_repo):
+    """Seul le patch des fichiers retenus est récupéré."""
+    diff, changes = fetch_git_diff(exclude_patterns=["*.lock"])
+
+    assert "keep.py" in diff
+    assert "yarn.lock" not in diff
+    assert changes == 3
+
+
+def test_fetch_git_diff_everything_excluded(git_repo):
+    """Aucun fichier retenu : pas de diff."""
+    assert fetch_git_diff(exclude_patterns=["*"]) == (None, 0)
+
+
+def test_fetch_git_diff_compacts_before_budget(git_repo):
+    """Les répétitions sont comptées au-delà du budget, dans une limite de récupération."""
+    def git(*args):
+        subprocess.run(["git", *args], cwd=git_repo, check=True, capture_output=True)
+
+    for i in range(30):
+        (git_repo / f"mod_{i}.py").write_text(f"from old_api import client_{i}\n")
+    git("add", ".")
+    git("commit", "-q", "-m", "modules")
+    for i in range(30):
+        (git_repo / f"mod_{i}.py").write_text(f"from new_api import client_{i}\n")
+    git("commit", "-q", "-am", "rename")
+
+    diff, changes = fetch_git_diff(max_chars=1000, compaction_min_repeats=3)
+
+    assert diff.count("diff --git") == 1
+    assert "29 autre(s) hunk(s)" in diff
+    assert changes < 10
+
+    # Récupération bornée : au plus COMPACTION_FETCH_FACTOR fois le budget
+    diff, _ = fetch_git_diff(max_chars=100, compaction_min_repeats=3)
+    assert "29 autre(s) hunk(s)" not in diff
+
+
+def test_is_ancestor_answer_is_not_a_warning(git_repo, caplog):
+    """Exit 1 de merge-base --is-ancestor : réponse normale, pas d'avertissement."""
+    first = subprocess.run(["git", "rev-parse", "HEAD~1"], capture_output=True, text=True).stdout.strip()
+    with caplog.at_level(logging.DEBUG, logger="diffquiz.git_utils"):
+        assert is_ancestor(first)
+        assert not is_ancestor("HEAD", first)
+    assert not [r for r in caplog.records if r.levelno >= logging.WARNING]
+
+    # Commit inconnu (exit 128) : toujours signalé
+    with caplog.at_level(logging.WARNING, logger="diffquiz.git_utils"):
+        assert not is_ancestor("0" * 40)
+    assert any(r.levelno == logging.WARNING for r in caplog.records)
@@ -0,0 +1,86 @@
+"""
+Tests pour le module history_site.
+"""
+import gzip
+import json
+from diffquiz.html_generator import generate_html
+from diffquiz.history_site import scrape_report, build_search_index, build_site, load_history
+from diffquiz.models import parse_quiz
+from diffquiz.quiz_artifact import QuizArtifact, write_artifact
+
+
+QUIZ = [{
+    "question": "Que fait <b>parse_diff</b> ?",
+    "options": ["A) Découpe & analyse", "B) Rien"],
+    "answer": "A",
+    "explanation": "Voir \"diff_parser\".",
+    "file": "diffquiz/diff_parser.py",
+}, {
+    "question": "Pourquoi un cache ?",
+    "options": ["A) Lent", "B) Rapide", "C) Rien"],
+    "answer": "B",
+    "explanation": "Performances.",
+}]
+
+COMMIT_URL = "https://gitlab.com/g/p/-/commit/abcdef1234567890"
+
+
+def _archive(tmp_path, quiz_id, html):
+    """Archive un rapport comme le job de génération."""
+    directory = tmp_path / "history" / quiz_id
+    directory.mkdir(parents=True)
+    (directory / "quiz_report.html").write_text(html, encoding="utf-8")
+
+
+def test_scrape_report_roundtrip():
+    """Le quiz est reconstruit depuis les rapports en ligne et hors ligne ; rapports PASS ignorés."""
+    for offline in (False, True):
+        report = scrape_report(generate_html(QUIZ, ["A", "B"], COMMIT_URL, offline=offline))
+        assert [q.to_dict() for q in report["questions"]] == QUIZ
+        assert report["commit_url"] == COMMIT_URL
+    assert scrape_report("<h1>Erreur IA - Utilisez le code 'PASS' pour valider.</h1>") is None
+
+
+def test_search_index_terms(tmp_path):
+    """Termes sans accents des énoncés, fichiers (chemin complet et segments) et commits."""
+    _archive(tmp_path, "1", generate_html(QUIZ, ["A", "B"], COMMIT_URL))
+    entries = load_history(str(tmp_path / "history"))
+    terms = build_search_index(entries)["terms"]
+
+    assert terms["parse_diff"] == [0]
+    assert terms["diffquiz/diff_parser.py"] == [0] and terms["diff_parser"] == [0]
+    assert terms["abcdef1234567890"] == [0]
+    assert "decoupe" not in terms  # Options non indexées
+
+
+def test_build_site(tmp_path):
+    """Une page par quiz avec ressources partagées, index, fichiers précompressés, sans réécriture inutile."""
+    _archive(tmp_path, "1", generate_html(QUIZ, ["A", "B"], COMMIT_URL))
+    _archive(tmp_path, "2", "<h1>Erreur IA - Utilisez le code 'PASS' pour valider.</h1>")
+    site = tmp_path / "public"
+
+    assert build_site(str(tmp_path / "history"), str(site)) == 1
+    page = (site / "quiz" / "1.html").read_text(encoding="utf-8")
+    assert '<link href="../assets/quiz.css" rel="stylesheet">' in page and "<style>" not in page
+    assert '<script src="../assets/quiz.js"></script>' in page
+    assert scrape_report(page)["questions"][0].file == "diffquiz/diff_parser.py"
+    assert 'href="quiz/1.html"' in (site / "index.html").read_text(encoding="utf-8")
+    assert gzip.decompress((site / "index.html.gz").read_bytes()) == (site / "index.html").read_bytes()
+    assert "parse_diff" in json.loads((site / "search-index.json").read_text(encoding="utf-8"))["terms"]
+
+    mtime = (site / "quiz" / "1.html.gz").stat().st_mtime_ns
+    build_site(str(tmp_path / "history"), str(site))
+    assert (site / "quiz" / "1.html.gz").stat().st_mtime_ns == mtime
+
+
+def test_quiz_json_preferred(tmp_path):
+    """quiz.json est lu plutôt que le rapport ; les quiz SKIP/PASS sont ignorés."""
+    _archive(tmp_path, "1", "<h1>Rapport illisible</h1>")
+    write_artifact(QuizArtifact(status="ok", questions=parse_quiz(QUIZ), commit_url=COMMIT_URL),
+                   str(tmp_path / "history" / "1"))
+    (tmp_path / "history" / "2").mkdir()
+    write_artifact(QuizArtifact(status="skip"), str(tmp_path / "history" / "2"))
+
+    entry, = load_history(str(tmp_path / "history"))
+    assert entry.quiz_id == "1" and entry.commit == "abcdef1234567890"
+    assert entry.files == ["diffquiz/diff_parser.py"]
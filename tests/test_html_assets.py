@@ -0,0 +1,55 @@
+"""
+Tests pour le module html_assets et le rapport hors ligne.
+"""
+from diffquiz.html_assets import used_classes, purge_css, minify_css, minify_js
+from diffquiz.html_generator import generate_html
+
+
+QUIZ = [{
+    "question": "Que retourne f() ?",
+    "options": ["A) None", "B) Une liste"],
+    "answer": "B",
+    "explanation": "Car.",
+}]
+
+
+def test_used_classes_from_html_and_script():
+    """Classes des attributs HTML et des manipulations JavaScript."""
+    html = '<div class="card shadow"></div><script>el.classList.add(\'copied\', "done"); x.className = \'star\';</script>'
+    assert used_classes([html]) == {"card", "shadow", "copied", "done", "star"}
+
+
+def test_purge_css_keeps_used_rules():
+    """Les règles visant des classes absentes sont retirées, y compris dans les @media."""
+    css = """
+    body { margin: 0; }
+    .card, .unused { padding: 1rem; }
+    .unused { color: red; }
+    .card + .badge { border: 0; }
+    @media (min-width: 576px) { .unused { width: 1px; } .card { width: 2px; } }
+    @keyframes spin { 0% { opacity: 0; } }
+    """
+    purged = purge_css(css, {"card"})
+
+    assert "body" in purged and ".card, .unused" in purged
+    assert "color: red" not in purged and ".badge" not in purged
+    assert "width: 2px" in purged and "width: 1px" not in purged
+    assert "@keyframes spin" in purged
+
+
+def test_minify():
+    """CSS compacté ; JavaScript sans indentation ni commentaires de ligne, URL conservées."""
+    assert minify_css("a { color: red ; }\n/* note */ .b > .c { margin: 0 1px; }") == "a{color:red}.b>.c{margin:0 1px}"
+    script = "<script>\n    // commentaire\n    const url = 'https://example.com';\n\n    go(url);\n</script>"
+    assert minify_js(script) == "<script>\nconst url = 'https://example.com';\ngo(url);\n</script>"
+
+
+def test_offline_report_is_self_contained():
+    """Le rapport hors ligne n'appelle aucun CDN et reste plus léger que le CSS Bootstrap seul."""
+    online = generate_html(QUIZ, ["B"])
+    offline = generate_html(QUIZ, ["B"], offline=True)
+
+    assert "cdn.jsdelivr.net" in online
+    assert "http" not in offline.split("<body")[0]
+    assert ".list-group-item{" in offline and ".bg-light" not in offline
+    assert len(offline) < 25_000
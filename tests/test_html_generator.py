@@ -0,0 +1,38 @@
+"""
+Tests pour le module html_generator.
+"""
+from diffquiz.html_generator import compile_html_template, generate_html, write_html
+
+
+QUIZ = [{
+    "question": "Que vaut <b>x</b> ?",
+    "options": ["A) <script>alert(1)</script>", "B) a & b"],
+    "answer": "B",
+    "explanation": "Car \"x\" < y.",
+}]
+
+
+def test_question_content_is_escaped():
+    """Énoncés, options et explications issus du LLM sont échappés."""
+    html = generate_html(QUIZ, ["B"], commit_url='https://example.com/c?a=1&b="2"')
+
+    assert "Que vaut &lt;b&gt;x&lt;/b&gt; ?" in html
+    assert "A) &lt;script&gt;alert(1)&lt;/script&gt;" in html and "<script>alert(1)" not in html
+    assert "B) a &amp; b" in html
+    assert "Car &quot;x&quot; &lt; y." in html
+    assert 'href="https://example.com/c?a=1&amp;b=&quot;2&quot;"' in html
+
+
+def test_template_compiled_once():
+    """Les fragments statiques sont calculés une fois par processus et par variante."""
+    assert compile_html_template() is compile_html_template()
+    assert compile_html_template(True) is not compile_html_template()
+    assert "\x00" not in generate_html(QUIZ, ["B"])
+
+
+def test_write_html_streams_same_page(tmp_path):
+    """Le rendu écrit au fil de l'eau est identique au rendu en mémoire."""
+    path = tmp_path / "quiz_report.html"
+    write_html(str(path), QUIZ, ["B"], "https://example.com/c")
+
+    assert path.read_text(encoding="utf-8") == generate_html(QUIZ, ["B"], "https://example.com/c")
@@ -0,0 +1,67 @@
+"""
+Tests pour le module incremental.
+"""
+import json
+from diffquiz.incremental import (
+    get_merge_request_id,
+    load_incremental_state,
+    merge_quizzes,
+    save_incremental_state
+)
+
+
+def make_quiz(*answers):
+    """Construit un quiz minimal avec les réponses données."""
+    return [
+        {"question": f"Q{i}", "options": ["A) x", "B) y"], "answer": answer, "explanation": "E"}
+        for i, answer in enumerate(answers)
+    ]
+
+
+def test_merge_request_id_from_ci(monkeypatch):
+    """L'identifiant de MR vient de GitLab ou de la ref GitHub d'une pull request."""
+    monkeypatch.delenv("CI_MERGE_REQUEST_IID", raising=False)
+    monkeypatch.setenv("GITHUB_REF", "refs/heads/main")
+    assert get_merge_request_id() is None
+
+    monkeypatch.setenv("GITHUB_REF", "refs/pull/42/merge")
+    assert get_merge_request_id() == "42"
+
+    monkeypatch.setenv("CI_MERGE_REQUEST_IID", "7")
+    assert get_merge_request_id() == "7"
+
+
+def test_state_round_trip(tmp_path):
+    """L'état enregistré est relu à l'identique."""
+    path = str(tmp_path / "incremental" / "repo_7.json")
+    save_incremental_state(path, "base", "abc123", [("app.py", "f1")], make_quiz("A", "B"))
+
+    state = load_incremental_state(path)
+    assert state["head_sha"] == "abc123"
+    assert state["base_sha"] == "base"
+    assert state["hunks"] == [("app.py", "f1")]
+    assert [q["answer"] for q in state["quiz"]] == ["A", "B"]
+
+
+def test_state_with_tampered_answers_is_ignored(tmp_path):
+    """Un état dont les réponses ne correspondent plus au hash est ignoré."""
+    path = tmp_path / "state.json"
+    save_incremental_state(str(path), None, "abc123", [], make_quiz("A", "B"))
+
+    state = json.loads(path.read_text(encoding="utf-8"))
+    state["quiz"][0]["answer"] = "C"
+    path.write_text(json.dumps(state), encoding="utf-8")
+
+    assert load_incremental_state(str(path)) is None
+    assert load_incremental_state(str(tmp_path / "missing.json")) is None
+
+
+def test_merge_quizzes_drops_oldest_carried_questions():
+    """Les nouvelles questions sont gardées, les plus anciennes reprises sont abandonnées."""
+    carried = make_quiz("A", "B", "C")
+    generated = make_quiz("D", "A")
+
+    merged = merge_quizzes(carried, generated, max_questions=4)
+    assert [q["answer"] for q in merged] == ["B", "C", "D", "A"]
+    assert merge_quizzes(carried, make_quiz("A", "B", "C", "D"), max_questions=4)[0]["answer"] == "A"
+    assert len(merge_quizzes(carried, [], max_questions=5)) == 3
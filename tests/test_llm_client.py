@@ -0,0 +1,103 @@
+"""
+Tests pour le module llm_client.
+"""
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from diffquiz import llm_client
+from diffquiz.config import Settings
+from diffquiz.deadline import Deadline
+from diffquiz.exceptions import DeadlineExceededError
+from diffquiz.llm_client import (
+    call_llm_api, warm_up_connection, record_llm_usage, summarize_usage
+)
+
+
+def test_warm_connection_is_reused(llm_server, llm_settings):
+    """L'appel LLM part sur la connexion pré-ouverte, une seule fois."""
+    assert warm_up_connection(llm_settings)
+    (conn, _), = llm_client._WARM_CONNECTIONS.values()
+    local_address = conn.sock.getsockname()
+
+    assert call_llm_api("system", "user", llm_settings) == "[]"
+    assert call_llm_api("system", "user", llm_settings) == "[]"
+    assert llm_server.clients[0] == local_address
+    assert llm_server.clients[1] != local_address
+
+
+def test_warm_up_failure_is_not_fatal():
+    """Une API injoignable ne fait pas échouer la pré-connexion."""
+    settings = Settings(
+        llm_api_key="test-key",
+        llm_api_url="http://127.0.0.1:9/api/chat",
+        llm_connect_timeout_seconds=1,
+        circuit_breaker_enabled=False
+    )
+    assert warm_up_connection(settings) is False
+
+
+def test_seed_sent_in_deterministic_mode(llm_server, llm_settings):
+    """La graine et une température nulle sont transmises (format Ollama et OpenAI)."""
+    call_llm_api("system", "user", llm_settings)
+    call_llm_api("system", "user", llm_settings, seed=42)
+
+    unseeded, seeded = llm_server.payloads
+    assert "seed" not in unseeded and unseeded["temperature"] == 0.2
+    assert seeded["seed"] == 42 and seeded["temperature"] == 0
+    assert seeded["options"]["seed"] == 42
+
+
+def test_usage_recorded_in_block(llm_settings):
+    """Modèle et tokens de chaque appel du bloc, rien en dehors."""
+    call_llm_api("system", "user", llm_settings)
+    with record_llm_usage() as usage:
+        call_llm_api("system", "user", llm_settings)
+        call_llm_api("system", "user", llm_settings, model="autre")
+
+    model, totals = summarize_usage(usage)
+    assert model == "llama3:8b"
+    assert totals == {"calls": 2, "prompt_tokens": 240, "completion_tokens": 60, "total_tokens": 300}
+
+
+class _StallingHandler(BaseHTTPRequestHandler):
+    """Envoie le début de la réponse puis s'interrompt."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "100")
+        self.end_headers()
+        self.wfile.write(b'{"message": ')
+        self.wfile.flush()
+        time.sleep(1.5)
+        self.wfile.write(b'{"content": ')
+        self.wfile.flush()
+        time.sleep(3)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_read_bounded_by_deadline(monkeypatch):
+    """Un serveur interrompu en cours de réponse n'allonge pas le budget global."""
+    monkeypatch.delenv("http_proxy", raising=False)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StallingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # Chaque bloc arrive avant le timeout de lecture, mais le budget expire entre deux blocs
+        settings = Settings(
+            llm_api_key="test-key",
+            llm_api_url=f"http://127.0.0.1:{server.server_port}/api/chat",
+            circuit_breaker_enabled=False
+        ).model_copy(update={"llm_timeout_seconds": 2})
+        started = time.monotonic()
+        with pytest.raises(DeadlineExceededError):
+            call_llm_api("system", "user", settings, deadline=Deadline(2.5))
+        assert time.monotonic() - started < 3.2
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,91 @@
+"""
+Tests pour le module model_cascade.
+"""
+import json
+import pytest
+from diffquiz.config import Settings
+from diffquiz.model_cascade import is_sensitive_diff, select_models
+from diffquiz import quiz_generator
+
+
+VALID_QUIZ = json.dumps([{
+    "question": "Test?",
+    "options": ["A) Option 1", "B) Option 2"],
+    "answer": "A",
+    "explanation": "Explanation"
+}])
+
+
+@pytest.fixture
+def settings():
+    """Configuration avec cascade activée."""
+    return Settings(
+        llm_api_key="test-key",
+        llm_model="big-model",
+        llm_fast_model="small-model",
+        cascade_max_changed_lines=50,
+        circuit_breaker_enabled=False
+    )
+
+
+def test_is_sensitive_diff():
+    """Détection des constructions sensibles dans les lignes modifiées."""
+    assert is_sensitive_diff("+    subprocess.run(cmd, shell=True)")
+    assert is_sensitive_diff("-query = 'DROP TABLE users'")
+    assert not is_sensitive_diff("+    total = a + b")
+    assert is_sensitive_diff('+    password = os.environ["DB_PASSWORD"]')
+    assert is_sensitive_diff("+headers = {'Authorization': access_token}")
+    # Identifiants qui ne font que contenir un mot sensible
+    assert not is_sensitive_diff("+    tokens = tokenizer.encode(text)")
+    assert not is_sensitive_diff("+    usage.tokens_used += 1")
+    assert not is_sensitive_diff("+    secret_hash = hash_quiz_answers(answers)")
+    assert not is_sensitive_diff("+    password_field_label = 'Mot de passe'")
+    # Les en-têtes de fichiers sont ignorés
+    assert not is_sensitive_diff("+++ b/secret_manager.py")
+
+
+def test_select_models_without_fast_model():
+    """Sans modèle rapide, seul le modèle principal est utilisé."""
+    settings = Settings(llm_api_key="test-key", llm_model="big-model")
+    assert select_models("+x = 1", settings) == ["big-model"]
+
+
+def test_select_models_cascade(settings):
+    """Diff court et sans risque : modèle rapide puis escalade."""
+    assert select_models("+x = 1", settings) == ["small-model", "big-model"]
+
+
+def test_select_models_large_or_sensitive_diff(settings):
+    """Diff volumineux ou sensible : modèle principal directement."""
+    large_diff = "\n".join(f"+line {i}" for i in range(51))
+    assert select_models(large_diff, settings) == ["big-model"]
+    assert select_models("+os.system(cmd)", settings) == ["big-model"]
+
+
+def test_generate_quiz_escalates_on_invalid_json(settings, monkeypatch):
+    """Une réponse invalide du modèle rapide déclenche l'escalade."""
+    calls = []
+
+    def fake_call(prompt_system, prompt_user, settings, model=None, deadline=None, seed=None):
+        calls.append(model)
+        return "pas du json" if model == "small-model" else VALID_QUIZ
+
+    monkeypatch.setattr(quiz_generator, "call_llm_api", fake_call)
+    quiz, model = quiz_generator.generate_quiz_with_model("+x = 1", 1, settings)
+
+    assert calls == ["small-model", "big-model"]
+    assert len(quiz) == 1 and model == "big-model"
+
+
+def test_generate_quiz_keeps_fast_model_result(settings, monkeypatch):
+    """Une réponse valide du modèle rapide évite l'appel au modèle principal."""
+    calls = []
+
+    def fake_call(prompt_system, prompt_user, settings, model=None, deadline=None, seed=None):
+        calls.append(model)
+        return VALID_QUIZ
+
+    monkeypatch.setattr(quiz_generator, "call_llm_api", fake_call)
+    _, model = quiz_generator.generate_quiz_with_model("+x = 1", 1, settings)
+
+    assert calls == ["small-model"] and model == "small-model"
@@ -0,0 +1,60 @@
+"""
+Tests pour le module models.
+"""
+import random
+import pytest
+from diffquiz.models import Question, parse_quiz, dump_quiz
+from diffquiz.quiz_generator import shuffle_questions
+from diffquiz.exceptions import ValidationError
+
+
+QUESTION = {
+    "question": "Que retourne f() ?",
+    "options": ["A) f() retourne None", "b)  Une liste", "C) Un entier"],
+    "answer": " b ",
+    "explanation": "Car.",
+    "file": "app.py",
+}
+
+
+def test_parse_quiz_strips_labels_once():
+    """Les libellés sont retirés à l'analyse, les parenthèses du texte conservées."""
+    question, = parse_quiz([QUESTION])
+
+    assert isinstance(question, Question)
+    assert question.options == ("f() retourne None", "Une liste", "Un entier")
+    assert question.answer == "B" and question.answer_index == 1
+    assert dump_quiz([question])[0]["options"] == ["A) f() retourne None", "B) Une liste", "C) Un entier"]
+    assert parse_quiz([question])[0] is question
+
+
+def test_parse_quiz_reports_every_field():
+    """Toutes les erreurs sont remontées, par question et par champ."""
+    invalid = [dict(QUESTION, answer="D"), {"question": "Incomplète ?", "options": ["A) Seule"]}]
+    with pytest.raises(ValidationError) as error:
+        parse_quiz(invalid)
+
+    message = str(error.value)
+    assert "Question 1 : réponse 'D' invalide" in message
+    assert "Question 2, champ 'options'" in message
+    assert "Question 2, champ 'answer'" in message
+
+
+def test_shuffle_questions_keeps_correct_answer():
+    """Le mélange déplace la bonne réponse avec son texte."""
+    questions = parse_quiz([QUESTION] * 20)
+    shuffled = shuffle_questions(questions, random.Random(1))
+
+    assert all(q.options[q.answer_index] == "Une liste" for q in shuffled)
+    assert len({q.options for q in shuffled}) > 1
+
+
+def test_replace_keeps_option_text():
+    """Une option dont le texte commence par un libellé le garde après mélange (revalidation)."""
+    question, = parse_quiz([dict(QUESTION, options=["A) b) foo", "B) c) bar"], answer="A")])
+    assert question.options == ("b) foo", "c) bar")
+
+    for seed in range(5):
+        shuffled, = shuffle_questions([question], random.Random(seed))
+        assert sorted(shuffled.options) == ["b) foo", "c) bar"]
+        assert shuffled.options[shuffled.answer_index] == "b) foo"
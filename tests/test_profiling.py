@@ -0,0 +1,51 @@
+"""
+Tests pour le module profiling.
+"""
+import pstats
+from diffquiz.profiling import (
+    RunProfiler,
+    profile_stage,
+    PSTATS_FILENAME,
+    REPORT_FILENAME,
+    THREADS_NOTE
+)
+
+
+def test_profiler_records_stages(tmp_path):
+    """Chaque étape enregistre durée, pic mémoire et sites d'allocation."""
+    profiler = RunProfiler(output_dir=str(tmp_path))
+    profiler.start()
+    try:
+        with profiler.stage("diff"):
+            data = [str(i) * 10 for i in range(1000)]
+        with profiler.stage("render"):
+            "".join(data)
+    finally:
+        profiler.stop()
+
+    assert [stage["name"] for stage in profiler.stages] == ["diff", "render"]
+    assert profiler.stages[0]["peak_bytes"] > 0
+    assert profiler.stages[0]["top_allocations"]
+
+
+def test_profiler_writes_reports(tmp_path):
+    """Les rapports pstats et texte sont écrits dans le répertoire de sortie."""
+    profiler = RunProfiler(output_dir=str(tmp_path))
+    profiler.start()
+    with profiler.stage("parse"):
+        sorted(range(1000), reverse=True)
+    profiler.stop()
+    profiler.write_reports()
+
+    stats = pstats.Stats(str(tmp_path / PSTATS_FILENAME))
+    assert stats.total_calls > 0
+    report = (tmp_path / REPORT_FILENAME).read_text(encoding="utf-8")
+    assert "[parse]" in report
+    assert "cProfile" in report
+    assert THREADS_NOTE in report
+
+
+def test_profile_stage_without_profiler():
+    """Sans profileur, profile_stage est un contexte neutre."""
+    with profile_stage(None, "diff"):
+        pass
@@ -0,0 +1,103 @@
+"""
+Tests pour le module question_bank.
+"""
+from diffquiz.diff_parser import parse_diff, format_diff
+from diffquiz.question_bank import (
+    QuestionBank,
+    diff_hunk_keys,
+    hunk_fingerprint,
+    restrict_to_hunks,
+    select_bank_questions
+)
+
+
+DIFF = """diff --git a/app.py b/app.py
+index 1111111..2222222 100644
+--- a/app.py
++++ b/app.py
+@@ -3 +3 @@ def main():
+-    run()
++    run(debug=False)
+@@ -10,0 +11,2 @@ def stop():
++    cleanup()
++    log("stop")
+diff --git a/lib/utils.py b/lib/utils.py
+index 3333333..4444444 100644
+--- a/lib/utils.py
++++ b/lib/utils.py
+@@ -1 +1 @@
+-TIMEOUT = 10
++TIMEOUT = 30"""
+
+
+def make_question(text: str, file: str = None) -> dict:
+    """Construit une question minimale."""
+    question = {
+        "question": text,
+        "options": ["A) Oui", "B) Non"],
+        "answer": "A",
+        "explanation": "Explication"
+    }
+    if file:
+        question["file"] = file
+    return question
+
+
+def test_fingerprint_ignores_line_numbers_and_spaces():
+    """Un hunk déplacé ou réindenté garde la même empreinte."""
+    first = {"lines": ["-    run()", "+    run(debug=False)"]}
+    moved = {"lines": ["-run()", "+run(debug=False)  "]}
+    other = {"lines": ["-run()", "+run(debug=True)"]}
+    assert hunk_fingerprint(first) == hunk_fingerprint(moved)
+    assert hunk_fingerprint(first) != hunk_fingerprint(other)
+
+
+def test_store_and_lookup_by_file(tmp_path):
+    """Une question attribuée à un fichier n'est rattachée qu'aux hunks de ce fichier."""
+    keys = diff_hunk_keys(parse_diff(DIFF))
+    assert len(keys) == 3
+
+    with QuestionBank(str(tmp_path / "bank.sqlite")) as bank:
+        bank.store("group/repo", "model", keys, [
+            make_question("Q app", file="app.py"),
+            make_question("Q utils", file="b/lib/utils.py"),
+            make_question("Q global"),
+        ])
+        assert len(bank) == 3
+
+        # Seul le fichier utils est encore modifié : la question globale n'est pas réutilisable
+        hits = bank.lookup("group/repo", "model", [keys[2]])
+        assert [q["question"] for q, _ in hits] == ["Q utils"]
+
+        assert len(bank.lookup("group/repo", "model", keys)) == 3
+        assert bank.lookup("other/repo", "model", keys) == []
+        assert bank.lookup("group/repo", "other-model", keys) == []
+
+
+def test_select_keeps_room_for_uncovered_hunks():
+    """S'il reste des hunks non couverts, une question est laissée au LLM."""
+    keys = [("a.py", "1"), ("a.py", "2"), ("b.py", "3")]
+    candidates = [
+        (make_question("Q1"), {keys[0]}),
+        (make_question("Q2"), {keys[1]}),
+    ]
+
+    questions, uncovered = select_bank_questions(candidates, keys, count=2)
+    assert len(questions) == 1
+    assert len(uncovered) == 2
+
+    questions, uncovered = select_bank_questions(candidates, keys, count=3)
+    assert [q["question"] for q in questions] == ["Q1", "Q2"]
+    assert uncovered == [keys[2]]
+
+
+def test_restrict_to_uncovered_hunks():
+    """Le diff envoyé au LLM ne contient que les hunks restants."""
+    files = parse_diff(DIFF)
+    keys = diff_hunk_keys(files)
+
+    reduced = format_diff(restrict_to_hunks(files, [keys[1]]))
+    assert "+    cleanup()" in reduced
+    assert "run(debug=False)" not in reduced
+    assert "lib/utils.py" not in reduced
+    assert diff_hunk_keys(parse_diff(reduced)) == [keys[1]]
@@ -0,0 +1,111 @@
+"""
+Tests pour le module quiz_artifact.
+"""
+import gzip
+import json
+import random
+import pytest
+from diffquiz import api
+from diffquiz.api import QuizClient, QuizOptions
+from diffquiz.config import Settings
+from diffquiz.exceptions import ValidationError
+from diffquiz.html_generator import generate_html
+from diffquiz.models import parse_quiz
+from diffquiz.quiz_artifact import (
+    QuizArtifact, write_artifact, load_artifact, render_artifact, quiz_json_schema, find_artifact,
+    draw_from_pool
+)
+from diffquiz.security import hash_quiz_answers, quiz_variant
+
+
+DIFF = """diff --git a/app.py b/app.py
+--- a/app.py
++++ b/app.py
+@@ -1,2 +1,2 @@
+ import os
+-x = compute(1)
++x = compute(2)
+"""
+
+QUIZ = [{
+    "question": "Que retourne f() ?",
+    "options": ["A) None", "B) Une liste"],
+    "answer": "B",
+    "explanation": "Car.",
+    "file": "app.py",
+}]
+
+
+def test_write_and_load_roundtrip(tmp_path):
+    """quiz.json lisible, variante compacte compressée équivalente."""
+    artifact = QuizArtifact(
+        status="ok", questions=parse_quiz(QUIZ), model="gpt-4o-mini",
+        usage={"calls": 1, "total_tokens": 42}, timings={"total": 1.5}
+    )
+    json_path, gz_path = write_artifact(artifact, str(tmp_path), compressed=True)
+
+    data = json.loads(open(json_path, encoding="utf-8").read())
+    assert data["schema_version"] == 2 and data["model"] == "gpt-4o-mini"
+    assert data["questions"][0]["options"] == ["None", "Une liste"]
+    assert "commit_url" not in json.loads(gzip.decompress(open(gz_path, "rb").read()))
+    assert load_artifact(json_path) == load_artifact(gz_path) == artifact
+    assert find_artifact(str(tmp_path)) == json_path
+
+
+def test_render_without_llm(tmp_path):
+    """Le rapport re-rendu est identique au rendu initial ; un artefact sans quiz est refusé."""
+    artifact = QuizArtifact(status="ok", questions=parse_quiz(QUIZ), commit_url="https://example.com/c")
+    output = tmp_path / "quiz_report.html"
+
+    assert render_artifact(artifact, str(output)) == hash_quiz_answers(["B"])
+    assert output.read_text(encoding="utf-8") == generate_html(QUIZ, ["B"], "https://example.com/c")
+    with pytest.raises(ValidationError):
+        render_artifact(QuizArtifact(status="skip"), str(output))
+
+
+def test_draw_from_pool(tmp_path):
+    """Variante tirée du pool : même nombre de questions, hash propre à la variante ; sans pool, erreur."""
+    pool = parse_quiz([dict(QUIZ[0], question=f"Q{i} ?") for i in range(5)])
+    artifact = QuizArtifact(status="ok", questions=pool[:2], pool=pool, usage={"calls": 1})
+
+    variant = draw_from_pool(artifact, random.Random(7))
+    assert len(variant.questions) == 2 and variant.pool == artifact.pool
+    assert variant.usage == {}
+    # Hash propre à la variante, calculé aussi côté client par le rapport re-rendu
+    token = quiz_variant([q.question for q in variant.questions])
+    output = str(tmp_path / "quiz_report.html")
+    assert render_artifact(variant, output) == hash_quiz_answers([q.answer for q in variant.questions], token)
+    assert f'"{token}"' in (tmp_path / "quiz_report.html").read_text(encoding="utf-8")
+
+    # Réponses triées identiques, questions différentes : codes différents
+    draws = [draw_from_pool(artifact, random.Random(seed)) for seed in range(200)]
+    hashes = {render_artifact(d, output) for d in draws}
+    assert len(hashes) == len({(tuple(q.question for q in d.questions),
+                                tuple(sorted(q.answer for q in d.questions))) for d in draws})
+    with pytest.raises(ValidationError):
+        draw_from_pool(QuizArtifact(status="ok", questions=pool[:2]))
+
+
+def test_schema_is_documented():
+    """Chaque champ du schéma porte une description."""
+    schema = quiz_json_schema()
+    assert schema["required"] == ["status"]
+    assert "secret_hash" not in schema["properties"]
+    assert all("description" in field for field in schema["properties"].values())
+
+
+def test_result_write_includes_artifact(tmp_path, monkeypatch):
+    """QuizResult.write écrit quiz.json avec le statut, l'origine et les durées."""
+    monkeypatch.setattr(api, "generate_quiz_with_model", lambda diff, count, settings, **kwargs: (QUIZ * count, settings.llm_model))
+    settings = Settings(llm_api_key="test-key", context_enrichment_enabled=False, circuit_breaker_enabled=False)
+    with QuizClient(settings) as client:
+        result = client.run(DIFF, QuizOptions(repository="team/app", count=1))
+    result.write(str(tmp_path))
+
+    artifact = load_artifact(str(tmp_path / "quiz.json"))
+    assert artifact.status == "ok" and artifact.source == "llm" and artifact.repository == "team/app"
+    assert "total" in artifact.timings
+    # Hash attendu : seulement dans le rapport dotenv, jamais dans l'artefact publié
+    assert result.secret_hash not in (tmp_path / "quiz.json").read_text(encoding="utf-8")
+    assert result.secret_hash in (tmp_path / "quiz.env").read_text(encoding="utf-8")
+    assert artifact.usage["calls"] == 0 and artifact.model is None
@@ -3,11 +3,18 @@ Tests pour le module quiz_generator.
 """
 import pytest
 import json
+import re
+import random
 from diffquiz.quiz_generator import (
     clean_json_text,
     validate_quiz_schema,
-    shuffle_quiz_options
+    shuffle_quiz_options,
+    quiz_seed,
+    pool_size,
+    draw_quiz
 )
+from diffquiz import quiz_generator
+from diffquiz.config import Settings
 from diffquiz.exceptions import ValidationError
 
 
@@ -91,3 +98,73 @@ def test_shuffle_quiz_options():
     assert "Option 1" in shuffled[0]['options'][answer_index]
 
 
+def test_deterministic_mode_is_reproducible(monkeypatch):
+    """Mode déterministe : même diff, même graine envoyée au LLM et même mélange."""
+    settings = Settings(llm_api_key="test-key", deterministic_mode=True, circuit_breaker_enabled=False)
+    seeds = []
+    response = json.dumps([{
+        "question": f"Q{i}?",
+        "options": ["A) Un", "B) Deux", "C) Trois", "D) Quatre"],
+        "answer": "A",
+        "explanation": "Car."
+    } for i in range(5)])
+
+    def fake_call(prompt_system, prompt_user, settings, model=None, deadline=None, seed=None):
+        seeds.append(seed)
+        return response
+
+    monkeypatch.setattr(quiz_generator, "call_llm_api", fake_call)
+    first = quiz_generator.generate_quiz("+x = 1", 5, settings)
+    second = quiz_generator.generate_quiz("+x = 1", 5, settings)
+
+    assert first == second
+    assert seeds == [quiz_seed("+x = 1")] * 2
+    assert quiz_seed("+x = 2") != quiz_seed("+x = 1")
+
+
+def test_draw_quiz_from_pool():
+    """Tirage reproductible d'une graine, variantes distinctes, bonnes réponses préservées."""
+    pool = [{
+        "question": f"Q{i}?",
+        "options": [f"A) Bonne {i}", "B) Fausse", "C) Fausse", "D) Fausse"],
+        "answer": "A",
+        "explanation": "Car."
+    } for i in range(9)]
+
+    first = draw_quiz(pool, 3, random.Random(1))
+    assert first == draw_quiz(pool, 3, random.Random(1))
+    variants = {tuple(q["question"] for q in draw_quiz(pool, 3, random.Random(seed))) for seed in range(10)}
+    assert len(variants) > 1
+    for question in first:
+        assert "Bonne" in question["options"][ord(question["answer"]) - ord("A")]
+    assert pool_size(3, 3) == 9 and pool_size(10, 3) == quiz_generator.MAX_POOL_SIZE and pool_size(3, 1) == 3
+
+
+def test_two_phase_generation(monkeypatch):
+    """Questions sans explications d'abord, puis explications par lots ; un lot en échec ne bloque pas le quiz."""
+    settings = Settings(
+        llm_api_key="test-key", two_phase_generation=True, explanation_batch_size=2, circuit_breaker_enabled=False
+    )
+    prompts = []
+
+    def fake_call(prompt_system, prompt_user, settings, model=None, deadline=None, seed=None):
+        prompts.append(prompt_user)
+        if "Bonne réponse" not in prompt_user:
+            return json.dumps([{
+                "question": f"Q{i}?",
+                "options": ["A) Un", "B) Deux"],
+                "answer": "A"
+            } for i in range(3)])
+        questions = re.findall(r"Question \d+: (Q\d)\?", prompt_user)
+        if "Q2" in questions:
+            return "pas du JSON"
+        return json.dumps([f"Parce que {q}." for q in questions])
+
+    monkeypatch.setattr(quiz_generator, "call_llm_api", fake_call)
+    quiz = quiz_generator.generate_quiz("+x = 1", 3, settings)
+
+    assert '"explanation": ' not in prompts[0]
+    assert all("jamais par sa lettre" in p for p in prompts[1:])
+    assert len(prompts) == 3
+    assert [q["explanation"] for q in quiz] == ["Parce que Q0.", "Parce que Q1.", quiz_generator.MISSING_EXPLANATION]
+
@@ -0,0 +1,112 @@
+"""
+Tests pour le module quiz_notes.
+"""
+import os
+import subprocess
+import pytest
+from diffquiz.config import Settings
+from diffquiz.git_utils import fetch_git_diff
+from diffquiz.quiz_notes import (
+    NOTES_REF, pregenerate, lookup_quiz_note, read_quiz_note, push_notes, fetch_notes,
+    parse_pre_push, install_hook, pre_push_range
+)
+
+
+def git(cwd, *args):
+    """Exécute git dans un dépôt de test."""
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Dépôt de deux commits, répertoire courant du test."""
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    git(path, "config", "user.email", "dev@example.com")
+    git(path, "config", "user.name", "Dev")
+    (path / "app.py").write_text("import os\nx = compute(1)\n")
+    git(path, "add", "app.py")
+    git(path, "commit", "-qm", "init")
+    (path / "app.py").write_text("import os\nx = compute(2)\ny = x * 2\n")
+    git(path, "commit", "-qam", "compute")
+    monkeypatch.chdir(path)
+    return path
+
+
+@pytest.fixture
+def settings():
+    """Configuration sans stockage local ni enrichissement."""
+    return Settings(llm_api_key="test-key", context_enrichment_enabled=False, circuit_breaker_enabled=False)
+
+
+def test_pregenerated_quiz_is_found_for_same_diff(repo, settings, fake_llm):
+    """Le quiz publié dans les notes est retrouvé pour le même diff, ignoré pour un autre."""
+    head = git(repo, "rev-parse", "HEAD")
+    artifact = pregenerate(head, f"{head}^", settings)
+
+    assert artifact is not None and fake_llm == [1]
+    assert read_quiz_note(head) == artifact
+    diff, _ = fetch_git_diff(f"{head}^", head)
+    assert lookup_quiz_note("HEAD", diff) == artifact
+    assert lookup_quiz_note("HEAD", diff + "\n+z = 3") is None
+    assert lookup_quiz_note("HEAD^", diff) is None
+
+
+def test_notes_are_pushed_and_fetched(repo, tmp_path, settings, fake_llm):
+    """Les notes publiées par le développeur sont récupérées par un autre clone (job CI)."""
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    git(repo, "remote", "add", "origin", str(remote))
+    git(repo, "push", "-q", "origin", "HEAD:refs/heads/dev")
+    head = git(repo, "rev-parse", "HEAD")
+    pregenerate(head, f"{head}^", settings, remote="origin")
+
+    clone = tmp_path / "ci"
+    git(tmp_path, "clone", "-q", "--branch", "dev", str(remote), str(clone))
+    assert read_quiz_note("HEAD", cwd=str(clone)) is None
+    assert fetch_notes("origin", cwd=str(clone))
+    assert read_quiz_note("HEAD", cwd=str(clone)) is not None
+
+    # Notes d'un autre développeur publiées entre-temps : fusion avant publication
+    git(clone, "config", "user.email", "other@example.com")
+    git(clone, "config", "user.name", "Other")
+    git(clone, "notes", "--ref", NOTES_REF, "add", "-f", "-m", "{}", "HEAD^")
+    git(clone, "push", "-q", "origin", NOTES_REF)
+    pregenerate(head, f"{head}^", settings)
+    assert push_notes("origin")
+    assert fetch_notes("origin", cwd=str(clone))
+    assert read_quiz_note("HEAD", cwd=str(clone)) is not None
+
+
+def test_pre_push_input_and_hook(repo, settings):
+    """Entrée du hook : suppressions et notes ignorées ; base calculée comme en CI ; hook installé."""
+    zero = "0" * 40
+    head = git(repo, "rev-parse", "HEAD")
+    first = git(repo, "rev-parse", "HEAD^")
+    pushed = parse_pre_push([
+        f"refs/heads/dev {head} refs/heads/dev {first}\n",
+        f"refs/heads/new {head} refs/heads/new {zero}\n",
+        f"(delete) {zero} refs/heads/old {head}\n",
+        f"{NOTES_REF} {head} {NOTES_REF} {zero}\n",
+    ])
+    assert pushed == [(head, first), (head, None)]
+
+    push_settings = settings.model_copy(update={"diff_range_mode": "push"})
+    assert pre_push_range(head, first, push_settings) == first
+    assert pre_push_range(head, None, push_settings) == f"{head}^"
+    assert pre_push_range(head, first, settings) == f"{head}^"
+
+    # Base de merge request : branche cible suivie sur le dépôt poussé, pas forcément origin
+    remote = repo.parent / "upstream.git"
+    git(repo, "init", "-q", "--bare", str(remote))
+    git(repo, "remote", "add", "upstream", str(remote))
+    git(repo, "push", "-q", "upstream", f"{first}:refs/heads/main")
+    git(repo, "fetch", "-q", "upstream")
+    mr_settings = settings.model_copy(update={"diff_range_mode": "merge-base", "diff_target_branch": "main"})
+    assert pre_push_range(head, None, mr_settings, "upstream") == first
+    assert pre_push_range(head, None, mr_settings) == f"{head}^"
+
+    path = install_hook(os.path.join(str(repo), ".git"))
+    assert os.access(path, os.X_OK)
+    assert install_hook(os.path.join(str(repo), ".git")) == path
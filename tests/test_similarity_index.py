@@ -0,0 +1,69 @@
+"""
+Tests pour le module similarity_index.
+"""
+from diffquiz.similarity_index import (
+    SimilarityIndex,
+    estimate_similarity,
+    minhash_signature,
+    normalize_diff_lines
+)
+
+
+QUIZ = [{
+    "question": "Test?",
+    "options": ["A) Option 1", "B) Option 2"],
+    "answer": "A",
+    "explanation": "Explanation"
+}]
+
+
+def make_diff(path: str, lines: int, variant: str = "") -> str:
+    """Construit un diff synthétique."""
+    body = "\n".join(f"+    value_{i} = compute({i}){variant}" for i in range(lines))
+    return f"--- a/{path}\n+++ b/{path}\n@@ -1 +1,{lines} @@\n-    old = 1\n{body}"
+
+
+def test_normalize_diff_lines():
+    """Les en-têtes sont ignorés et les espaces compactés."""
+    shingles = normalize_diff_lines("--- a/x\n+++ b/x\n+a   =  1\n-b = 2\n context")
+    assert shingles == {"+a = 1", "-b = 2"}
+
+
+def test_similar_diffs_have_close_signatures():
+    """Un backport sur un autre fichier reste très similaire, un autre diff non."""
+    base = minhash_signature(normalize_diff_lines(make_diff("svc_a/app.py", 40)))
+    backport = minhash_signature(normalize_diff_lines(make_diff("svc_b/app.py", 40)))
+    other = minhash_signature(normalize_diff_lines(make_diff("app.py", 40, variant=" + 1")))
+
+    assert estimate_similarity(base, backport) == 1.0
+    assert estimate_similarity(base, other) < 0.2
+    assert minhash_signature([]) is None
+
+
+def test_index_query_threshold(tmp_path):
+    """Le quiz n'est retrouvé qu'au-dessus du seuil de similarité."""
+    diff = make_diff("app.py", 40)
+    near = diff + "\n+    extra = 1"
+
+    with SimilarityIndex(str(tmp_path / "index.sqlite")) as index:
+        index.add(minhash_signature(normalize_diff_lines(diff)), QUIZ)
+        assert len(index) == 1
+
+        hit = index.query(minhash_signature(normalize_diff_lines(near)), threshold=0.8)
+        assert hit is not None
+        assert hit[0] >= 0.8
+        assert hit[1] == QUIZ
+
+        unrelated = minhash_signature(normalize_diff_lines(make_diff("app.py", 40, variant="!")))
+        assert index.query(unrelated, threshold=0.8) is None
+
+
+def test_index_persists(tmp_path):
+    """L'index est conservé entre deux ouvertures."""
+    path = str(tmp_path / "index.sqlite")
+    signature = minhash_signature(normalize_diff_lines(make_diff("app.py", 10)))
+    with SimilarityIndex(path) as index:
+        index.add(signature, QUIZ)
+
+    with SimilarityIndex(path) as index:
+        assert index.query(signature, threshold=0.99)[1] == QUIZ
@@ -0,0 +1,76 @@
+"""
+Tests pour le module trivial_changes.
+"""
+from diffquiz.trivial_changes import classify_diff, code_tokens, effective_changed_lines
+
+
+def make_diff(path: str, removed: list, added: list) -> str:
+    """Construit un diff d'un seul hunk."""
+    lines = [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}",
+             f"@@ -1,{len(removed)} +1,{len(added)} @@"]
+    lines += [f"-{line}" for line in removed] + [f"+{line}" for line in added]
+    return "\n".join(lines)
+
+
+def test_code_tokens_ignore_whitespace_and_comments():
+    """Les commentaires sont retirés, sauf dans les chaînes."""
+    assert code_tokens("x = foo(a,b)  # note", ".py") == code_tokens("x = foo( a, b )", ".py")
+    assert code_tokens('url = "http://x#y"', ".py")[-1] == '"http://x#y"'
+    assert code_tokens("call(); // done", ".js") == ["call", "(", ")", ";"]
+
+
+def test_classify_trivial_categories():
+    """Docs, lockfiles, commentaires, formatage et versions sont triviaux."""
+    diff = "\n".join([
+        make_diff("README.md", ["old"], ["new"]),
+        make_diff("yarn.lock", ["a"], ["b"]),
+        make_diff("app.py", ["# old comment"], ["# new comment"]),
+        make_diff("util.js", ["foo(a,b);"], ["foo(", "  a,", "  b", ");"]),
+        make_diff("package.json", ['  "version": "1.2.3",', '  "lodash": "^4.17.20",'],
+                  ['  "version": "1.2.4",', '  "lodash": "^4.17.21",']),
+    ])
+    result = classify_diff(diff)
+    assert result["substantive_lines"] == 0
+    assert result["categories"] == {
+        "docs": 2, "lockfile": 2, "comments": 2, "formatting": 5, "version_bump": 4
+    }
+
+
+def test_real_changes_are_substantive():
+    """Un changement de valeur hors manifeste n'est pas une montée de version."""
+    result = classify_diff(make_diff("config.py", ["ratio = 0.5"], ["ratio = 0.75"]))
+    assert result == {"trivial_lines": 0, "substantive_lines": 2, "categories": {}}
+
+
+def test_significant_whitespace_and_tight_patterns():
+    """Indentation Python/YAML/Makefile, .txt et docs/ imbriqués, affectations non littérales : substantiels."""
+    moved = make_diff("app.py", ["if ok:", "    do_a()", "do_b()"], ["if ok:", "    do_a()", "    do_b()"])
+    assert classify_diff(moved)["substantive_lines"] == 6
+    assert classify_diff(make_diff("ci.yml", ["a:", "b: 1"], ["a:", "  b: 1"]))["substantive_lines"] == 4
+    assert classify_diff(make_diff("Makefile", ["all:", "\tbuild"], ["all:", "build"]))["substantive_lines"] == 4
+    # Hors des langages sensibles, la réindentation reste du formatage
+    assert classify_diff(make_diff("util.js", ["foo();"], ["  foo();"]))["categories"] == {"formatting": 2}
+
+    for path in ("CMakeLists.txt", "src/docs/render.py", "docs/requirements.txt"):
+        assert classify_diff(make_diff(path, ["a()"], ["b()"]))["substantive_lines"] == 2, path
+    for path in ("NEWS.txt", "docs/notes.txt", "doc/guide.rst"):
+        assert classify_diff(make_diff(path, ["a"], ["b"]))["categories"] == {"docs": 2}, path
+
+    assert classify_diff(make_diff("config.py", ["VERSION = MIN"], ["VERSION = MAX"]))["substantive_lines"] == 2
+    assert classify_diff(make_diff("pom.xml", ["<version>${a}</version>"], ["<version>${b}</version>"]))[
+        "substantive_lines"] == 2
+    assert classify_diff(make_diff("setup.py", ["    version='1.2',"], ["    version='1.3',"]))["categories"] == {
+        "version_bump": 2}
+
+
+def test_effective_changed_lines_policies():
+    """skip : 0 si tout est trivial ; reduce : au moins 1 ; off : inchangé ; mixte : lignes utiles."""
+    trivial = make_diff("docs/guide.md", ["a"], ["b"])
+    assert effective_changed_lines(trivial, 2, "skip") == 0
+    assert effective_changed_lines(trivial, 2, "reduce") == 1
+    assert effective_changed_lines(trivial, 2, "off") == 2
+
+    mixed = trivial + "\n" + make_diff("app.py", ["run()"], ["run(debug=True)"])
+    assert effective_changed_lines(mixed, 4, "skip") == 2
+    # Lignes au-delà du texte tronqué : comptées comme substantielles
+    assert effective_changed_lines(trivial, 50, "skip") == 48
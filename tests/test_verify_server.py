@@ -0,0 +1,107 @@
+"""
+Tests pour le module verify_server.
+"""
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from diffquiz.exceptions import VerificationError
+from diffquiz.security import hash_quiz_answers
+from diffquiz.verify_server import (
+    VerificationStore, VerificationServer, register_hash, wait_for_validation, main,
+    STATUS_PENDING, STATUS_VALIDATED, STATUS_LOCKED, EXIT_UNAVAILABLE
+)
+
+EXPECTED = hash_quiz_answers(["A", "C"])
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """Service local avec jeton d'enregistrement."""
+    monkeypatch.delenv("http_proxy", raising=False)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    store = VerificationStore(max_attempts=3)
+    server = VerificationServer(("127.0.0.1", 0), store, token="s3cret")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+    store.close()
+
+
+def _post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_store_attempts_and_lock():
+    """Code correct validé ; essais erronés décomptés puis pipeline verrouillé."""
+    with VerificationStore(max_attempts=2) as store:
+        store.register("1", EXPECTED)
+        assert store.submit("1", "faux") == {
+            "pipeline_id": "1", "status": STATUS_PENDING, "attempts": 1, "attempts_left": 1, "valid": False
+        }
+        assert store.submit("1", f" {EXPECTED.upper()} ")["status"] == STATUS_VALIDATED
+
+        store.register("2", EXPECTED)
+        store.submit("2", "faux")
+        assert store.submit("2", "faux")["status"] == STATUS_LOCKED
+        assert store.submit("2", EXPECTED)["valid"] is False
+
+        assert store.register("3", "SKIP")["status"] == STATUS_VALIDATED
+        assert store.submit("inconnu", EXPECTED) is None
+
+        # Pas de remplacement : seul le même hash est accepté (relance du job)
+        assert store.register("2", "PASS") is None
+        assert store.register("2", EXPECTED)["status"] == STATUS_LOCKED
+
+
+def test_register_submit_and_wait(server):
+    """Enregistrement authentifié, soumission des réponses, long polling réveillé par la validation."""
+    with pytest.raises(VerificationError):
+        register_hash(server, "42", EXPECTED, token="mauvais")
+    with pytest.raises(VerificationError):
+        register_hash(server, "42", "PASS")
+    assert register_hash(server, "42", EXPECTED, token="s3cret")["status"] == STATUS_PENDING
+    with pytest.raises(VerificationError, match="409"):
+        register_hash(server, "42", "PASS", token="s3cret")
+
+    status, state = _post(f"{server}/pipelines/42/answers", {"secret": "faux"})
+    assert status == 200 and state["valid"] is False and state["attempts_left"] == 2
+
+    timer = threading.Timer(0.3, _post, (f"{server}/pipelines/42/answers", {"answers": ["c", "a"]}))
+    timer.start()
+    state = wait_for_validation(server, "42", timeout=10, poll_seconds=5)
+    timer.join()
+    assert state["status"] == STATUS_VALIDATED
+
+    assert wait_for_validation(server, "42", timeout=0)["status"] == STATUS_VALIDATED
+    assert wait_for_validation(server, "inconnu", timeout=0) is None
+
+
+def test_serve_requires_token(tmp_path, monkeypatch):
+    """Sans jeton, le service refuse de démarrer ; sans service, wait signale un état indécidable."""
+    monkeypatch.delenv("DIFFQUIZ_VERIFY_TOKEN", raising=False)
+    assert main(["serve", "--db", str(tmp_path / "verify.sqlite"), "--port", "0"]) == 1
+    with pytest.raises(ValueError):
+        VerificationServer(("127.0.0.1", 0), VerificationStore(), token="")
+    assert main(["wait", "1", "--url", "http://127.0.0.1:9", "--timeout", "0"]) == EXIT_UNAVAILABLE
+
+
+def test_concurrent_validations(server):
+    """Des centaines de soumissions et d'attentes concurrentes aboutissent."""
+    for i in range(100):
+        register_hash(server, f"p{i}", EXPECTED, token="s3cret")
+
+    with ThreadPoolExecutor(max_workers=200) as pool:
+        waits = [pool.submit(wait_for_validation, server, f"p{i}", 10, 5) for i in range(100)]
+        posts = list(pool.map(lambda i: _post(f"{server}/pipelines/p{i}/answers", {"secret": EXPECTED}), range(100)))
+
+    assert all(status == 200 and state["valid"] for status, state in posts)
+    assert all(wait.result()["status"] == STATUS_VALIDATED for wait in waits)